@@ -11,8 +11,10 @@
 # ANY KIND, either express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
 import re
+import threading
 from collections import namedtuple
-from typing import Any, Dict
+from functools import lru_cache
+from typing import Any, Dict, Hashable, List, Optional, Tuple
 
 from boto3.exceptions import (
     DynamoDBNeedsConditionError,
@@ -22,6 +24,24 @@ from boto3.exceptions import (
 
 ATTR_NAME_REGEX = re.compile(r"[^.\[\]]+(?![^\[]*\])")
 
+# The maximum number of attribute names whose parsed placeholder format
+# is kept for the lifetime of the process.
+ATTR_NAME_CACHE_SIZE = 1024
+
+# The maximum number of condition shapes whose built expressions are
+# kept by a single ``ConditionExpressionBuilder``.
+EXPRESSION_CACHE_SIZE = 256
+
+
+@lru_cache(maxsize=ATTR_NAME_CACHE_SIZE)
+def _parse_attribute_name(attribute_name: str) -> Tuple[str, Tuple[str, ...]]:
+    # Figure out which parts of the attribute name that needs replacement,
+    # and add a temporary placeholder for each of these parts.
+    return (
+        ATTR_NAME_REGEX.sub("%s", attribute_name),
+        tuple(ATTR_NAME_REGEX.findall(attribute_name)),
+    )
+
 
 class ConditionBase:
 
@@ -291,11 +311,39 @@ class Attr(AttributeBase):
         return AttributeType(self, value)
 
 
+class Binding:
+    """Represents a value that is bound when a prepared statement is executed.
+
+    It can be used in place of a value in a condition, i.e.
+    ``Key('mykey').eq(Binding('myvalue'))``.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, Binding) and self.name == other.name
+
+    def __ne__(self, other: Any) -> bool:
+        return not self.__eq__(other)
+
+    def __hash__(self) -> int:
+        return hash(self.name)
+
+    def __repr__(self) -> str:
+        return "Binding(%r)" % self.name
+
+
 BuiltConditionExpression = namedtuple(
     "BuiltConditionExpression",
     ["condition_expression", "attribute_name_placeholders", "attribute_value_placeholders",],
 )
 
+# A built expression for a condition shape: the expression string, the name
+# placeholders, the value placeholders in the order that the values appear
+# in the condition and the number of name placeholders that were used.
+CachedConditionExpression = Tuple[str, Dict[str, str], Tuple[str, ...], int]
+
 
 class ConditionExpressionBuilder:
     """This class is used to build condition expressions with placeholders"""
@@ -305,6 +353,9 @@ class ConditionExpressionBuilder:
         self._value_count = 0
         self._name_placeholder = "n"
         self._value_placeholder = "v"
+        self._expression_cache: Dict[Hashable, CachedConditionExpression] = {}
+        # The builder of a client is shared by the threads using it.
+        self._expression_cache_lock = threading.Lock()
 
     def _get_name_placeholder(self) -> str:
         return "#" + self._name_placeholder + str(self._name_count)
@@ -322,6 +373,10 @@ class ConditionExpressionBuilder:
     ) -> BuiltConditionExpression:
         """Builds the condition expression and the dictionary of placeholders.
 
+        Conditions that only differ by their values share the same
+        expression string and name placeholders, so those are cached by
+        the shape of the condition and only the values are rebound.
+
         :type condition: ConditionBase
         :param condition: A condition to be built into a condition expression
             string with any necessary placeholders.
@@ -340,6 +395,41 @@ class ConditionExpressionBuilder:
         """
         if not isinstance(condition, ConditionBase):
             raise DynamoDBNeedsConditionError(condition)
+        values: List[Any] = []
+        shape = self._get_condition_shape(condition, values)
+        if shape is None:
+            return self._build_uncached_expression(condition, is_key_condition)
+        cache_key = (self._name_count, self._value_count, is_key_condition, shape)
+        with self._expression_cache_lock:
+            cached = self._expression_cache.get(cache_key)
+        if cached is not None:
+            condition_expression, name_placeholders, value_placeholders, name_count = cached
+            self._name_count += name_count
+            self._value_count += len(value_placeholders)
+            return BuiltConditionExpression(
+                condition_expression=condition_expression,
+                attribute_name_placeholders=dict(name_placeholders),
+                attribute_value_placeholders=dict(zip(value_placeholders, values)),
+            )
+
+        name_count = self._name_count
+        built_expression = self._build_uncached_expression(condition, is_key_condition)
+        entry = (
+            built_expression.condition_expression,
+            dict(built_expression.attribute_name_placeholders),
+            tuple(built_expression.attribute_value_placeholders),
+            self._name_count - name_count,
+        )
+        with self._expression_cache_lock:
+            if len(self._expression_cache) >= EXPRESSION_CACHE_SIZE:
+                # Evict the oldest entry to keep the cache bounded.
+                self._expression_cache.pop(next(iter(self._expression_cache)), None)
+            self._expression_cache[cache_key] = entry
+        return built_expression
+
+    def _build_uncached_expression(
+        self, condition: ConditionBase, is_key_condition: bool
+    ) -> BuiltConditionExpression:
         attribute_name_placeholders: Dict[str, str] = {}
         attribute_value_placeholders: Dict[str, str] = {}
         condition_expression = self._build_expression(
@@ -347,6 +437,7 @@ class ConditionExpressionBuilder:
             attribute_name_placeholders,
             attribute_value_placeholders,
             is_key_condition=is_key_condition,
+            name_placeholders_by_name={},
         )
         return BuiltConditionExpression(
             condition_expression=condition_expression,
@@ -354,12 +445,41 @@ class ConditionExpressionBuilder:
             attribute_value_placeholders=attribute_value_placeholders,
         )
 
+    def _get_condition_shape(
+        self, condition: ConditionBase, values: List[Any]
+    ) -> Optional[Hashable]:
+        # Describes the condition by its operators and attributes, and
+        # collects its values in the same order that _build_expression
+        # assigns value placeholders to them.
+        shape: List[Any] = [type(condition)]
+        for value in condition.get_expression()["values"]:
+            if isinstance(value, ConditionBase):
+                inner_shape = self._get_condition_shape(value, values)
+                if inner_shape is None:
+                    return None
+                shape.append(inner_shape)
+            elif isinstance(value, AttributeBase):
+                shape.append((type(value), value.name))
+            elif condition.has_grouped_values:
+                if iter(value) is value:
+                    # An iterator can only be consumed once, so the
+                    # condition is built without the cache.
+                    return None
+                grouped_values = list(value)
+                values.extend(grouped_values)
+                shape.append(len(grouped_values))
+            else:
+                values.append(value)
+                shape.append(None)
+        return tuple(shape)
+
     def _build_expression(
         self,
         condition: ConditionBase,
         attribute_name_placeholders: Dict[str, str],
         attribute_value_placeholders: Dict[str, str],
         is_key_condition: bool,
+        name_placeholders_by_name: Dict[str, str],
     ) -> str:
         expression_dict = condition.get_expression()
         replaced_values = []
@@ -372,6 +492,7 @@ class ConditionExpressionBuilder:
                 attribute_value_placeholders,
                 condition.has_grouped_values,
                 is_key_condition,
+                name_placeholders_by_name,
             )
             replaced_values.append(replaced_value)
         # Fill out the expression using the operator and the
@@ -387,12 +508,17 @@ class ConditionExpressionBuilder:
         attribute_value_placeholders: Dict[str, str],
         has_grouped_values: bool,
         is_key_condition: bool,
+        name_placeholders_by_name: Dict[str, str],
     ) -> str:
         # Continue to recurse if the value is a ConditionBase in order
         # to extract out all parts of the expression.
         if isinstance(value, ConditionBase):
             return self._build_expression(
-                value, attribute_name_placeholders, attribute_value_placeholders, is_key_condition,
+                value,
+                attribute_name_placeholders,
+                attribute_value_placeholders,
+                is_key_condition,
+                name_placeholders_by_name,
             )
         # If it is not a ConditionBase, we can recurse no further.
         # So we check if it is an attribute and add placeholders for
@@ -404,7 +530,9 @@ class ConditionExpressionBuilder:
                     "KeyConditionExpression only supports Attribute objects "
                     "of type Key" % (value.name, type(value))
                 )
-            return self._build_name_placeholder(value, attribute_name_placeholders)
+            return self._build_name_placeholder(
+                value, attribute_name_placeholders, name_placeholders_by_name
+            )
         # If it is anything else, we treat it as a value and thus placeholders
         # are needed for the value.
         return self._build_value_placeholder(
@@ -412,21 +540,24 @@ class ConditionExpressionBuilder:
         )
 
     def _build_name_placeholder(
-        self, value: Any, attribute_name_placeholders: Dict[str, str]
+        self,
+        value: Any,
+        attribute_name_placeholders: Dict[str, str],
+        name_placeholders_by_name: Dict[str, str],
     ) -> str:
-        attribute_name = value.name
-        # Figure out which parts of the attribute name that needs replacement.
-        attribute_name_parts = ATTR_NAME_REGEX.findall(attribute_name)
-
-        # Add a temporary placeholder for each of these parts.
-        placeholder_format = ATTR_NAME_REGEX.sub("%s", attribute_name)
+        placeholder_format, attribute_name_parts = _parse_attribute_name(value.name)
         str_format_args = []
         for part in attribute_name_parts:
-            name_placeholder = self._get_name_placeholder()
-            self._name_count += 1
+            # Reuse the placeholder if the same name was already used in
+            # this expression.
+            name_placeholder = name_placeholders_by_name.get(part)
+            if name_placeholder is None:
+                name_placeholder = self._get_name_placeholder()
+                self._name_count += 1
+                # Add the placeholder and value to dictionary of name placeholders.
+                attribute_name_placeholders[name_placeholder] = part
+                name_placeholders_by_name[part] = name_placeholder
             str_format_args.append(name_placeholder)
-            # Add the placeholder and value to dictionary of name placeholders.
-            attribute_name_placeholders[name_placeholder] = part
         # Replace the temporary placeholders with the designated placeholders.
         return placeholder_format % tuple(str_format_args)
 
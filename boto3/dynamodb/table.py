@@ -10,22 +10,98 @@
 # distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
 # ANY KIND, either express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
+import asyncio
+import base64
+import json
 import logging
-from typing import Any, Dict, Iterable, List, Optional, Type
+import mmap
+import os
+import random
+import shutil
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ThreadPoolExecutor, wait
+from functools import partial
+from itertools import islice
+from typing import (
+    Any,
+    Deque,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    TypeVar,
+)
 
 from botocore.client import BaseClient
 
+from boto3.dynamodb.conditions import Binding, ConditionBase, ConditionExpressionBuilder
+from boto3.dynamodb.types import (
+    BINARY,
+    BINARY_SET,
+    BOOLEAN,
+    LIST,
+    MAP,
+    NULL,
+    NUMBER,
+    NUMBER_SET,
+    STRING,
+    STRING_SET,
+    Binary,
+    TypeDeserializer,
+    TypeSerializer,
+)
+from boto3.exceptions import (
+    DynamoDBItemTooLargeError,
+    DynamoDBUnprocessedItemsError,
+    DynamoDBUnprocessedKeysError,
+)
 from boto3.resources.base import ResourceMeta
 
 logger = logging.getLogger(__name__)
 
 Request = Dict[str, Any]
+RequestKey = Tuple[Hashable, ...]
+# A write request along with the name of its table.
+TableRequest = Tuple[str, Request]
+TableRequestKey = Tuple[str, RequestKey]
+# The offset of a spilled request, and whether it has been written.
+SpillRecord = List[Any]
+# The number of requests, keys and spill records of a batch being sent.
+InFlightBatch = Tuple[int, Set[TableRequestKey], List[SpillRecord]]
+BatchWriterType = TypeVar("BatchWriterType", bound="_BaseBatchWriter")
+
+# The delay in seconds before the first retry of unprocessed items, which
+# doubles with every consecutive retry up to the maximum.
+BACKOFF_BASE = 0.05
+MAX_BACKOFF = 20.0
+
+# The limits of DynamoDB on the size of a single item and of a whole
+# batch_write_item request.
+MAX_ITEM_BYTES = 400 * 1024
+MAX_BATCH_BYTES = 16 * 1024 * 1024
+
+# The maximum number of keys of a single batch_get_item request.
+MAX_BATCH_GET_KEYS = 100
+
+# The size in bytes of the written requests at the start of a spill file
+# above which they are dropped from it.
+SPILL_COMPACT_BYTES = 64 * 1024 * 1024
 
 
 def register_table_methods(base_classes: List[Any], **_kwargs: Any) -> None:
     base_classes.insert(0, TableResource)
 
 
+def register_service_resource_methods(base_classes: List[Any], **_kwargs: Any) -> None:
+    base_classes.insert(0, DynamoDBServiceResource)
+
+
 # This class can be used to add any additional methods we want
 # onto a table resource.  Ideally to avoid creating a new
 # base class for every method we can just update this
@@ -34,8 +110,17 @@ def register_table_methods(base_classes: List[Any], **_kwargs: Any) -> None:
 class TableResource:
     name: str
     meta: ResourceMeta
+    key_schema: List[Dict[str, Any]]
 
-    def batch_writer(self, overwrite_by_pkeys: Optional[Iterable[str]] = None) -> "BatchWriter":
+    def batch_writer(
+        self,
+        overwrite_by_pkeys: Optional[Iterable[str]] = None,
+        max_in_flight: int = 1,
+        max_retries: Optional[int] = None,
+        retry_timeout: Optional[float] = None,
+        adaptive_flush: bool = False,
+        spill_path: Optional[str] = None,
+    ) -> "BatchWriter":
         """Create a batch writer object.
 
         This method creates a context manager for writing
@@ -61,11 +146,1377 @@ class TableResource:
             if match new request item on specified primary keys. i.e
             ``["partition_key1", "sort_key2", "sort_key3"]``
 
+        :type max_in_flight: int
+        :param max_in_flight: The maximum number of batches that are sent
+            concurrently. Writes to the same item are still applied in
+            order. If ``overwrite_by_pkeys`` is not provided, the key
+            schema of the table is used to tell the items apart.
+
+        :type max_retries: int
+        :param max_retries: The maximum number of consecutive retries of
+            unprocessed items before giving up. By default, unprocessed
+            items are retried until they are written.
+
+        :type retry_timeout: float
+        :param retry_timeout: The maximum number of seconds to keep retrying
+            unprocessed items without any batch getting fully processed.
+
+        :type adaptive_flush: bool
+        :param adaptive_flush: Send smaller batches while the table is
+            throttled, and grow them back once requests succeed.
+
+        :type spill_path: string
+        :param spill_path: The path of a file to write every request to
+            before it is buffered. If the process stops before the requests
+            are written to DynamoDB, the next batch writer with the same
+            ``spill_path`` sends them again.
+
+        """
+        key_names = None
+        if max_in_flight > 1 and not overwrite_by_pkeys:
+            key_names = [key["AttributeName"] for key in self.key_schema]
+        return BatchWriter(
+            self.name,
+            self.meta.client,
+            overwrite_by_pkeys=overwrite_by_pkeys,
+            max_in_flight=max_in_flight,
+            key_names=key_names,
+            max_retries=max_retries,
+            retry_timeout=retry_timeout,
+            adaptive_flush=adaptive_flush,
+            spill_path=spill_path,
+        )
+
+    def async_batch_writer(
+        self,
+        overwrite_by_pkeys: Optional[Iterable[str]] = None,
+        max_in_flight: int = 1,
+        max_retries: Optional[int] = None,
+        retry_timeout: Optional[float] = None,
+        adaptive_flush: bool = False,
+    ) -> "AsyncBatchWriter":
+        """Create a batch writer object for asyncio code.
+
+        This method creates an asynchronous context manager that works
+        like :py:meth:`batch_writer`, except that ``put_item`` and
+        ``delete_item`` are coroutines. The batches are sent from the
+        default executor of the event loop, so the event loop is not
+        blocked while they are being sent.
+
+        Example usage::
+
+            async with table.async_batch_writer(max_in_flight=4) as batch:
+                async for record in records:
+                    await batch.put_item(Item={'HashKey': record.key})
+
+        The parameters are the same as the ones of :py:meth:`batch_writer`.
+
+        """
+        key_names = None
+        if max_in_flight > 1 and not overwrite_by_pkeys:
+            key_names = [key["AttributeName"] for key in self.key_schema]
+        return AsyncBatchWriter(
+            self.name,
+            self.meta.client,
+            overwrite_by_pkeys=overwrite_by_pkeys,
+            max_in_flight=max_in_flight,
+            key_names=key_names,
+            max_retries=max_retries,
+            retry_timeout=retry_timeout,
+            adaptive_flush=adaptive_flush,
+        )
+
+    def prepare_query(self, **kwargs: Any) -> "PreparedQuery":
+        """Create a prepared query object.
+
+        The condition expressions and their placeholders are built once,
+        so executing the query only needs to bind the values. Use
+        :py:class:`boto3.dynamodb.conditions.Binding` in place of the values
+        that are provided on every execution.
+
+        Example usage::
+
+            from boto3.dynamodb.conditions import Binding, Key
+
+            query = table.prepare_query(
+                KeyConditionExpression=(
+                    Key('HashKey').eq(Binding('hash'))
+                    & Key('RangeKey').begins_with(Binding('prefix'))
+                ),
+                ProjectionExpression='HashKey, RangeKey',
+            )
+            response = query.execute(hash='...', prefix='...')
+
+        :param kwargs: The parameters of :py:meth:`DynamoDB.Table.query`.
+
+        """
+        return PreparedQuery(self.name, self.meta.client, **kwargs)
+
+    def batch_get(
+        self,
+        keys: Iterable[Dict[str, Any]],
+        projection: Optional[Iterable[str]] = None,
+        consistent: bool = False,
+        max_in_flight: int = 4,
+        max_retries: Optional[int] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Get items by their keys in batches.
+
+        The keys are sent in ``batch_get_item`` requests of up to 100 keys,
+        and the items are yielded as the responses arrive, in no particular
+        order. Duplicate keys are only requested once, and unprocessed keys
+        are retried with backoff.
+
+        Example usage::
+
+            for item in table.batch_get(
+                [{'HashKey': '...'}, {'HashKey': '...'}],
+                projection=['HashKey', 'Otherstuff'],
+            ):
+                print(item)
+
+        :type keys: list(dict)
+        :param keys: The primary keys of the items to get. Any iterable can
+            be used, and it is consumed as the requests are sent.
+
+        :type projection: list(string)
+        :param projection: The names of the attributes to get. By default,
+            all the attributes are returned.
+
+        :type consistent: bool
+        :param consistent: Use strongly consistent reads.
+
+        :type max_in_flight: int
+        :param max_in_flight: The maximum number of ``batch_get_item``
+            requests that are sent concurrently.
+
+        :type max_retries: int
+        :param max_retries: The maximum number of consecutive responses
+            with unprocessed keys before raising
+            ``DynamoDBUnprocessedKeysError``. By default, unprocessed keys
+            are retried until they are read.
+
+        :rtype: generator
+        :returns: The items that were found.
+        """
+        params: Dict[str, Any] = {"Keys": keys}
+        if projection is not None:
+            _add_projection(params, projection)
+        if consistent:
+            params["ConsistentRead"] = True
+        for _, item in batch_get_items(
+            self.meta.client,
+            {self.name: params},
+            max_in_flight=max_in_flight,
+            max_retries=max_retries,
+        ):
+            yield item
+
+    def query_iter(
+        self,
+        prefetch: bool = False,
+        max_items: Optional[int] = None,
+        projection: Optional[Iterable[str]] = None,
+        **kwargs: Any,
+    ) -> Iterator[Dict[str, Any]]:
+        """Query the table and yield the items of every page.
+
+        The pages are requested as the items are iterated over, so only
+        one page, or two when prefetching, is held in memory at a time.
+
+        Example usage::
+
+            from boto3.dynamodb.conditions import Key
+
+            for item in table.query_iter(
+                KeyConditionExpression=Key('HashKey').eq('...'),
+                prefetch=True,
+            ):
+                print(item)
+
+        :type prefetch: bool
+        :param prefetch: Request the next page from a background thread
+            while the items of the current one are yielded.
+
+        :type max_items: int
+        :param max_items: The maximum number of items to yield. Unlike
+            ``Limit``, which applies to every page, this applies to the
+            whole query.
+
+        :type projection: list(string)
+        :param projection: The names of the attributes to get. By default,
+            all the attributes are returned.
+
+        :param kwargs: The parameters of :py:meth:`DynamoDB.Table.query`.
+
+        :rtype: generator
+        :returns: The items of the query.
+        """
+        return _iter_items(
+            self.meta.client,
+            "query",
+            _get_paginated_params(self.name, projection, kwargs),
+            prefetch=prefetch,
+            max_items=max_items,
+        )
+
+    def scan_iter(
+        self,
+        prefetch: bool = False,
+        max_items: Optional[int] = None,
+        projection: Optional[Iterable[str]] = None,
+        **kwargs: Any,
+    ) -> Iterator[Dict[str, Any]]:
+        """Scan the table and yield the items of every page.
+
+        The pages are requested as the items are iterated over, so only
+        one page, or two when prefetching, is held in memory at a time.
+
+        Example usage::
+
+            for item in table.scan_iter(projection=['HashKey'], max_items=100):
+                print(item)
+
+        :type prefetch: bool
+        :param prefetch: Request the next page from a background thread
+            while the items of the current one are yielded.
+
+        :type max_items: int
+        :param max_items: The maximum number of items to yield. Unlike
+            ``Limit``, which applies to every page, this applies to the
+            whole scan.
+
+        :type projection: list(string)
+        :param projection: The names of the attributes to get. By default,
+            all the attributes are returned.
+
+        :param kwargs: The parameters of :py:meth:`DynamoDB.Table.scan`.
+
+        :rtype: generator
+        :returns: The items of the scan.
+        """
+        return _iter_items(
+            self.meta.client,
+            "scan",
+            _get_paginated_params(self.name, projection, kwargs),
+            prefetch=prefetch,
+            max_items=max_items,
+        )
+
+    def parallel_scan(
+        self,
+        total_segments: int,
+        workers: int = 4,
+        checkpoint: Optional[Dict[int, Optional[Dict[str, Any]]]] = None,
+        **kwargs: Any,
+    ) -> "ParallelScan":
+        """Create a scan of the table that is split in concurrent segments.
+
+        Iterating over the returned object yields the items of all the
+        segments, in no particular order. Its ``checkpoint`` can be used
+        to resume an interrupted scan from the last page that was fully
+        iterated over.
+
+        Example usage::
+
+            scan = table.parallel_scan(total_segments=16, workers=8)
+            try:
+                for item in scan:
+                    print(item)
+            except KeyboardInterrupt:
+                checkpoint = scan.checkpoint
+
+            for item in table.parallel_scan(total_segments=16, checkpoint=checkpoint):
+                print(item)
+
+        :type total_segments: int
+        :param total_segments: The number of segments to split the scan in.
+
+        :type workers: int
+        :param workers: The maximum number of segments that are scanned
+            concurrently.
+
+        :type checkpoint: dict
+        :param checkpoint: The ``checkpoint`` of a previous scan with the
+            same ``total_segments`` to resume.
+
+        :param kwargs: The parameters of :py:meth:`DynamoDB.Table.scan`.
+
+        """
+        return ParallelScan(
+            self.name,
+            self.meta.client,
+            total_segments,
+            workers=workers,
+            checkpoint=checkpoint,
+            **kwargs,
+        )
+
+
+def _add_projection(params: Dict[str, Any], projection: Iterable[str]) -> None:
+    names = {"#p%s" % i: name for i, name in enumerate(projection)}
+    params["ProjectionExpression"] = ", ".join(names)
+    params["ExpressionAttributeNames"] = dict(params.get("ExpressionAttributeNames") or {}, **names)
+
+
+def _get_paginated_params(
+    table_name: str, projection: Optional[Iterable[str]], kwargs: Dict[str, Any]
+) -> Dict[str, Any]:
+    params = dict(kwargs, TableName=table_name)
+    if projection is not None:
+        _add_projection(params, projection)
+    return params
+
+
+def _iter_items(
+    client: BaseClient,
+    operation_name: str,
+    params: Dict[str, Any],
+    prefetch: bool = False,
+    max_items: Optional[int] = None,
+) -> Iterator[Dict[str, Any]]:
+    remaining = max_items
+    if remaining == 0:
+        return
+    operation = getattr(client, operation_name)
+    executor = None
+    if prefetch:
+        params = _build_conditions(params)
+        executor = ThreadPoolExecutor(max_workers=1)
+    next_page: Optional["Future[Dict[str, Any]]"] = None
+    try:
+        response = operation(**_get_page_params(params, remaining))
+        while True:
+            items = response["Items"]
+            last_evaluated_key = response.get("LastEvaluatedKey")
+            if remaining is not None and len(items) >= remaining:
+                last_evaluated_key = None
+            params = dict(params, ExclusiveStartKey=last_evaluated_key)
+            if executor is not None and last_evaluated_key is not None:
+                # Only the items of this page are yielded before the next
+                # page is used, so the remaining count is already known.
+                page_remaining = None if remaining is None else remaining - len(items)
+                next_page = executor.submit(operation, **_get_page_params(params, page_remaining))
+            for item in items:
+                if remaining is not None:
+                    if remaining == 0:
+                        return
+                    remaining -= 1
+                yield item
+            if last_evaluated_key is None:
+                return
+            if next_page is not None:
+                response = next_page.result()
+                next_page = None
+            else:
+                response = operation(**_get_page_params(params, remaining))
+    finally:
+        if executor is not None:
+            if next_page is not None:
+                next_page.cancel()
+            executor.shutdown()
+
+
+def _build_conditions(params: Dict[str, Any]) -> Dict[str, Any]:
+    # The condition builder of the client is not safe to use from several
+    # threads at once, so the conditions are built once by the calling
+    # thread and sent as strings. The filter expression is built before
+    # the key condition, the same way the dynamodb customizations do.
+    params = dict(params)
+    names = dict(params.get("ExpressionAttributeNames") or {})
+    values = dict(params.get("ExpressionAttributeValues") or {})
+    builder = ConditionExpressionBuilder()
+    for param, is_key_condition in (
+        ("FilterExpression", False),
+        ("KeyConditionExpression", True),
+    ):
+        condition = params.get(param)
+        if isinstance(condition, ConditionBase):
+            built_expression = builder.build_expression(
+                condition, is_key_condition=is_key_condition
+            )
+            params[param] = built_expression.condition_expression
+            names.update(built_expression.attribute_name_placeholders)
+            values.update(built_expression.attribute_value_placeholders)
+    if names:
+        params["ExpressionAttributeNames"] = names
+    if values:
+        params["ExpressionAttributeValues"] = values
+    return params
+
+
+def _get_page_params(params: Dict[str, Any], remaining: Optional[int]) -> Dict[str, Any]:
+    # Without a filter, every evaluated item is returned, so there is no
+    # need to read more items than are left to yield.
+    if remaining is None or "FilterExpression" in params:
+        return params
+    return dict(params, Limit=min(params.get("Limit", remaining), remaining))
+
+
+class DynamoDBServiceResource:
+    meta: ResourceMeta
+
+    def batch_writer(
+        self,
+        overwrite_by_pkeys: Optional[Dict[str, Iterable[str]]] = None,
+        max_retries: Optional[int] = None,
+        retry_timeout: Optional[float] = None,
+        adaptive_flush: bool = False,
+    ) -> "MultiTableBatchWriter":
+        """Create a batch writer object for multiple tables.
+
+        This method creates a context manager for writing objects to any
+        number of Amazon DynamoDB tables in batch. The requests of all the
+        tables are buffered together, so they share the same
+        ``batch_write_item`` calls.
+
+        Example usage::
+
+            with dynamodb.batch_writer() as batch:
+                batch.put_item(TableName='users', Item={'HashKey': '...'})
+                batch.put_item(TableName='events', Item={'HashKey': '...'})
+                batch.delete_item(TableName='sessions', Key={'HashKey': '...'})
+
+        :type overwrite_by_pkeys: dict
+        :param overwrite_by_pkeys: The primary keys to de-duplicate request
+            items in buffer by, for each table name that needs it. i.e.
+            ``{"table1": ["partition_key1", "sort_key2"]}``
+
+        :type max_retries: int
+        :param max_retries: The maximum number of consecutive retries of
+            unprocessed items before giving up. By default, unprocessed
+            items are retried until they are written.
+
+        :type retry_timeout: float
+        :param retry_timeout: The maximum number of seconds to keep retrying
+            unprocessed items without any batch getting fully processed.
+
+        :type adaptive_flush: bool
+        :param adaptive_flush: Send smaller batches while the tables are
+            throttled, and grow them back once requests succeed.
+
+        """
+        return MultiTableBatchWriter(
+            self.meta.client,
+            overwrite_by_pkeys=overwrite_by_pkeys,
+            max_retries=max_retries,
+            retry_timeout=retry_timeout,
+            adaptive_flush=adaptive_flush,
+        )
+
+    def batch_get(
+        self,
+        RequestItems: Dict[str, Dict[str, Any]],
+        max_in_flight: int = 4,
+        max_retries: Optional[int] = None,
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Get items of multiple tables by their keys in batches.
+
+        The keys of all the tables are sent in shared ``batch_get_item``
+        requests of up to 100 keys, and the items are yielded as the
+        responses arrive, in no particular order. Duplicate keys are only
+        requested once, and unprocessed keys are retried with backoff.
+
+        Example usage::
+
+            for table_name, item in dynamodb.batch_get(
+                RequestItems={
+                    'users': {'Keys': [{'username': 'janedoe'}]},
+                    'events': {
+                        'Keys': [{'event_id': '...'}],
+                        'ConsistentRead': True,
+                    },
+                }
+            ):
+                print(table_name, item)
+
+        :type RequestItems: dict
+        :param RequestItems: The parameters of every table in the format
+            of :py:meth:`DynamoDB.Client.batch_get_item`, except that
+            ``Keys`` can be any iterable of keys with any length.
+
+        :type max_in_flight: int
+        :param max_in_flight: The maximum number of ``batch_get_item``
+            requests that are sent concurrently.
+
+        :type max_retries: int
+        :param max_retries: The maximum number of consecutive responses
+            with unprocessed keys before raising
+            ``DynamoDBUnprocessedKeysError``. By default, unprocessed keys
+            are retried until they are read.
+
+        :rtype: generator
+        :returns: Pairs of the table name and an item that was found.
+        """
+        return batch_get_items(
+            self.meta.client, RequestItems, max_in_flight=max_in_flight, max_retries=max_retries,
+        )
+
+
+def batch_get_items(
+    client: BaseClient,
+    request_items: Dict[str, Dict[str, Any]],
+    max_in_flight: int = 4,
+    max_retries: Optional[int] = None,
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Get the items of multiple tables with concurrent batch_get_item calls.
+
+    :type client: ``botocore.client.Client``
+    :param client: A botocore client with the dynamodb customizations
+        applied to it, i.e. ``boto3.resource('dynamodb').meta.client``.
+
+    :type request_items: dict
+    :param request_items: The ``RequestItems`` of ``batch_get_item``, where
+        ``Keys`` can be any iterable of keys.
+
+    :type max_in_flight: int
+    :param max_in_flight: The maximum number of requests sent concurrently.
+
+    :type max_retries: int
+    :param max_retries: The maximum number of consecutive responses with
+        unprocessed keys before raising ``DynamoDBUnprocessedKeysError``.
+
+    :rtype: generator
+    :returns: Pairs of the table name and an item that was found.
+    """
+    options = {
+        table_name: {name: value for name, value in params.items() if name != "Keys"}
+        for table_name, params in request_items.items()
+    }
+    pending_keys = _iter_unique_keys(request_items)
+    retries: Deque[Tuple[str, Dict[str, Any]]] = deque()
+    in_flight: Dict["Future[Dict[str, Any]]", int] = {}
+    retry_attempts = 0
+    next_send_time = 0.0
+    executor = ThreadPoolExecutor(max_workers=max_in_flight)
+    try:
+        while True:
+            while len(in_flight) < max_in_flight:
+                if retries:
+                    delay = next_send_time - time.time()
+                    if delay > 0:
+                        time.sleep(delay)
+                chunk = [retries.popleft() for _ in range(min(len(retries), MAX_BATCH_GET_KEYS))]
+                chunk.extend(islice(pending_keys, MAX_BATCH_GET_KEYS - len(chunk)))
+                if not chunk:
+                    break
+                batch: Dict[str, Dict[str, Any]] = {}
+                for table_name, key in chunk:
+                    if table_name not in batch:
+                        batch[table_name] = dict(options[table_name], Keys=[])
+                    batch[table_name]["Keys"].append(key)
+                future = executor.submit(client.batch_get_item, RequestItems=batch)
+                in_flight[future] = len(chunk)
+            if not in_flight:
+                return
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                sent_count = in_flight.pop(future)
+                response = future.result()
+                unprocessed_keys = [
+                    (table_name, key)
+                    for table_name, params in response.get("UnprocessedKeys", {}).items()
+                    for key in params["Keys"]
+                ]
+                logger.debug(
+                    "Batch get sent %s, unprocessed: %s", sent_count, len(unprocessed_keys),
+                )
+                if unprocessed_keys:
+                    retry_attempts += 1
+                    retries.extend(unprocessed_keys)
+                    if max_retries is not None and retry_attempts > max_retries:
+                        unprocessed: Dict[str, List[Dict[str, Any]]] = {}
+                        for table_name, key in retries:
+                            unprocessed.setdefault(table_name, []).append(key)
+                        raise DynamoDBUnprocessedKeysError(unprocessed)
+                    # Back off with full jitter so that throttled readers
+                    # spread out.
+                    backoff = min(MAX_BACKOFF, BACKOFF_BASE * 2 ** (retry_attempts - 1))
+                    next_send_time = time.time() + random.uniform(0, backoff)
+                else:
+                    retry_attempts = 0
+                for table_name, items in response["Responses"].items():
+                    for item in items:
+                        yield table_name, item
+    finally:
+        for future in in_flight:
+            future.cancel()
+        executor.shutdown()
+
+
+def _iter_unique_keys(
+    request_items: Dict[str, Dict[str, Any]]
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    seen: Set[Tuple[str, Tuple[Tuple[str, Any], ...]]] = set()
+    for table_name, params in request_items.items():
+        for key in params["Keys"]:
+            key_id = (table_name, tuple(sorted(key.items())))
+            if key_id not in seen:
+                seen.add(key_id)
+                yield table_name, key
+
+
+class PreparedQuery:
+    """A query to a single table with prebuilt condition expressions."""
+
+    def __init__(self, table_name: str, client: BaseClient, **kwargs: Any) -> None:
+        """
+
+        :type table_name: str
+        :param table_name: The name of the table to query.
+
+        :type client: ``botocore.client.Client``
+        :param client: A botocore client with the dynamodb customizations
+            applied to it, like the one of the ``BatchWriter``.
+
+        :param kwargs: The parameters of the query. The
+            ``KeyConditionExpression`` and ``FilterExpression`` conditions
+            can contain :py:class:`boto3.dynamodb.conditions.Binding` values.
+
+        """
+        self._client = client
+        params = dict(kwargs, TableName=table_name)
+        names = dict(params.pop("ExpressionAttributeNames", None) or {})
+        values = dict(params.pop("ExpressionAttributeValues", None) or {})
+
+        # The filter expression is built before the key condition, the same
+        # way the dynamodb customizations would build them on every call.
+        builder = ConditionExpressionBuilder()
+        for param, is_key_condition in (
+            ("FilterExpression", False),
+            ("KeyConditionExpression", True),
+        ):
+            condition = params.get(param)
+            if isinstance(condition, ConditionBase):
+                built_expression = builder.build_expression(
+                    condition, is_key_condition=is_key_condition
+                )
+                params[param] = built_expression.condition_expression
+                names.update(built_expression.attribute_name_placeholders)
+                values.update(built_expression.attribute_value_placeholders)
+
+        if names:
+            params["ExpressionAttributeNames"] = names
+        self._params = params
+        self._values = {
+            placeholder: value for placeholder, value in values.items()
+            if not isinstance(value, Binding)
+        }
+        self._bound_values = {
+            placeholder: value.name for placeholder, value in values.items()
+            if isinstance(value, Binding)
+        }
+        self.bindings = frozenset(self._bound_values.values())
+
+    def execute(
+        self, ExclusiveStartKey: Optional[Dict[str, Any]] = None, **bindings: Any
+    ) -> Dict[str, Any]:
+        """Execute the query with the provided values bound.
+
+        :type ExclusiveStartKey: dict
+        :param ExclusiveStartKey: The key of the item to continue the
+            query from, i.e. ``LastEvaluatedKey`` of a previous response.
+
+        :param bindings: The value of every
+            :py:class:`boto3.dynamodb.conditions.Binding` by its name.
+
+        :rtype: dict
+        :returns: The response of :py:meth:`DynamoDB.Client.query`.
+        """
+        if bindings.keys() != self.bindings:
+            raise ValueError(
+                "Prepared query expects values for %s, got %s"
+                % (sorted(self.bindings), sorted(bindings))
+            )
+        params = dict(self._params)
+        if self._values or self._bound_values:
+            values = dict(self._values)
+            for placeholder, name in self._bound_values.items():
+                values[placeholder] = bindings[name]
+            params["ExpressionAttributeValues"] = values
+        if ExclusiveStartKey is not None:
+            params["ExclusiveStartKey"] = ExclusiveStartKey
+        return self._client.query(**params)
+
+
+class ParallelScan:
+    """A scan of a single table split in segments that are scanned concurrently."""
+
+    def __init__(
+        self,
+        table_name: str,
+        client: BaseClient,
+        total_segments: int,
+        workers: int = 4,
+        checkpoint: Optional[Dict[int, Optional[Dict[str, Any]]]] = None,
+        **kwargs: Any,
+    ) -> None:
+        """
+
+        :type table_name: str
+        :param table_name: The name of the table to scan.
+
+        :type client: ``botocore.client.Client``
+        :param client: A botocore client with the dynamodb customizations
+            applied to it, like the one of the ``BatchWriter``.
+
+        :type total_segments: int
+        :param total_segments: The number of segments to split the scan in.
+
+        :type workers: int
+        :param workers: The maximum number of segments that are scanned
+            concurrently. Only one page of every segment is requested ahead
+            of the pages being iterated over.
+
+        :type checkpoint: dict
+        :param checkpoint: The segments left to scan, mapped to the
+            ``ExclusiveStartKey`` to continue each of them from, or ``None``
+            to scan it from the start.
+
+        :param kwargs: The other parameters of the scan.
+
         """
-        return BatchWriter(self.name, self.meta.client, overwrite_by_pkeys=overwrite_by_pkeys)
+        if total_segments < 1:
+            raise ValueError("total_segments must be at least 1, got %s" % total_segments)
+        if workers < 1:
+            raise ValueError("workers must be at least 1, got %s" % workers)
+        self._client = client
+        self._params = _build_conditions(
+            dict(kwargs, TableName=table_name, TotalSegments=total_segments)
+        )
+        self._workers = workers
+        if checkpoint is None:
+            checkpoint = {segment: None for segment in range(total_segments)}
+        # Only updated once all the items of a page have been yielded.
+        self.checkpoint = dict(checkpoint)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        pending_segments = deque(sorted(self.checkpoint))
+        in_flight: Dict["Future[Dict[str, Any]]", int] = {}
+        executor = ThreadPoolExecutor(max_workers=self._workers)
+        try:
+            while True:
+                while len(in_flight) < self._workers and pending_segments:
+                    segment = pending_segments.popleft()
+                    future = self._scan_page(executor, segment, self.checkpoint[segment])
+                    in_flight[future] = segment
+                if not in_flight:
+                    return
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    segment = in_flight.pop(future)
+                    response = future.result()
+                    last_evaluated_key = response.get("LastEvaluatedKey")
+                    # Request the next page of the segment before yielding
+                    # the items of this one.
+                    if last_evaluated_key is not None:
+                        next_future = self._scan_page(executor, segment, last_evaluated_key)
+                        in_flight[next_future] = segment
+                    for item in response["Items"]:
+                        yield item
+                    if last_evaluated_key is not None:
+                        self.checkpoint[segment] = last_evaluated_key
+                    else:
+                        del self.checkpoint[segment]
+        finally:
+            for future in in_flight:
+                future.cancel()
+            executor.shutdown()
+
+    def _scan_page(
+        self,
+        executor: ThreadPoolExecutor,
+        segment: int,
+        exclusive_start_key: Optional[Dict[str, Any]],
+    ) -> "Future[Dict[str, Any]]":
+        params = dict(self._params, Segment=segment)
+        if exclusive_start_key is not None:
+            params["ExclusiveStartKey"] = exclusive_start_key
+        return executor.submit(self._client.scan, **params)
+
+
+def _get_value_size(value: Any, serializer: TypeSerializer) -> int:
+    # Follows the way DynamoDB sizes the attribute value the serializer
+    # makes of a Python value, except that numbers are counted by their
+    # length which slightly overestimates them. Values the serializer does
+    # not support raise the same TypeError.
+    value_type = type(value)
+    if value_type is str:
+        dynamodb_type = STRING
+    elif value_type is dict:
+        dynamodb_type = MAP
+    elif value_type is list:
+        dynamodb_type = LIST
+    else:
+        dynamodb_type = serializer._get_dynamodb_type(value)
+    if dynamodb_type == STRING:
+        return len(value.encode("utf-8"))
+    if dynamodb_type == NUMBER:
+        return len(str(value))
+    if dynamodb_type == BINARY:
+        return len(value.value if isinstance(value, Binary) else value)
+    if dynamodb_type in (NULL, BOOLEAN):
+        return 1
+    size = 0
+    if dynamodb_type == MAP:
+        size = 3
+        for name, element in value.items():
+            size += 1 + len(name.encode("utf-8")) + _get_value_size(element, serializer)
+    elif dynamodb_type == LIST:
+        size = 3
+        for element in value:
+            size += 1 + _get_value_size(element, serializer)
+    else:
+        for element in value:
+            size += _get_value_size(element, serializer)
+    return size
+
+
+def _encode_attribute_value(value: Dict[str, Any]) -> Dict[str, Any]:
+    # Binary values are base64 encoded, the way DynamoDB encodes them in
+    # JSON requests.
+    ((type_name, data),) = value.items()
+    if type_name == BINARY:
+        return {BINARY: _encode_binary(data)}
+    if type_name == BINARY_SET:
+        return {BINARY_SET: [_encode_binary(element) for element in data]}
+    if type_name in (STRING_SET, NUMBER_SET):
+        return {type_name: list(data)}
+    if type_name == LIST:
+        return {LIST: [_encode_attribute_value(element) for element in data]}
+    if type_name == MAP:
+        return {MAP: {name: _encode_attribute_value(element) for name, element in data.items()}}
+    return value
+
+
+def _encode_binary(data: Any) -> str:
+    if isinstance(data, Binary):
+        data = data.value
+    return base64.b64encode(bytes(data)).decode("ascii")
+
+
+def _decode_attribute_value(value: Dict[str, Any]) -> Dict[str, Any]:
+    ((type_name, data),) = value.items()
+    if type_name == BINARY:
+        return {BINARY: base64.b64decode(data)}
+    if type_name == BINARY_SET:
+        return {BINARY_SET: [base64.b64decode(element) for element in data]}
+    if type_name == LIST:
+        return {LIST: [_decode_attribute_value(element) for element in data]}
+    if type_name == MAP:
+        return {MAP: {name: _decode_attribute_value(element) for name, element in data.items()}}
+    return value
+
+
+class _SpillFile:
+    """An append-only file of the write requests that may not be written yet.
+
+    Every request is appended as a line of JSON before it is buffered. The
+    offset of the first request that may not be written yet is kept in a
+    separate file, so the requests after it can be replayed after a crash.
+
+    The offsets handed out keep growing when the written requests are
+    dropped from the start of the file, so they stay valid for the writer.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._offset_path = path + ".offset"
+        self._deserializer = TypeDeserializer()
+        # The offset of the first byte of the file.
+        self._start = 0
+        self._offset = 0
+        self._size = 0
+
+    def replay(self) -> List[Tuple[int, TableRequest]]:
+        """Read the requests left by a previous writer along with their offsets.
+
+        The requests are kept in the file, so they are not lost if the
+        writer fails before they are written.
+        """
+        requests = []
+        offset = 0
+        if os.path.exists(self._offset_path):
+            with open(self._offset_path) as f:
+                offset = int(f.read() or 0)
+        if os.path.exists(self._path):
+            self._size = os.path.getsize(self._path)
+        offset = min(offset, self._size)
+        if self._size > offset:
+            with open(self._path, "rb") as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    data.seek(offset)
+                    line_offset = offset
+                    for line in iter(data.readline, b""):
+                        requests.append((line_offset, self._decode(line)))
+                        line_offset += len(line)
+        self._file = open(self._path, "ab")
+        self._compact(offset)
+        return requests
+
+    def append(self, table_name: str, request: Request, serialized_item: Dict[str, Any]) -> int:
+        """Append a request and return the offset it starts at."""
+        request_type = "PutRequest" if "PutRequest" in request else "DeleteRequest"
+        encoded_item = {
+            name: _encode_attribute_value(value) for name, value in serialized_item.items()
+        }
+        line = json.dumps([table_name, request_type, encoded_item]).encode("utf-8") + b"\n"
+        offset = self._start + self._size
+        self._file.write(line)
+        self._file.flush()
+        self._size += len(line)
+        return offset
+
+    def commit(self, offset: Optional[int]) -> None:
+        """Record that all the requests before the offset are written.
+
+        :param offset: The offset of the first request that may not be
+            written yet, or ``None`` if all the requests are written.
+        """
+        if offset is None:
+            offset = self._start + self._size
+        offset -= self._start
+        if offset > SPILL_COMPACT_BYTES:
+            self._compact(offset)
+        elif offset != self._offset or not os.path.exists(self._offset_path):
+            self._write_offset(offset)
+
+    def _compact(self, offset: int) -> None:
+        # The requests after the offset are copied to a new file which
+        # replaces this one. The offset is reset before the file is
+        # replaced, so a crash in between replays written requests again
+        # rather than losing any.
+        temp_path = self._path + ".tmp"
+        with open(self._path, "rb") as source, open(temp_path, "wb") as target:
+            source.seek(offset)
+            shutil.copyfileobj(source, target)
+        self._write_offset(0)
+        self._file.close()
+        os.replace(temp_path, self._path)
+        self._file = open(self._path, "ab")
+        self._start += offset
+        self._size -= offset
+
+    def _write_offset(self, offset: int) -> None:
+        temp_path = self._offset_path + ".tmp"
+        with open(temp_path, "w") as f:
+            f.write(str(offset))
+        os.replace(temp_path, self._offset_path)
+        self._offset = offset
+
+    def close(self, remove: bool) -> None:
+        self._file.close()
+        if remove:
+            os.remove(self._path)
+            os.remove(self._offset_path)
+
+    def _decode(self, line: bytes) -> TableRequest:
+        table_name, request_type, encoded_item = json.loads(line.decode("utf-8"))
+        item = {
+            name: self._deserializer.deserialize(_decode_attribute_value(value))
+            for name, value in encoded_item.items()
+        }
+        field = "Item" if request_type == "PutRequest" else "Key"
+        return table_name, {request_type: {field: item}}
+
+
+class BatchWriterMetrics:
+    """Counters of the requests sent by a batch writer."""
+
+    def __init__(self) -> None:
+        self.batches = 0
+        self.items = 0
+        self.retries = 0
+        self.throttled_items = 0
+
+
+class _BaseBatchWriter:
+    """Buffer write requests to any number of tables and send them in batches.
+
+    Every buffered request is kept along with the name of its table, so
+    the requests of several tables can share a ``batch_write_item`` call.
+    """
+
+    def __init__(
+        self,
+        client: BaseClient,
+        flush_amount: int,
+        overwrite_by_pkeys: Dict[str, Tuple[str, ...]],
+        max_in_flight: int,
+        key_names: Dict[str, Tuple[str, ...]],
+        max_retries: Optional[int],
+        retry_timeout: Optional[float],
+        adaptive_flush: bool,
+        max_batch_bytes: int,
+        spill_path: Optional[str] = None,
+    ) -> None:
+        self._client = client
+        self._items_buffer: Deque[TableRequest] = deque()
+        self._flush_amount = flush_amount
+        self._overwrite_by_pkeys = overwrite_by_pkeys
+        # The latest buffered request of every primary key when
+        # de-duplicating. Superseded requests are left in the buffer and
+        # skipped when flushing, so de-duplication doesn't scan the buffer.
+        self._pkey_index: Dict[TableRequestKey, TableRequest] = {}
+        self._superseded_count = 0
+        self._max_in_flight = max_in_flight
+        self._key_names = key_names
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._in_flight: Dict["Future[Dict[str, Any]]", InFlightBatch] = {}
+        self._max_retries = max_retries
+        self._retry_timeout = retry_timeout
+        self._adaptive_flush = adaptive_flush
+        self._batch_size = flush_amount
+        self._retry_attempts = 0
+        self._throttled_since: Optional[float] = None
+        self._next_send_time = 0.0
+        self._max_batch_bytes = max_batch_bytes
+        self._serializer = TypeSerializer()
+        # The estimated size of every request in the buffer by its id.
+        self._request_sizes: Dict[int, int] = {}
+        self._buffered_bytes = 0
+        self.metrics = BatchWriterMetrics()
+        self._spill: Optional[_SpillFile] = None
+        # The offset of every spilled request that may not be written yet,
+        # in the order of the file, along with whether it has been written
+        # since.
+        self._spill_records: Deque[SpillRecord] = deque()
+        # The spill record of every request in the buffer by its id.
+        self._entry_records: Dict[int, SpillRecord] = {}
+        if spill_path is not None:
+            self._spill = _SpillFile(spill_path)
+            for offset, (table_name, request) in self._spill.replay():
+                self._add_request(table_name, request, offset)
+
+    def _add_request_and_process(self, table_name: str, request: Request) -> None:
+        self._add_request(table_name, request)
+        self._flush_if_needed()
+
+    def _add_request(
+        self, table_name: str, request: Request, spill_offset: Optional[int] = None
+    ) -> None:
+        if self._max_in_flight > 1 and table_name not in self._key_names:
+            raise ValueError(
+                "key_names must be provided for table %s when max_in_flight is more than 1"
+                % table_name
+            )
+        entry = (table_name, request)
+        self._track_request(entry, spill_offset)
+        if table_name in self._overwrite_by_pkeys:
+            self._remove_dup_pkeys_request_if_any(entry)
+        self._items_buffer.append(entry)
+
+    def _track_request(self, entry: TableRequest, spill_offset: Optional[int] = None) -> None:
+        size = self._get_request_size(entry[1])
+        if self._spill is not None:
+            if spill_offset is None:
+                # Only the spill file needs the serialized item, the client
+                # serializes the request itself when it is sent.
+                serialized_item = self._serialize_request(entry[1])
+                spill_offset = self._spill.append(entry[0], entry[1], serialized_item)
+            record = [spill_offset, False]
+            self._spill_records.append(record)
+            self._entry_records[id(entry)] = record
+        self._request_sizes[id(entry)] = size
+        self._buffered_bytes += size
+
+    def _get_request_item(self, request: Request) -> Dict[str, Any]:
+        if "PutRequest" in request:
+            return request["PutRequest"]["Item"]
+        return request["DeleteRequest"]["Key"]
+
+    def _serialize_request(self, request: Request) -> Dict[str, Dict[str, Any]]:
+        item = self._get_request_item(request)
+        return {name: self._serializer.serialize(value) for name, value in item.items()}
+
+    def _get_request_size(self, request: Request) -> int:
+        size = 0
+        for name, value in self._get_request_item(request).items():
+            size += len(name.encode("utf-8")) + _get_value_size(value, self._serializer)
+        if size > MAX_ITEM_BYTES:
+            raise DynamoDBItemTooLargeError(size, MAX_ITEM_BYTES)
+        return size
+
+    def _remove_dup_pkeys_request_if_any(self, entry: TableRequest) -> None:
+        pkey_values_new = self._extract_pkey_values(entry)
+        item = self._pkey_index.get(pkey_values_new)
+        if item is not None:
+            logger.debug("With overwrite_by_pkeys enabled, skipping " "request:%s", item[1])
+            self._buffered_bytes -= self._request_sizes[id(item)]
+            self._superseded_count += 1
+        self._pkey_index[pkey_values_new] = entry
+
+    def _extract_pkey_values(self, entry: TableRequest) -> TableRequestKey:
+        table_name, request = entry
+        pkeys = self._overwrite_by_pkeys[table_name]
+        if request.get("PutRequest"):
+            return table_name, tuple(request["PutRequest"]["Item"][key] for key in pkeys)
+        if request.get("DeleteRequest"):
+            return table_name, tuple(request["DeleteRequest"]["Key"][key] for key in pkeys)
+        return table_name, tuple()
+
+    def _is_superseded(self, entry: TableRequest) -> bool:
+        if entry[0] not in self._overwrite_by_pkeys:
+            return False
+        return self._pkey_index.get(self._extract_pkey_values(entry)) is not entry
+
+    def _buffered_count(self) -> int:
+        return len(self._items_buffer) - self._superseded_count
+
+    def _buffered_requests(self) -> List[TableRequest]:
+        return [entry for entry in self._items_buffer if not self._is_superseded(entry)]
+
+    def _take_batch(self) -> Tuple[List[TableRequest], List[SpillRecord]]:
+        items: List[TableRequest] = []
+        records: List[SpillRecord] = []
+        batch_bytes = 0
+        while self._items_buffer and len(items) < self._batch_size:
+            entry = self._items_buffer[0]
+            size = self._request_sizes[id(entry)]
+            if self._is_superseded(entry):
+                self._items_buffer.popleft()
+                del self._request_sizes[id(entry)]
+                self._superseded_count -= 1
+                # The newer request replaces it in the spill file as well.
+                record = self._entry_records.pop(id(entry), None)
+                if record is not None:
+                    record[1] = True
+                continue
+            if items and batch_bytes + size > self._max_batch_bytes:
+                break
+            self._items_buffer.popleft()
+            del self._request_sizes[id(entry)]
+            record = self._entry_records.pop(id(entry), None)
+            if record is not None:
+                records.append(record)
+            if entry[0] in self._overwrite_by_pkeys:
+                del self._pkey_index[self._extract_pkey_values(entry)]
+            items.append(entry)
+            batch_bytes += size
+        self._buffered_bytes -= batch_bytes
+        return items, records
 
+    def _commit_spill(self, records: List[SpillRecord]) -> None:
+        if self._spill is None:
+            return
+        for record in records:
+            record[1] = True
+        while self._spill_records and self._spill_records[0][1]:
+            self._spill_records.popleft()
+        self._spill.commit(self._spill_records[0][0] if self._spill_records else None)
+
+    def _close_spill(self) -> None:
+        if self._spill is not None:
+            # Requests that may not be written yet are kept for the next
+            # writer with the same spill file.
+            self._spill.close(remove=not self._spill_records)
+            self._spill = None
+
+    def _requeue(self, entries: List[TableRequest], front: bool = False) -> List[TableRequest]:
+        # A newer request for the same primary key replaces the retry.
+        entries = [
+            entry
+            for entry in entries
+            if entry[0] not in self._overwrite_by_pkeys
+            or self._extract_pkey_values(entry) not in self._pkey_index
+        ]
+        for entry in entries:
+            if entry[0] in self._overwrite_by_pkeys:
+                self._pkey_index[self._extract_pkey_values(entry)] = entry
+            # Retries are spilled again, so the requests they were sent
+            # with can be committed.
+            self._track_request(entry)
+        if front:
+            self._items_buffer.extendleft(reversed(entries))
+        else:
+            self._items_buffer.extend(entries)
+        return entries
+
+    def _should_flush(self) -> bool:
+        return (
+            self._buffered_count() >= self._batch_size
+            or self._buffered_bytes >= self._max_batch_bytes
+        )
+
+    def _flush_if_needed(self) -> None:
+        if self._should_flush():
+            self._flush()
+
+    def _extract_key(self, entry: TableRequest) -> TableRequestKey:
+        table_name, request = entry
+        if "PutRequest" in request:
+            item = request["PutRequest"]["Item"]
+        else:
+            item = request["DeleteRequest"]["Key"]
+        return table_name, tuple(item[key] for key in self._key_names[table_name])
+
+    def _get_request_items(self, entries: Iterable[TableRequest]) -> Dict[str, List[Request]]:
+        request_items: Dict[str, List[Request]] = {}
+        for table_name, request in entries:
+            request_items.setdefault(table_name, []).append(request)
+        return request_items
+
+    def _get_unprocessed_items(self, response: Dict[str, Any]) -> List[TableRequest]:
+        return [
+            (table_name, request)
+            for table_name, requests in response["UnprocessedItems"].items()
+            for request in requests
+        ]
+
+    def _format_unprocessed_items(self, entries: List[TableRequest]) -> Any:
+        return self._get_request_items(entries)
+
+    def _flush(self) -> None:
+        delay = self._next_send_time - time.time()
+        if delay > 0:
+            time.sleep(delay)
+        items_to_send, records = self._take_batch()
+        if not items_to_send:
+            return
+        if self._max_in_flight > 1:
+            self._send_concurrently(items_to_send, records)
+            return
+        response = self._client.batch_write_item(
+            RequestItems=self._get_request_items(items_to_send)
+        )
+        unprocessed_items = self._get_unprocessed_items(response)
+
+        # Any unprocessed_items are added to the next batch we send.
+        self._requeue(unprocessed_items)
+        self._commit_spill(records)
+        logger.debug(
+            "Batch write sent %s, unprocessed: %s", len(items_to_send), len(unprocessed_items),
+        )
+        self._record_response(len(items_to_send), unprocessed_items)
+
+    def _record_response(self, sent_count: int, unprocessed_items: List[TableRequest]) -> None:
+        self.metrics.batches += 1
+        self.metrics.items += sent_count
+        if not unprocessed_items:
+            self._retry_attempts = 0
+            self._throttled_since = None
+            if self._adaptive_flush:
+                self._batch_size = min(self._flush_amount, self._batch_size + 1)
+            return
+
+        now = time.time()
+        self._retry_attempts += 1
+        self.metrics.retries += 1
+        self.metrics.throttled_items += len(unprocessed_items)
+        if self._throttled_since is None:
+            self._throttled_since = now
+        if (self._max_retries is not None and self._retry_attempts > self._max_retries) or (
+            self._retry_timeout is not None and now - self._throttled_since > self._retry_timeout
+        ):
+            raise DynamoDBUnprocessedItemsError(
+                self._format_unprocessed_items(self._buffered_requests())
+            )
+        if self._adaptive_flush:
+            self._batch_size = max(1, self._batch_size // 2)
+        # Back off with full jitter so that throttled writers spread out.
+        backoff = min(MAX_BACKOFF, BACKOFF_BASE * 2 ** (self._retry_attempts - 1))
+        self._next_send_time = now + random.uniform(0, backoff)
+
+    def _send_concurrently(
+        self, items_to_send: List[TableRequest], records: List[SpillRecord]
+    ) -> None:
+        keys = {self._extract_key(entry) for entry in items_to_send}
+        # Writes to the same item must never be in flight at the same
+        # time, or they could be applied out of order.
+        for future, (_, in_flight_keys, _) in list(self._in_flight.items()):
+            if not keys.isdisjoint(in_flight_keys):
+                self._complete(future, keys)
+        while len(self._in_flight) >= self._max_in_flight:
+            done, _ = wait(self._in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                self._complete(future, keys)
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._max_in_flight)
+        future = self._executor.submit(
+            self._client.batch_write_item, RequestItems=self._get_request_items(items_to_send)
+        )
+        self._in_flight[future] = (len(items_to_send), keys, records)
+        logger.debug(
+            "Batch write sent %s, in flight: %s", len(items_to_send), len(self._in_flight),
+        )
 
-class BatchWriter:
+    def _complete(
+        self, future: "Future[Dict[str, Any]]", sending_keys: Set[TableRequestKey]
+    ) -> None:
+        # Responses are only ever handled from the thread that owns the
+        # buffer, so the buffer needs no locking.
+        sent_count, _, records = self._in_flight.pop(future)
+        self._handle_response(sent_count, future.result(), sending_keys, records)
+
+    def _handle_response(
+        self,
+        sent_count: int,
+        response: Dict[str, Any],
+        sending_keys: Set[TableRequestKey],
+        records: List[SpillRecord],
+    ) -> None:
+        unprocessed_items = self._get_unprocessed_items(response)
+        if not unprocessed_items:
+            self._commit_spill(records)
+            self._record_response(sent_count, [])
+            return
+        retries = unprocessed_items
+        if self._key_names:
+            # A newer write to the same item that is already buffered or
+            # about to be sent supersedes the unprocessed one.
+            newer_keys = sending_keys.union(
+                self._extract_key(entry) for entry in self._buffered_requests()
+            )
+            retries = [entry for entry in retries if self._extract_key(entry) not in newer_keys]
+        retries = self._requeue(retries, front=True)
+        self._commit_spill(records)
+        logger.debug(
+            "Batch write unprocessed: %s, retrying: %s", len(unprocessed_items), len(retries),
+        )
+        self._record_response(sent_count, unprocessed_items)
+
+    def __enter__(self: BatchWriterType) -> BatchWriterType:
+        return self
+
+    def __exit__(self, exc_type: Type[BaseException], exc_value: BaseException, tb: Any) -> None:
+        # When we exit, we need to keep flushing whatever's left
+        # until there's nothing left in our items buffer.
+        try:
+            while self._items_buffer or self._in_flight:
+                if self._items_buffer:
+                    self._flush()
+                else:
+                    done, _ = wait(self._in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self._complete(future, set())
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+            self._commit_spill([])
+            self._close_spill()
+
+
+def _get_table_key_names(
+    table_name: str,
+    overwrite_by_pkeys: Optional[Iterable[str]],
+    key_names: Optional[Iterable[str]],
+    max_in_flight: int,
+) -> Tuple[Dict[str, Tuple[str, ...]], Dict[str, Tuple[str, ...]]]:
+    pkeys = tuple(overwrite_by_pkeys or ())
+    names = tuple(key_names or pkeys)
+    if max_in_flight > 1 and not names:
+        raise ValueError("key_names must be provided when max_in_flight is more than 1")
+    return (
+        {table_name: pkeys} if pkeys else {},
+        {table_name: names} if names else {},
+    )
+
+
+class BatchWriter(_BaseBatchWriter):
     """Automatically handle batch writes to DynamoDB for a single table."""
 
     def __init__(
@@ -74,6 +1525,13 @@ class BatchWriter:
         client: BaseClient,
         flush_amount: int = 25,
         overwrite_by_pkeys: Optional[Iterable[str]] = None,
+        max_in_flight: int = 1,
+        key_names: Optional[Iterable[str]] = None,
+        max_retries: Optional[int] = None,
+        retry_timeout: Optional[float] = None,
+        adaptive_flush: bool = False,
+        max_batch_bytes: int = MAX_BATCH_BYTES,
+        spill_path: Optional[str] = None,
     ):
         """
 
@@ -101,64 +1559,303 @@ class BatchWriter:
             if match new request item on specified primary keys. i.e
             ``["partition_key1", "sort_key2", "sort_key3"]``
 
+        :type max_in_flight: int
+        :param max_in_flight: The maximum number of ``batch_write_item``
+            requests that are sent concurrently from a thread pool. By
+            default, batches are sent one at a time from the calling thread.
+
+        :type key_names: list(string)
+        :param key_names: The primary key attribute names used to keep
+            writes to the same item in order when ``max_in_flight`` is
+            more than one. Defaults to ``overwrite_by_pkeys``.
+
+        :type max_retries: int
+        :param max_retries: The maximum number of consecutive responses
+            with unprocessed items before raising
+            ``DynamoDBUnprocessedItemsError``. Unprocessed items are retried
+            with jittered exponential backoff.
+
+        :type retry_timeout: float
+        :param retry_timeout: The maximum number of seconds to keep retrying
+            unprocessed items before raising ``DynamoDBUnprocessedItemsError``.
+
+        :type adaptive_flush: bool
+        :param adaptive_flush: Halve the size of the batches whenever items
+            are unprocessed, and grow it back by one item after every fully
+            processed batch, up to ``flush_amount``.
+
+        :type max_batch_bytes: int
+        :param max_batch_bytes: The estimated size in bytes of the buffered
+            items at which a batch is sent, in addition to ``flush_amount``.
+            Items larger than the 400KB limit of DynamoDB are rejected with
+            ``DynamoDBItemTooLargeError`` before being buffered.
+
+        :type spill_path: string
+        :param spill_path: The path of a file that every request is
+            appended to before it is buffered, along with a ``.offset``
+            file tracking the requests that have been written. Requests
+            that may not have been written when the process stopped are
+            replayed into the buffer by the next batch writer created with
+            the same path. The files are removed once all the requests are
+            written.
+
         """
+        pkeys, names = _get_table_key_names(
+            table_name, overwrite_by_pkeys, key_names, max_in_flight
+        )
+        super().__init__(
+            client,
+            flush_amount,
+            overwrite_by_pkeys=pkeys,
+            max_in_flight=max_in_flight,
+            key_names=names,
+            max_retries=max_retries,
+            retry_timeout=retry_timeout,
+            adaptive_flush=adaptive_flush,
+            max_batch_bytes=max_batch_bytes,
+            spill_path=spill_path,
+        )
         self._table_name = table_name
-        self._client = client
-        self._items_buffer: List[Dict[str, Any]] = []
-        self._flush_amount = flush_amount
-        self._overwrite_by_pkeys = overwrite_by_pkeys or tuple()
 
     def put_item(self, Item: Dict[str, Any]) -> None:
-        self._add_request_and_process({"PutRequest": {"Item": Item}})
+        self._add_request_and_process(self._table_name, {"PutRequest": {"Item": Item}})
 
     def delete_item(self, Key: Dict[str, Any]) -> None:
-        self._add_request_and_process({"DeleteRequest": {"Key": Key}})
+        self._add_request_and_process(self._table_name, {"DeleteRequest": {"Key": Key}})
 
-    def _add_request_and_process(self, request: Request) -> None:
-        if self._overwrite_by_pkeys:
-            self._remove_dup_pkeys_request_if_any(request)
-        self._items_buffer.append(request)
-        self._flush_if_needed()
+    def _format_unprocessed_items(self, entries: List[TableRequest]) -> Any:
+        return [request for _, request in entries]
 
-    def _remove_dup_pkeys_request_if_any(self, request: Request) -> None:
-        pkey_values_new = self._extract_pkey_values(request)
-        for item in self._items_buffer:
-            if self._extract_pkey_values(item) == pkey_values_new:
-                self._items_buffer.remove(item)
-                logger.debug("With overwrite_by_pkeys enabled, skipping " "request:%s", item)
 
-    def _extract_pkey_values(self, request: Request) -> List[str]:
-        if request.get("PutRequest"):
-            return [request["PutRequest"]["Item"][key] for key in self._overwrite_by_pkeys]
-        if request.get("DeleteRequest"):
-            return [request["DeleteRequest"]["Key"][key] for key in self._overwrite_by_pkeys]
-        return []
+class AsyncBatchWriter(_BaseBatchWriter):
+    """Handle batch writes to DynamoDB for a single table from asyncio code.
 
-    def _flush_if_needed(self) -> None:
-        if len(self._items_buffer) >= self._flush_amount:
-            self._flush()
+    The requests are buffered in the event loop, and the batches are sent
+    from an executor so that the event loop is never blocked. Once
+    ``max_in_flight`` batches are being sent, ``put_item`` and
+    ``delete_item`` wait for one of them to complete.
+    """
 
-    def _flush(self) -> None:
-        items_to_send = self._items_buffer[: self._flush_amount]
-        self._items_buffer = self._items_buffer[self._flush_amount :]
-        response = self._client.batch_write_item(RequestItems={self._table_name: items_to_send})
-        unprocessed_items = response["UnprocessedItems"]
-
-        if unprocessed_items and unprocessed_items[self._table_name]:
-            # Any unprocessed_items are immediately added to the
-            # next batch we send.
-            self._items_buffer.extend(unprocessed_items[self._table_name])
-        else:
-            self._items_buffer = []
+    def __init__(
+        self,
+        table_name: str,
+        client: BaseClient,
+        flush_amount: int = 25,
+        overwrite_by_pkeys: Optional[Iterable[str]] = None,
+        max_in_flight: int = 1,
+        key_names: Optional[Iterable[str]] = None,
+        max_retries: Optional[int] = None,
+        retry_timeout: Optional[float] = None,
+        adaptive_flush: bool = False,
+        max_batch_bytes: int = MAX_BATCH_BYTES,
+        executor: Optional[Executor] = None,
+    ):
+        """
+
+        The parameters are the same as the ones of ``BatchWriter``, except
+        for:
+
+        :type executor: ``concurrent.futures.Executor``
+        :param executor: The executor to send the batches from. Defaults
+            to the default executor of the event loop.
+
+        """
+        pkeys, names = _get_table_key_names(
+            table_name, overwrite_by_pkeys, key_names, max_in_flight
+        )
+        super().__init__(
+            client,
+            flush_amount,
+            overwrite_by_pkeys=pkeys,
+            max_in_flight=max_in_flight,
+            key_names=names,
+            max_retries=max_retries,
+            retry_timeout=retry_timeout,
+            adaptive_flush=adaptive_flush,
+            max_batch_bytes=max_batch_bytes,
+        )
+        self._table_name = table_name
+        self._send_executor = executor
+        self._sending: Dict["asyncio.Future[Dict[str, Any]]", InFlightBatch] = {}
+        # Created in the event loop, as locks are bound to the loop they
+        # are created in before Python 3.10.
+        self._send_lock: Optional[asyncio.Lock] = None
+
+    async def put_item(self, Item: Dict[str, Any]) -> None:
+        self._add_request(self._table_name, {"PutRequest": {"Item": Item}})
+        await self._flush_if_needed_async()
+
+    async def delete_item(self, Key: Dict[str, Any]) -> None:
+        self._add_request(self._table_name, {"DeleteRequest": {"Key": Key}})
+        await self._flush_if_needed_async()
+
+    def _format_unprocessed_items(self, entries: List[TableRequest]) -> Any:
+        return [request for _, request in entries]
+
+    def _get_send_lock(self) -> asyncio.Lock:
+        if self._send_lock is None:
+            self._send_lock = asyncio.Lock()
+        return self._send_lock
+
+    async def _flush_if_needed_async(self) -> None:
+        if not self._should_flush():
+            return
+        # Coroutines sharing the writer wait for each other here, so only
+        # one of them ever waits on and completes the batches in flight.
+        async with self._get_send_lock():
+            # Another coroutine may have sent the buffer in the meantime.
+            if self._should_flush():
+                await self._flush_async()
+
+    async def _flush_async(self) -> None:
+        # Wait for a free slot before taking the batch, so that the
+        # unprocessed items of the completed batches are sent first.
+        while len(self._sending) >= self._max_in_flight:
+            await self._complete_first()
+        delay = self._next_send_time - time.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        items_to_send, records = self._take_batch()
+        if not items_to_send:
+            return
+        keys: Set[TableRequestKey] = set()
+        if self._key_names:
+            keys = {self._extract_key(entry) for entry in items_to_send}
+        # Writes to the same item must never be in flight at the same
+        # time, or they could be applied out of order.
+        for future, (_, in_flight_keys, _) in list(self._sending.items()):
+            if not keys.isdisjoint(in_flight_keys):
+                await asyncio.wait([future])
+                self._complete_async(future, keys)
+
+        loop = asyncio.get_event_loop()
+        future = loop.run_in_executor(
+            self._send_executor,
+            partial(
+                self._client.batch_write_item,
+                RequestItems=self._get_request_items(items_to_send),
+            ),
+        )
+        self._sending[future] = (len(items_to_send), keys, records)
         logger.debug(
-            "Batch write sent %s, unprocessed: %s", len(items_to_send), len(self._items_buffer),
+            "Batch write sent %s, in flight: %s", len(items_to_send), len(self._sending),
         )
 
-    def __enter__(self) -> "BatchWriter":
+    async def _complete_first(self) -> None:
+        done, _ = await asyncio.wait(list(self._sending), return_when=asyncio.FIRST_COMPLETED)
+        for future in done:
+            self._complete_async(future, set())
+
+    def _complete_async(
+        self, future: "asyncio.Future[Dict[str, Any]]", sending_keys: Set[TableRequestKey]
+    ) -> None:
+        sent_count, _, records = self._sending.pop(future)
+        self._handle_response(sent_count, future.result(), sending_keys, records)
+
+    async def __aenter__(self) -> "AsyncBatchWriter":
         return self
 
-    def __exit__(self, exc_type: Type[BaseException], exc_value: BaseException, tb: Any) -> None:
+    async def __aexit__(
+        self, exc_type: Type[BaseException], exc_value: BaseException, tb: Any
+    ) -> None:
         # When we exit, we need to keep flushing whatever's left
         # until there's nothing left in our items buffer.
-        while self._items_buffer:
-            self._flush()
+        try:
+            async with self._get_send_lock():
+                while self._items_buffer or self._sending:
+                    if self._items_buffer:
+                        await self._flush_async()
+                    else:
+                        await self._complete_first()
+        finally:
+            self._commit_spill([])
+            self._close_spill()
+
+
+class MultiTableBatchWriter(_BaseBatchWriter):
+    """Automatically handle batch writes to DynamoDB for multiple tables."""
+
+    def __init__(
+        self,
+        client: BaseClient,
+        flush_amount: int = 25,
+        overwrite_by_pkeys: Optional[Dict[str, Iterable[str]]] = None,
+        max_in_flight: int = 1,
+        key_names: Optional[Dict[str, Iterable[str]]] = None,
+        max_retries: Optional[int] = None,
+        retry_timeout: Optional[float] = None,
+        adaptive_flush: bool = False,
+        max_batch_bytes: int = MAX_BATCH_BYTES,
+    ):
+        """
+
+        :type client: ``botocore.client.Client``
+        :param client: A botocore client with the dynamodb customizations
+            applied to it, i.e. ``boto3.resource('dynamodb').meta.client``.
+
+        :type flush_amount: int
+        :param flush_amount: The number of items, across all tables, to keep
+            in a local buffer before sending a batch_write_item request to
+            DynamoDB.
+
+        :type overwrite_by_pkeys: dict
+        :param overwrite_by_pkeys: The primary keys to de-duplicate request
+            items in buffer by, for each table name that needs it. i.e.
+            ``{"table1": ["partition_key1", "sort_key2"]}``
+
+        :type max_in_flight: int
+        :param max_in_flight: The maximum number of ``batch_write_item``
+            requests that are sent concurrently from a thread pool.
+
+        :type key_names: dict
+        :param key_names: The primary key attribute names of every table,
+            used to keep writes to the same item in order when
+            ``max_in_flight`` is more than one. Defaults to
+            ``overwrite_by_pkeys``.
+
+        :type max_retries: int
+        :param max_retries: The maximum number of consecutive responses
+            with unprocessed items before raising
+            ``DynamoDBUnprocessedItemsError``.
+
+        :type retry_timeout: float
+        :param retry_timeout: The maximum number of seconds to keep retrying
+            unprocessed items before raising ``DynamoDBUnprocessedItemsError``.
+
+        :type adaptive_flush: bool
+        :param adaptive_flush: Halve the size of the batches whenever items
+            are unprocessed, and grow it back after fully processed batches.
+
+        :type max_batch_bytes: int
+        :param max_batch_bytes: The estimated size in bytes of the buffered
+            items at which a batch is sent.
+
+        """
+        pkeys = {
+            table_name: tuple(names)
+            for table_name, names in (overwrite_by_pkeys or {}).items()
+            if names
+        }
+        names = dict(pkeys)
+        names.update(
+            (table_name, tuple(table_key_names))
+            for table_name, table_key_names in (key_names or {}).items()
+            if table_key_names
+        )
+        super().__init__(
+            client,
+            flush_amount,
+            overwrite_by_pkeys=pkeys,
+            max_in_flight=max_in_flight,
+            key_names=names,
+            max_retries=max_retries,
+            retry_timeout=retry_timeout,
+            adaptive_flush=adaptive_flush,
+            max_batch_bytes=max_batch_bytes,
+        )
+
+    def put_item(self, TableName: str, Item: Dict[str, Any]) -> None:
+        self._add_request_and_process(TableName, {"PutRequest": {"Item": Item}})
+
+    def delete_item(self, TableName: str, Key: Dict[str, Any]) -> None:
+        self._add_request_and_process(TableName, {"DeleteRequest": {"Key": Key}})
@@ -10,7 +10,6 @@
 # distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
 # ANY KIND, either express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
-import copy
 from typing import Any, Callable, Dict, List, Optional
 
 from botocore.model import OperationModel
@@ -26,7 +25,10 @@ def register_high_level_interface(base_classes: List[Any], **_kwargs: Any) -> No
 
 
 def copy_dynamodb_params(params: Any, **_kwargs: Any) -> Any:
-    return copy.deepcopy(params)
+    # Only the top level parameters are modified in place by the input
+    # transformations. Nested containers are copied on write while they
+    # are transformed, so there is no need to deep copy the user input.
+    return dict(params)
 
 
 class DynamoDBHighLevelResource(ServiceResource):
@@ -45,19 +47,12 @@ class DynamoDBHighLevelResource(ServiceResource):
 
         self._injector = TransformationInjector()
         # Apply the handler that generates condition expressions including
-        # placeholders.
+        # placeholders and serializes the request from python types to
+        # dynamodb types in a single pass over the parameters.
         self.meta.client.meta.events.register(
             "before-parameter-build.dynamodb",
-            self._injector.inject_condition_expressions,
-            unique_id="dynamodb-condition-expression",
-        )
-
-        # Apply the handler that serializes the request from python
-        # types to dynamodb types.
-        self.meta.client.meta.events.register(
-            "before-parameter-build.dynamodb",
-            self._injector.inject_attribute_value_input,
-            unique_id="dynamodb-attr-value-input",
+            self._injector.inject_input_transformations,
+            unique_id="dynamodb-input-transformations",
         )
 
         # Apply the handler that deserializes the response from dynamodb
@@ -140,6 +135,63 @@ class TransformationInjector:
         self._serializer = serializer or TypeSerializer()
         self._deserializer = deserializer or TypeDeserializer()
 
+    def inject_input_transformations(
+        self, params: Dict[str, Any], model: OperationModel, **_kwargs: Any
+    ) -> None:
+        """Injects all of the input transformations into the parameters
+
+        This is equivalent to calling ``inject_condition_expressions`` and
+        then ``inject_attribute_value_input``, but the parameters are only
+        traversed once. Containers are copied on write, so nested structures
+        provided by the user are never modified.
+        """
+        self._condition_builder.reset()
+        generated_names: Dict[str, Any] = {}
+        generated_values: Dict[str, Any] = {}
+
+        # The order of the transformations matters: condition expressions
+        # get their placeholders generated before key conditions.
+        transformations: Dict[str, Callable[..., Any]] = {
+            "ConditionExpression": ConditionExpressionTransformation(
+                self._condition_builder,
+                placeholder_names=generated_names,
+                placeholder_values=generated_values,
+                is_key_condition=False,
+            ),
+            "KeyExpression": ConditionExpressionTransformation(
+                self._condition_builder,
+                placeholder_names=generated_names,
+                placeholder_values=generated_values,
+                is_key_condition=True,
+            ),
+            "AttributeValue": self._serializer.serialize,
+        }
+        input_shape = model.input_shape
+        transformed = self._transformer.transform_all(params, input_shape, transformations)
+
+        expr_attr_names_input = "ExpressionAttributeNames"
+        expr_attr_values_input = "ExpressionAttributeValues"
+
+        if generated_names:
+            names = dict(transformed.get(expr_attr_names_input) or {})
+            names.update(generated_names)
+            transformed[expr_attr_names_input] = names
+
+        if generated_values:
+            # The generated values are still python types, so they are
+            # serialized on their own before being merged in.
+            values_model = input_shape.members.get(expr_attr_values_input)
+            if values_model is not None:
+                generated_values = self._transformer.transform_all(
+                    generated_values, values_model, transformations
+                )
+            values = dict(transformed.get(expr_attr_values_input) or {})
+            values.update(generated_values)
+            transformed[expr_attr_values_input] = values
+
+        if transformed is not params:
+            params.update(transformed)
+
     def inject_condition_expressions(
         self, params: Dict[str, Any], model: OperationModel, **_kwargs: Any
     ) -> None:
@@ -266,6 +318,124 @@ class ParameterTransformer:
         """
         self._transform_parameters(model, params, transformation, target_shape)
 
+    def transform_all(
+        self,
+        params: Dict[str, Any],
+        model: OperationModel,
+        transformations: Dict[str, Callable[..., Any]],
+    ) -> Dict[str, Any]:
+        """Applies several transformations in a single traversal
+
+        Unlike ``transform``, the provided parameters are left untouched.
+        Only the containers on the path to a transformed value are copied,
+        everything else is shared with the original parameters.
+
+        :param params: The parameters structure to transform.
+        :param model: The operation model.
+        :param transformations: A mapping of shape name to the function
+            to apply to the values of that shape. When members of one
+            structure are targeted by several transformations, they are
+            transformed in the order of this mapping.
+        :returns: The transformed parameters, or ``params`` itself if
+            nothing was transformed.
+        """
+        return self._transform_value(model, params, transformations)
+
+    def _transform_value(
+        self, model: OperationModel, value: Any, transformations: Dict[str, Callable[..., Any]],
+    ) -> Any:
+        type_name = model.type_name
+        if type_name == "structure":
+            return self._transform_structure_copy(model, value, transformations)
+        if type_name == "map":
+            return self._transform_map_copy(model, value, transformations)
+        if type_name == "list":
+            return self._transform_list_copy(model, value, transformations)
+        return value
+
+    def _transform_structure_copy(
+        self,
+        model: OperationModel,
+        params: Dict[str, Any],
+        transformations: Dict[str, Callable[..., Any]],
+    ) -> Any:
+        if not isinstance(params, dict):
+            return params
+        new_params = None
+        targeted = []
+        members = model.members
+        for param, value in params.items():
+            member_model = members.get(param)
+            if member_model is None:
+                continue
+            member_shape = member_model.name
+            if member_shape in transformations:
+                targeted.append(param)
+                continue
+            new_value = self._transform_value(member_model, value, transformations)
+            if new_value is not value:
+                if new_params is None:
+                    new_params = dict(params)
+                new_params[param] = new_value
+        if targeted:
+            if new_params is None:
+                new_params = dict(params)
+            if len(targeted) > 1:
+                order = list(transformations)
+                targeted.sort(key=lambda name: order.index(members[name].name))
+            for param in targeted:
+                transformation = transformations[members[param].name]
+                new_params[param] = transformation(params[param])
+        if new_params is None:
+            return params
+        return new_params
+
+    def _transform_map_copy(
+        self,
+        model: OperationModel,
+        params: Dict[str, Any],
+        transformations: Dict[str, Callable[..., Any]],
+    ) -> Any:
+        if not isinstance(params, dict):
+            return params
+        value_model = model.value
+        transformation = transformations.get(value_model.name)
+        if transformation is not None:
+            return {key: transformation(value) for key, value in params.items()}
+        new_params = None
+        for key, value in params.items():
+            new_value = self._transform_value(value_model, value, transformations)
+            if new_value is not value:
+                if new_params is None:
+                    new_params = dict(params)
+                new_params[key] = new_value
+        if new_params is None:
+            return params
+        return new_params
+
+    def _transform_list_copy(
+        self,
+        model: OperationModel,
+        params: List[Any],
+        transformations: Dict[str, Callable[..., Any]],
+    ) -> Any:
+        if not isinstance(params, list):
+            return params
+        member_model = model.member
+        transformation = transformations.get(member_model.name)
+        if transformation is not None:
+            return [transformation(item) for item in params]
+        new_params = None
+        for i, item in enumerate(params):
+            new_item = self._transform_value(member_model, item, transformations)
+            if new_item is not item:
+                if new_params is None:
+                    new_params = list(params)
+                new_params[i] = new_item
+        if new_params is None:
+            return params
+        return new_params
+
     def _transform_parameters(
         self,
         model: OperationModel,
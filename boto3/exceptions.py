@@ -12,7 +12,7 @@
 # language governing permissions and limitations under the License.
 
 # All exceptions in this class should subclass from Boto3Error.
-from typing import Any, Iterable
+from typing import Any, Dict, Iterable, List, Union
 
 from botocore.exceptions import DataNotFoundError
 
@@ -88,6 +88,19 @@ class S3UploadFailedError(Boto3Error):
     pass
 
 
+class S3BulkTransferFailedError(S3TransferFailedError):
+    """Raised when some transfers of a directory or prefix failed"""
+
+    def __init__(self, failures: Dict[str, Exception]) -> None:
+        # The exception raised by each failed transfer by object key.
+        self.failures = failures
+        keys = sorted(failures)
+        msg = "%s transfers failed: %s" % (len(keys), ", ".join(keys[:10]))
+        if len(keys) > 10:
+            msg += ", ..."
+        super().__init__(msg)
+
+
 class DynamoDBOperationNotSupportedError(Boto3Error):
     """Raised for operantions that are not supported for an operand"""
 
@@ -118,3 +131,39 @@ class DynamoDBNeedsConditionError(Boto3Error):
 
 class DynamoDBNeedsKeyConditionError(Boto3Error):
     pass
+
+
+class DynamoDBItemTooLargeError(Boto3Error):
+    """Raised when a batch write item exceeds the item size limit"""
+
+    def __init__(self, size: int, max_size: int) -> None:
+        self.size = size
+        self.max_size = max_size
+        msg = "Item size of %s bytes exceeds the maximum of %s bytes" % (size, max_size)
+        super().__init__(msg)
+
+
+class DynamoDBUnprocessedItemsError(Boto3Error):
+    """Raised when batch write items are still unprocessed after retrying"""
+
+    def __init__(self, unprocessed_items: Union[List[Any], Dict[str, List[Any]]]) -> None:
+        # The requests of a single table, or the requests by table name
+        # when writing to multiple tables.
+        self.unprocessed_items = unprocessed_items
+        if isinstance(unprocessed_items, dict):
+            count = sum(len(requests) for requests in unprocessed_items.values())
+        else:
+            count = len(unprocessed_items)
+        msg = "%s batch write requests are still unprocessed after retrying" % count
+        super().__init__(msg)
+
+
+class DynamoDBUnprocessedKeysError(Boto3Error):
+    """Raised when batch get keys are still unprocessed after retrying"""
+
+    def __init__(self, unprocessed_keys: Dict[str, List[Any]]) -> None:
+        # The unprocessed keys by table name.
+        self.unprocessed_keys = unprocessed_keys
+        count = sum(len(keys) for keys in unprocessed_keys.values())
+        msg = "%s batch get keys are still unprocessed after retrying" % count
+        super().__init__(msg)
@@ -0,0 +1,250 @@
+# Copyright 2015 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You
+# may not use this file except in compliance with the License. A copy of
+# the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
+# ANY KIND, either express or implied. See the License for the specific
+# language governing permissions and limitations under the License.
+"""Packing of many small files into a single S3 object.
+
+Uploading each small file as its own object costs a request per file. An
+archive streams the files one after the other into a single tar object,
+using a multipart upload when it is large enough, and stores the offset of
+each member in an index object next to it, along with the ETag of the
+archive. Members can then be read back individually with ranged GETs that
+only succeed while the archive is still the one the index describes.
+
+.. code-block:: python
+
+    client = boto3.client('s3', 'us-west-2')
+    upload_archive(client, [('/tmp/a.txt', 'a.txt')], 'bucket', 'key.tar')
+
+    archive = S3Archive(client, 'bucket', 'key.tar')
+    data = archive.read('a.txt')
+"""
+import io
+import json
+import os
+import tarfile
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from botocore.client import BaseClient
+from s3transfer.manager import TransferManager
+
+from boto3.s3.transfer import (
+    ProgressCallbackInvoker,
+    ProgressCallbackType,
+    TransferConfig,
+    get_transfer_manager,
+)
+
+# The suffix of the key of the index object of an archive.
+INDEX_SUFFIX = ".index"
+
+INDEX_VERSION = 1
+
+# The size of the blocks read from the member files and response bodies.
+READ_BLOCK_SIZE = 1024 * 1024
+
+# The offset and size of the data of each member by name.
+ArchiveIndex = Dict[str, List[int]]
+
+
+def upload_archive(
+    client: BaseClient,
+    files: Iterable[Tuple[str, str]],
+    bucket: str,
+    key: str,
+    extra_args: Optional[Dict[str, Any]] = None,
+    callback: Optional[ProgressCallbackType] = None,
+    config: Optional[TransferConfig] = None,
+) -> None:
+    """Upload local files packed into a single tar object and its index.
+
+    The archive is generated while it is uploaded, so the files are never
+    copied to a local archive first. Once it is complete, the index is
+    uploaded to ``key`` followed by ``INDEX_SUFFIX``.
+
+    :type client: boto3.client
+    :param client: The S3 client to use
+
+    :type files: iterable
+    :param files: The path of each file to pack and the name of its member
+        in the archive.
+
+    :type bucket: str
+    :param bucket: The name of the bucket to upload to.
+
+    :type key: str
+    :param key: The key of the archive object.
+
+    :type extra_args: dict
+    :param extra_args: Extra arguments that may be passed to the client
+        operation uploading the archive.
+
+    :type callback: function
+    :param callback: A method which takes a number of bytes transferred to
+        be periodically called during the upload of the archive.
+
+    :type config: boto3.s3.transfer.TransferConfig
+    :param config: The transfer configuration to be used when uploading the
+        archive.
+    """
+    subscribers = None
+    if callback is not None:
+        subscribers = [ProgressCallbackInvoker(callback)]
+
+    index: ArchiveIndex = {}
+    fileobj = io.BufferedReader(_ArchiveStream(_iter_archive_chunks(files, index)))
+    manager = get_transfer_manager(client, config)
+    future = manager.upload(fileobj, bucket, key, extra_args, subscribers)
+    try:
+        future.result()
+    except BaseException:
+        # The manager is shared with other transfers, so an interrupted
+        # upload is cancelled rather than left running.
+        future.cancel()
+        raise
+
+    # The members are read with the ETag of the archive the index was made
+    # for, so they are never read from an archive uploaded since.
+    head_args = {
+        name: value
+        for name, value in (extra_args or {}).items()
+        if name in TransferManager.ALLOWED_DOWNLOAD_ARGS
+    }
+    etag = client.head_object(Bucket=bucket, Key=key, **head_args)["ETag"]
+    body = json.dumps({"version": INDEX_VERSION, "etag": etag, "members": index}).encode("utf-8")
+    client.put_object(
+        Bucket=bucket, Key=key + INDEX_SUFFIX, Body=body, ContentType="application/json"
+    )
+
+
+class S3Archive:
+    """Reads the members of an archive uploaded with :py:func:`upload_archive`
+
+    The index of the archive is downloaded when the reader is created and
+    each member is then fetched with a ranged GET of the archive object.
+
+    :type client: boto3.client
+    :param client: The S3 client to use
+
+    :type bucket: str
+    :param bucket: The name of the bucket of the archive.
+
+    :type key: str
+    :param key: The key of the archive object.
+    """
+
+    def __init__(self, client: BaseClient, bucket: str, key: str) -> None:
+        self._client = client
+        self._bucket = bucket
+        self._key = key
+        index = io.BytesIO()
+        client.download_fileobj(bucket, key + INDEX_SUFFIX, index)
+        parsed_index = json.loads(index.getvalue().decode("utf-8"))
+        self._etag: str = parsed_index["etag"]
+        self._members: ArchiveIndex = parsed_index["members"]
+
+    def names(self) -> List[str]:
+        """Returns the names of the members of the archive."""
+        return list(self._members)
+
+    def get_size(self, name: str) -> int:
+        """Returns the size of a member of the archive."""
+        return self._get_member(name)[1]
+
+    def read(self, name: str) -> bytes:
+        """Returns the content of a member of the archive."""
+        fileobj = io.BytesIO()
+        self.download_fileobj(name, fileobj)
+        return fileobj.getvalue()
+
+    def download_fileobj(self, name: str, fileobj: IO[Any]) -> None:
+        """Download a member of the archive to a file-like object.
+
+        :type name: str
+        :param name: The name of the member to download.
+
+        :type fileobj: a file-like object
+        :param fileobj: A file-like object to download into. At a minimum,
+            it must implement the `write` method and must accept bytes.
+        """
+        offset, size = self._get_member(name)
+        if not size:
+            return
+        response = self._client.get_object(
+            Bucket=self._bucket,
+            Key=self._key,
+            Range="bytes=%s-%s" % (offset, offset + size - 1),
+            IfMatch=self._etag,
+        )
+        for chunk in response["Body"].iter_chunks(READ_BLOCK_SIZE):
+            fileobj.write(chunk)
+
+    def _get_member(self, name: str) -> List[int]:
+        try:
+            return self._members[name]
+        except KeyError:
+            raise KeyError("Member %s not found in archive %s" % (name, self._key))
+
+
+class _ArchiveStream(io.RawIOBase):
+    """A readable stream of the chunks of an archive as they are generated"""
+
+    def __init__(self, chunks: Iterator[bytes]) -> None:
+        self._chunks = chunks
+        self._pending = memoryview(b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        while not self._pending:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._pending = memoryview(chunk)
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+def _iter_archive_chunks(files: Iterable[Tuple[str, str]], index: ArchiveIndex) -> Iterator[bytes]:
+    # Generates a tar archive of the files, recording the offset of the
+    # data of each member in the index as it goes.
+    offset = 0
+    for filename, name in files:
+        stat = os.stat(filename)
+        info = tarfile.TarInfo(name)
+        info.size = stat.st_size
+        info.mtime = int(stat.st_mtime)
+        info.mode = 0o644
+        header = info.tobuf(tarfile.PAX_FORMAT, "utf-8", "surrogateescape")
+        yield header
+        offset += len(header)
+        index[name] = [offset, info.size]
+
+        with open(filename, "rb") as f:
+            remaining = info.size
+            while remaining:
+                block = f.read(min(remaining, READ_BLOCK_SIZE))
+                if not block:
+                    raise OSError("File %s was truncated while being archived" % filename)
+                yield block
+                remaining -= len(block)
+        padding = -info.size % tarfile.BLOCKSIZE
+        if padding:
+            yield tarfile.NUL * padding
+        offset += info.size + padding
+
+    # An archive ends with two empty blocks, padded to a full record.
+    end = tarfile.NUL * (2 * tarfile.BLOCKSIZE)
+    end += tarfile.NUL * (-(offset + len(end)) % tarfile.RECORDSIZE)
+    yield end
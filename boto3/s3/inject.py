@@ -10,18 +10,20 @@
 # distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
 # ANY KIND, either express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
+import io
 from typing import IO, Any, Callable, Dict, Optional
 
 from botocore.client import BaseClient
 from botocore.exceptions import ClientError
 
 from boto3 import utils
+from boto3.s3.streams import S3ObjectReader, S3ObjectWriter
 from boto3.s3.transfer import (
     ProgressCallbackInvoker,
     ProgressCallbackType,
     S3Transfer,
     TransferConfig,
-    create_transfer_manager,
+    get_transfer_manager,
 )
 
 
@@ -48,6 +50,7 @@ def inject_object_methods(class_attributes: Dict[str, Any], **_kwargs: Any) -> N
     utils.inject_attribute(class_attributes, "copy", object_copy)
     utils.inject_attribute(class_attributes, "upload_fileobj", object_upload_fileobj)
     utils.inject_attribute(class_attributes, "download_fileobj", object_download_fileobj)
+    utils.inject_attribute(class_attributes, "open", object_open)
 
 
 def inject_object_summary_methods(class_attributes: Dict[str, Any], **_kwargs: Any) -> None:
@@ -132,10 +135,10 @@ def upload_file(
     :param Config: The transfer configuration to be used when performing the
         transfer.
     """
-    with S3Transfer(self, Config) as transfer:
-        return transfer.upload_file(
-            filename=Filename, bucket=Bucket, key=Key, extra_args=ExtraArgs, callback=Callback,
-        )
+    transfer = S3Transfer(manager=get_transfer_manager(self, Config))
+    return transfer.upload_file(
+        filename=Filename, bucket=Bucket, key=Key, extra_args=ExtraArgs, callback=Callback,
+    )
 
 
 def download_file(
@@ -180,10 +183,10 @@ def download_file(
     :param Config: The transfer configuration to be used when performing the
         transfer.
     """
-    with S3Transfer(self, Config) as transfer:
-        return transfer.download_file(
-            bucket=Bucket, key=Key, filename=Filename, extra_args=ExtraArgs, callback=Callback,
-        )
+    transfer = S3Transfer(manager=get_transfer_manager(self, Config))
+    return transfer.download_file(
+        bucket=Bucket, key=Key, filename=Filename, extra_args=ExtraArgs, callback=Callback,
+    )
 
 
 def bucket_upload_file(
@@ -431,20 +434,22 @@ def copy(
     if Callback is not None:
         subscribers = [ProgressCallbackInvoker(Callback)]
 
-    config = Config
-    if config is None:
-        config = TransferConfig()
-
-    with create_transfer_manager(self, config) as manager:
-        future = manager.copy(
-            copy_source=CopySource,
-            bucket=Bucket,
-            key=Key,
-            extra_args=ExtraArgs,
-            subscribers=subscribers,
-            source_client=SourceClient,
-        )
+    manager = get_transfer_manager(self, Config)
+    future = manager.copy(
+        copy_source=CopySource,
+        bucket=Bucket,
+        key=Key,
+        extra_args=ExtraArgs,
+        subscribers=subscribers,
+        source_client=SourceClient,
+    )
+    try:
         return future.result()
+    except BaseException:
+        # The manager is shared with other transfers, so an interrupted
+        # transfer is cancelled rather than left running.
+        future.cancel()
+        raise
 
 
 def bucket_copy(
@@ -627,15 +632,15 @@ def upload_fileobj(
     if Callback is not None:
         subscribers = [ProgressCallbackInvoker(Callback)]
 
-    config = Config
-    if config is None:
-        config = TransferConfig()
-
-    with create_transfer_manager(self, config) as manager:
-        future = manager.upload(
-            fileobj=Fileobj, bucket=Bucket, key=Key, extra_args=ExtraArgs, subscribers=subscribers,
-        )
+    manager = get_transfer_manager(self, Config)
+    future = manager.upload(
+        fileobj=Fileobj, bucket=Bucket, key=Key, extra_args=ExtraArgs, subscribers=subscribers,
+    )
+    try:
         return future.result()
+    except BaseException:
+        future.cancel()
+        raise
 
 
 def bucket_upload_fileobj(
@@ -794,15 +799,15 @@ def download_fileobj(
     if Callback is not None:
         subscribers = [ProgressCallbackInvoker(Callback)]
 
-    config = Config
-    if config is None:
-        config = TransferConfig()
-
-    with create_transfer_manager(self, config) as manager:
-        future = manager.download(
-            bucket=Bucket, key=Key, fileobj=Fileobj, extra_args=ExtraArgs, subscribers=subscribers,
-        )
+    manager = get_transfer_manager(self, Config)
+    future = manager.download(
+        bucket=Bucket, key=Key, fileobj=Fileobj, extra_args=ExtraArgs, subscribers=subscribers,
+    )
+    try:
         return future.result()
+    except BaseException:
+        future.cancel()
+        raise
 
 
 def bucket_download_fileobj(
@@ -906,3 +911,53 @@ def object_download_fileobj(
         Callback=Callback,
         Config=Config,
     )
+
+
+def object_open(
+    self: Any,
+    mode: str = "rb",
+    ExtraArgs: Optional[Dict[str, Any]] = None,
+    Config: Optional[TransferConfig] = None,
+) -> io.IOBase:
+    """Open this object as a file-like object.
+
+    In ``rb`` mode, the object is returned as a seekable file-like object
+    that fetches byte ranges of the object as they are read, so random
+    access readers do not need to download the whole object.
+
+    In ``wb`` mode, the data written to the returned file-like object is
+    uploaded while it is written, with a multipart upload if it is large
+    enough. The object is created once the file-like object is closed, and
+    the upload is aborted if an exception is raised within its context.
+
+    Usage::
+
+        import boto3
+        s3 = boto3.resource('s3')
+        obj = s3.Object('mybucket', 'mykey')
+
+        with obj.open('rb') as f:
+            f.seek(-8, 2)
+            footer = f.read()
+
+        with obj.open('wb') as f:
+            f.write(b'hello')
+
+    :type mode: str
+    :param mode: The mode to open the object in, ``rb`` or ``wb``.
+
+    :type ExtraArgs: dict
+    :param ExtraArgs: Extra arguments that may be passed to the
+        client operations.
+
+    :type Config: boto3.s3.transfer.TransferConfig
+    :param Config: The transfer configuration setting the size of the
+        ranges or parts and the number of them transferred concurrently.
+
+    :rtype: boto3.s3.streams.S3ObjectReader or boto3.s3.streams.S3ObjectWriter
+    """
+    if mode == "rb":
+        return S3ObjectReader(self.meta.client, self.bucket_name, self.key, ExtraArgs, Config)
+    if mode == "wb":
+        return S3ObjectWriter(self.meta.client, self.bucket_name, self.key, ExtraArgs, Config)
+    raise ValueError("Invalid mode: %r" % mode)
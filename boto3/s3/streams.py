@@ -0,0 +1,449 @@
+# Copyright 2015 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You
+# may not use this file except in compliance with the License. A copy of
+# the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
+# ANY KIND, either express or implied. See the License for the specific
+# language governing permissions and limitations under the License.
+"""File-like objects over S3 objects.
+
+These are returned by the ``open`` method injected onto ``s3.Object``.
+"""
+import io
+import queue
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import IO, Any, Dict, Optional
+
+from botocore.client import BaseClient
+from s3transfer.exceptions import CancelledError
+from s3transfer.manager import TransferManager
+from s3transfer.subscribers import BaseSubscriber
+from s3transfer.utils import S3_RETRYABLE_DOWNLOAD_ERRORS
+
+from boto3.exceptions import RetriesExceededError, S3UploadFailedError
+from boto3.s3.transfer import (
+    AUTO,
+    AUTO_INITIAL_CONCURRENCY,
+    TransferConfig,
+    create_transfer_manager,
+    get_chunksize,
+    validate_extra_args,
+)
+
+# The number of seconds a writer waits for its upload to start reading the
+# data before failing the write.
+UPLOAD_START_TIMEOUT = 60
+
+
+class S3ObjectReader(io.RawIOBase):
+    """A seekable, read-only file-like object over an S3 object
+
+    The object is read in blocks of ``multipart_chunksize`` bytes with
+    ranged GETs that are pinned to the ETag the object had when it was
+    opened. The blocks of a read spanning several of them are fetched in
+    parallel and, while the object is read sequentially, the next
+    ``max_concurrency`` blocks are fetched ahead of time. The most recently
+    used blocks are kept in a cache of twice that many blocks, so at most
+    ``3 * max_concurrency`` blocks are held in memory on top of the data
+    of the current read.
+
+    :type client: boto3.client
+    :param client: The S3 client to use
+
+    :type bucket: str
+    :param bucket: The name of the bucket of the object.
+
+    :type key: str
+    :param key: The key of the object.
+
+    :type extra_args: dict
+    :param extra_args: Extra arguments that may be passed to the client
+        operations, the same as for downloads.
+
+    :type config: boto3.s3.transfer.TransferConfig
+    :param config: The transfer configuration setting the block size and
+        concurrency. If ``use_threads`` is False, blocks are fetched one at
+        a time and only when they are read.
+    """
+
+    def __init__(
+        self,
+        client: BaseClient,
+        bucket: str,
+        key: str,
+        extra_args: Optional[Dict[str, Any]] = None,
+        config: Optional[TransferConfig] = None,
+    ) -> None:
+        super().__init__()
+        if config is None:
+            config = TransferConfig()
+        self._client = client
+        self._bucket = bucket
+        self._key = key
+        self._extra_args = validate_extra_args(extra_args, TransferManager.ALLOWED_DOWNLOAD_ARGS)
+        self._num_attempts = config.num_download_attempts
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._read_ahead = 0
+        if config.use_threads:
+            concurrency = config.max_request_concurrency
+            if config.max_concurrency == AUTO:
+                # The read-ahead is not tuned while reading.
+                concurrency = AUTO_INITIAL_CONCURRENCY
+            self._executor = ThreadPoolExecutor(max_workers=concurrency)
+            self._read_ahead = concurrency
+        self._max_cached_blocks = max(2 * self._read_ahead, 1)
+        self._cache: "OrderedDict[int, bytes]" = OrderedDict()
+        self._pending: Dict[int, Future] = {}
+        self._last_block = -1
+        self._position = 0
+
+        response = client.head_object(Bucket=bucket, Key=key, **self._extra_args)
+        self._size = response["ContentLength"]
+        self._etag = response["ETag"]
+        self._block_size = get_chunksize(config, self._size)
+
+    @property
+    def size(self) -> int:
+        """The size of the object."""
+        return self._size
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        self._check_not_closed()
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        self._check_not_closed()
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = self._size + offset
+        else:
+            raise ValueError("Invalid whence (%s)" % whence)
+        if position < 0:
+            raise ValueError("Negative seek position %s" % position)
+        self._position = position
+        return position
+
+    def readall(self) -> bytes:
+        return self.read(max(self._size - self._position, 0))
+
+    def readinto(self, buffer: Any) -> int:
+        self._check_not_closed()
+        end = min(self._position + len(buffer), self._size)
+        if end <= self._position:
+            return 0
+        first_block = self._position // self._block_size
+        last_block = (end - 1) // self._block_size
+        # Fetch all of the blocks of the read at once, along with the blocks
+        # following them when the object is read sequentially.
+        prefetch_end = last_block
+        if first_block in (self._last_block, self._last_block + 1):
+            prefetch_end += self._read_ahead
+        # Drop the blocks fetched ahead of a previous read that was followed
+        # by a seek elsewhere.
+        for index in list(self._pending):
+            if not first_block <= index <= prefetch_end:
+                self._pending.pop(index).cancel()
+        for index in range(first_block, prefetch_end + 1):
+            self._schedule_block(index)
+
+        view = memoryview(buffer)
+        written = 0
+        for index in range(first_block, last_block + 1):
+            block = self._get_block(index)
+            start = self._position + written - index * self._block_size
+            size = min(len(block) - start, end - self._position - written)
+            view[written : written + size] = block[start : start + size]
+            written += size
+        self._position += written
+        self._last_block = last_block
+        return written
+
+    def close(self) -> None:
+        if self._executor is not None:
+            for future in self._pending.values():
+                future.cancel()
+            self._executor.shutdown(wait=False)
+        self._pending.clear()
+        self._cache.clear()
+        super().close()
+
+    def _check_not_closed(self) -> None:
+        if self.closed:
+            raise ValueError("I/O operation on closed file.")
+
+    def _schedule_block(self, index: int) -> None:
+        if self._executor is None or index * self._block_size >= self._size:
+            return
+        if index in self._cache or index in self._pending:
+            return
+        self._pending[index] = self._executor.submit(self._fetch_block, index)
+
+    def _get_block(self, index: int) -> bytes:
+        block = self._cache.get(index)
+        if block is not None:
+            self._cache.move_to_end(index)
+            return block
+        future = self._pending.pop(index, None)
+        if future is None:
+            block = self._fetch_block(index)
+        else:
+            block = future.result()
+        self._cache[index] = block
+        while len(self._cache) > self._max_cached_blocks:
+            self._cache.popitem(last=False)
+        return block
+
+    def _fetch_block(self, index: int) -> bytes:
+        start = index * self._block_size
+        end = min(start + self._block_size, self._size) - 1
+        last_exception: Any = None
+        for _ in range(self._num_attempts):
+            try:
+                response = self._client.get_object(
+                    Bucket=self._bucket,
+                    Key=self._key,
+                    Range="bytes=%s-%s" % (start, end),
+                    IfMatch=self._etag,
+                    **self._extra_args,
+                )
+                return response["Body"].read()
+            # Errors while streaming the body are not retried by botocore.
+            except S3_RETRYABLE_DOWNLOAD_ERRORS as e:
+                last_exception = e
+        raise RetriesExceededError(last_exception)
+
+
+class S3ObjectWriter(io.RawIOBase):
+    """A write-only file-like object streaming its data to an S3 object
+
+    The data is uploaded by a transfer manager of the writer's own while
+    it is written, using a multipart upload once it exceeds
+    ``multipart_threshold``. Writes block while one part of data is waiting
+    to be read by the transfer manager, which itself holds at most
+    ``max_in_memory_upload_chunks`` parts in memory, so memory use does not
+    grow with the size of the object. The object is only created once the writer is closed. If it
+    is used as a context manager and an exception is raised, or if it is
+    garbage collected without being closed, the upload is aborted instead.
+
+    :type client: boto3.client
+    :param client: The S3 client to use
+
+    :type bucket: str
+    :param bucket: The name of the bucket of the object.
+
+    :type key: str
+    :param key: The key of the object.
+
+    :type extra_args: dict
+    :param extra_args: Extra arguments that may be passed to the client
+        operations, the same as for uploads.
+
+    :type config: boto3.s3.transfer.TransferConfig
+    :param config: The transfer configuration to be used when uploading.
+        If ``use_threads`` is False, the data is spooled to a temporary
+        file and uploaded when the writer is closed.
+    """
+
+    def __init__(
+        self,
+        client: BaseClient,
+        bucket: str,
+        key: str,
+        extra_args: Optional[Dict[str, Any]] = None,
+        config: Optional[TransferConfig] = None,
+    ) -> None:
+        super().__init__()
+        self._spool: Optional[IO[bytes]] = None
+        self._future: Any = None
+        if config is None:
+            config = TransferConfig()
+        # The upload holds a submission thread of its manager until the
+        # writer is closed, so it cannot share the manager of the client.
+        self._manager = create_transfer_manager(client, config)
+        self._bucket = bucket
+        self._key = key
+        self._extra_args = extra_args
+        self._chunk_size = config.io_chunksize
+        self._buffer = bytearray()
+        if not config.use_threads:
+            # The upload would run in this thread and wait on data that
+            # this thread has not written yet.
+            self._spool = tempfile.TemporaryFile()
+            return
+
+        max_chunks = max(get_chunksize(config) // self._chunk_size, 1)
+        self._chunks: "queue.Queue[Any]" = queue.Queue(max_chunks)
+        self._upload_done = _UploadDoneSubscriber(self._chunks)
+        self._reader = _QueueReader(self._chunks)
+        fileobj = io.BufferedReader(self._reader)
+        self._future = self._manager.upload(
+            fileobj, bucket, key, extra_args, [self._upload_done]
+        )
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        self._check_not_closed()
+        size = memoryview(data).nbytes
+        if self._spool is not None:
+            self._spool.write(data)
+            return size
+        self._buffer += data
+        while len(self._buffer) >= self._chunk_size:
+            chunk = bytes(self._buffer[: self._chunk_size])
+            del self._buffer[: self._chunk_size]
+            self._send(chunk)
+        return size
+
+    def close(self) -> None:
+        """Complete the upload, creating the object."""
+        if self.closed:
+            return
+        try:
+            if self._spool is not None:
+                with self._spool:
+                    self._spool.seek(0)
+                    future = self._manager.upload(
+                        self._spool, self._bucket, self._key, self._extra_args
+                    )
+                    future.result()
+            else:
+                if self._buffer:
+                    self._send(bytes(self._buffer))
+                    self._buffer.clear()
+                self._chunks.put(None)
+                self._future.result()
+        finally:
+            self._shutdown_manager()
+            super().close()
+
+    def abort(self) -> None:
+        """Abort the upload, discarding the data written so far."""
+        if self.closed:
+            return
+        try:
+            if self._spool is not None:
+                self._spool.close()
+            elif self._future is not None:
+                self._future.cancel()
+                # Make room for the error if the queue is full, then fail
+                # the read the upload is waiting on so it aborts.
+                _drain(self._chunks)
+                self._chunks.put(CancelledError("Upload aborted"))
+                try:
+                    self._future.result()
+                except Exception:
+                    pass
+        finally:
+            self._shutdown_manager()
+            super().close()
+
+    def __exit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+    def __del__(self) -> None:
+        # Never create an object from data that was not explicitly
+        # completed with close().
+        self.abort()
+
+    def _check_not_closed(self) -> None:
+        if self.closed:
+            raise ValueError("I/O operation on closed file.")
+
+    def _shutdown_manager(self) -> None:
+        # The manager is missing if creating it failed.
+        if hasattr(self, "_manager"):
+            self._manager.shutdown()
+
+    def _send(self, chunk: bytes) -> None:
+        try:
+            self._chunks.put(
+                chunk, timeout=None if self._reader.started else UPLOAD_START_TIMEOUT
+            )
+        except queue.Full:
+            if not self._reader.started:
+                raise S3UploadFailedError(
+                    "Upload of %s did not start within %s seconds"
+                    % (self._key, UPLOAD_START_TIMEOUT)
+                )
+            self._chunks.put(chunk)
+        if self._upload_done.done.is_set():
+            # The upload stopped reading before all of the data was
+            # written, which only happens when it failed.
+            self._future.result()
+            raise ValueError("Upload of %s completed before the end of the data" % self._key)
+
+
+class _QueueReader(io.RawIOBase):
+    """A readable stream of the chunks put in a queue by a writer
+
+    A chunk of None marks the end of the stream and an exception is raised
+    to the reader.
+    """
+
+    def __init__(self, chunks: "queue.Queue[Any]") -> None:
+        self._chunks = chunks
+        self._pending = memoryview(b"")
+        self._finished = False
+        self.started = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        self.started = True
+        while not self._pending:
+            if self._finished:
+                return 0
+            chunk = self._chunks.get()
+            if chunk is None:
+                self._finished = True
+                return 0
+            if isinstance(chunk, Exception):
+                raise chunk
+            self._pending = memoryview(chunk)
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+class _UploadDoneSubscriber(BaseSubscriber):
+    """Unblocks a writer waiting to queue chunks once the upload is done"""
+
+    def __init__(self, chunks: "queue.Queue[Any]") -> None:
+        self._chunks = chunks
+        self.done = threading.Event()
+
+    def on_done(self, future: Any, **kwargs: Any) -> None:
+        self.done.set()
+        _drain(self._chunks)
+
+
+def _drain(chunks: "queue.Queue[Any]") -> None:
+    while True:
+        try:
+            chunks.get_nowait()
+        except queue.Empty:
+            return
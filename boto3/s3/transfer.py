@@ -121,25 +121,105 @@ transfer.  For example:
     transfer.upload_file('/tmp/foo', 'bucket', 'key')
 
 
+Whole directories can be transferred with ``upload_directory`` and
+``download_prefix``, which submit all of the files to the same transfer
+manager and raise a single error listing every failed transfer:
+
+.. code-block:: python
+
+    transfer.upload_directory('/tmp/logs', 'bucket', prefix='logs',
+                              exclude=['*.tmp'])
+    transfer.download_prefix('bucket', 'logs', '/tmp/restored')
+
+
 """
-from typing import Any, Callable, Dict, List, Optional
+import copy
+import fnmatch
+import hashlib
+import math
+import mmap
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 from botocore.client import BaseClient
 from botocore.exceptions import ClientError
+from s3transfer.copies import CopyObjectTask, CopyPartTask
+from s3transfer.download import GetObjectTask
 from s3transfer.exceptions import RetriesExceededError as S3TransferRetriesExceededError
-from s3transfer.futures import NonThreadedExecutor
+from s3transfer.futures import NonThreadedExecutor, TransferCoordinator
 from s3transfer.manager import TransferConfig as S3TransferConfig
 from s3transfer.manager import TransferManager
 from s3transfer.subscribers import BaseSubscriber
-from s3transfer.utils import OSUtils
+from s3transfer.upload import PutObjectTask, UploadPartTask
+from s3transfer.utils import S3_RETRYABLE_DOWNLOAD_ERRORS, ChunksizeAdjuster, OSUtils, rename_file
 
-from boto3.exceptions import RetriesExceededError, S3UploadFailedError
+from boto3.exceptions import RetriesExceededError, S3BulkTransferFailedError, S3UploadFailedError
 
 KB = 1024
 MB = KB * KB
 
 ProgressCallbackType = Callable[[int], None]
 
+# Name of the client attribute holding the transfer managers that are
+# reused across the managed transfer methods injected onto the client.
+TRANSFER_MANAGERS_ATTR = "_boto3_transfer_managers"
+
+# The maximum number of transfer managers reused for a client. The least
+# recently used one is shut down when a manager for another configuration
+# is needed.
+MAX_TRANSFER_MANAGERS = 8
+
+_transfer_managers_lock = threading.Lock()
+
+
+def _reset_transfer_managers_lock() -> None:
+    # The lock may have been held by another thread of the parent when
+    # the process was forked, and that thread does not exist in the child.
+    global _transfer_managers_lock
+    _transfer_managers_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_transfer_managers_lock)
+
+# The default number of transfers of a directory or prefix that are
+# submitted to the transfer manager at a time.
+MAX_IN_FLIGHT_TRANSFERS = 1000
+
+# The size of the blocks read from a file when computing its ETag.
+HASH_BLOCK_SIZE = 1 * MB
+
+# The value of the TransferConfig options that are tuned for each transfer
+# instead of being fixed.
+AUTO = "auto"
+
+# The number of parts an object is split into when its chunksize is picked
+# automatically, unless that makes the parts smaller than the minimum.
+AUTO_NUM_PARTS = 1000
+AUTO_MIN_CHUNKSIZE = 8 * MB
+
+# The number of parts transferred at a time when the concurrency is tuned
+# automatically starts at the initial value and never exceeds the maximum,
+# which is also the number of threads making requests.
+AUTO_INITIAL_CONCURRENCY = 10
+AUTO_MAX_CONCURRENCY = 64
+
+# The number of seconds the throughput is measured over before the
+# concurrency is adjusted, and the relative change in throughput that is
+# acted upon.
+AUTO_ADJUST_INTERVAL = 1.0
+AUTO_THROUGHPUT_TOLERANCE = 0.05
+
+# The tasks of the transfer manager that send or receive the data of a
+# transfer, which are limited when the concurrency is tuned automatically.
+# Every task submitted to the request executor counts as a request.
+_PART_TASKS = (PutObjectTask, UploadPartTask, GetObjectTask, CopyObjectTask, CopyPartTask)
+
 
 def create_transfer_manager(
     client: BaseClient, config: "TransferConfig", osutil: Optional[OSUtils] = None
@@ -161,24 +241,140 @@ def create_transfer_manager(
     executor_cls = None
     if not config.use_threads:
         executor_cls = NonThreadedExecutor
+    if osutil is None and getattr(config, "use_mmap", False):
+        osutil = MmapOSUtils()
+    if (
+        AUTO in (config.multipart_chunksize, getattr(config, "max_concurrency", None))
+        or config.max_bandwidth is not None
+        or getattr(config, "max_requests_per_second", None) is not None
+    ):
+        return _TunedTransferManager(client, config, osutil, executor_cls)
     return TransferManager(client, config, osutil, executor_cls)
 
 
+def get_transfer_manager(
+    client: BaseClient, config: Optional["TransferConfig"] = None
+) -> TransferManager:
+    """Gets a transfer manager that is reused for a client and configuration
+
+    The transfer manager and its thread pools are created the first time a
+    client is used with a given configuration and are kept alive until
+    :py:func:`shutdown_transfer_managers` is called. At most
+    ``MAX_TRANSFER_MANAGERS`` managers are kept per client, and the least
+    recently used one is shut down once its transfers are done when
+    another is created. Managers created before the process was forked
+    are discarded in the child process.
+
+    :type client: boto3.client
+    :param client: The S3 client to use
+
+    :type config: boto3.s3.transfer.TransferConfig
+    :param config: The transfer config to use
+
+    :rtype: s3transfer.manager.TransferManager
+    :returns: A transfer manager shared by transfers using the same client
+        and configuration
+    """
+    if config is None:
+        config = TransferConfig()
+    key = _get_config_key(config)
+    pid = os.getpid()
+    evicted = []
+    with _transfer_managers_lock:
+        cached = getattr(client, TRANSFER_MANAGERS_ATTR, None)
+        if cached is None or cached[0] != pid:
+            # The worker threads of a manager do not survive a fork, so the
+            # child starts over with its own managers.
+            cached = (pid, OrderedDict())
+            setattr(client, TRANSFER_MANAGERS_ATTR, cached)
+        managers: "OrderedDict[Tuple[Any, ...], TransferManager]" = cached[1]
+        manager = managers.get(key)
+        if manager is None:
+            # The manager reads its config lazily, so give it a copy that
+            # cannot drift away from the key it is cached under.
+            manager = create_transfer_manager(client, copy.copy(config))
+            managers[key] = manager
+            while len(managers) > MAX_TRANSFER_MANAGERS:
+                evicted.append(managers.popitem(last=False)[1])
+        else:
+            managers.move_to_end(key)
+    # Shutting down waits for the transfers of the manager, so it is done
+    # without holding the lock.
+    for evicted_manager in evicted:
+        evicted_manager.shutdown()
+    return manager
+
+
+def shutdown_transfer_managers(client: BaseClient, cancel: bool = False) -> None:
+    """Shuts down the transfer managers reused by a client
+
+    :type client: boto3.client
+    :param client: The S3 client whose transfer managers to shut down
+
+    :type cancel: boolean
+    :param cancel: If True, in-progress transfers are cancelled instead of
+        waited on.
+    """
+    with _transfer_managers_lock:
+        cached = getattr(client, TRANSFER_MANAGERS_ATTR, None)
+        setattr(client, TRANSFER_MANAGERS_ATTR, None)
+    if cached is None or cached[0] != os.getpid():
+        return
+    for manager in cached[1].values():
+        manager.shutdown(cancel)
+
+
+def get_chunksize(config: S3TransferConfig, size: Optional[int] = None) -> int:
+    """Gets the size of the parts of a transfer of an object
+
+    :type config: boto3.s3.transfer.TransferConfig
+    :param config: The transfer config to use
+
+    :type size: int
+    :param size: The size of the object, if it is known.
+
+    :rtype: int
+    :returns: ``multipart_chunksize``, or the chunksize picked from the
+        size of the object if it is set to ``AUTO``.
+    """
+    chunksize = config.multipart_chunksize
+    if chunksize != AUTO:
+        return chunksize
+    if not size:
+        return AUTO_MIN_CHUNKSIZE
+    chunksize = max(int(math.ceil(size / float(AUTO_NUM_PARTS * MB))) * MB, AUTO_MIN_CHUNKSIZE)
+    return ChunksizeAdjuster().adjust_chunksize(chunksize, size)
+
+
+def _get_config_key(config: "TransferConfig") -> Tuple[Any, ...]:
+    return tuple(sorted(vars(config).items()))
+
+
 class TransferConfig(S3TransferConfig):
     ALIAS = {
         "max_concurrency": "max_request_concurrency",
         "max_io_queue": "max_io_queue_size",
     }
 
+    # The values given to the options aliases point to when the aliases
+    # are set to AUTO.
+    AUTO_ALIAS = {
+        "max_concurrency": AUTO_MAX_CONCURRENCY,
+    }
+
     def __init__(
         self,
         multipart_threshold: int = 8 * MB,
-        max_concurrency: int = 10,
-        multipart_chunksize: int = 8 * MB,
+        max_concurrency: Union[int, str] = 10,
+        multipart_chunksize: Union[int, str] = 8 * MB,
         num_download_attempts: int = 5,
         max_io_queue: int = 100,
         io_chunksize: int = 256 * KB,
         use_threads: bool = True,
+        use_mmap: bool = False,
+        use_pwrite: bool = False,
+        max_bandwidth: Optional[int] = None,
+        max_requests_per_second: Optional[float] = None,
     ) -> None:
         """Configuration object for managed S3 transfers
 
@@ -189,10 +385,16 @@ class TransferConfig(S3TransferConfig):
         :param max_concurrency: The maximum number of threads that will be
             making requests to perform a transfer. If ``use_threads`` is
             set to ``False``, the value provided is ignored as the transfer
-            will only ever use the main thread.
+            will only ever use the main thread. If set to ``AUTO``, the
+            number of parts transferred at a time starts at
+            ``AUTO_INITIAL_CONCURRENCY`` and is adjusted, up to
+            ``AUTO_MAX_CONCURRENCY``, while it improves the measured
+            throughput. It is halved when requests are throttled or fail.
 
         :param multipart_chunksize: The partition size of each part for a
-            multipart transfer.
+            multipart transfer. If set to ``AUTO``, it is picked for each
+            transfer to split the object into ``AUTO_NUM_PARTS`` parts of at
+            least ``AUTO_MIN_CHUNKSIZE`` bytes.
 
         :param num_download_attempts: The number of download attempts that
             will be retried upon errors with downloading an object in S3.
@@ -215,31 +417,418 @@ class TransferConfig(S3TransferConfig):
         :param use_threads: If True, threads will be used when performing
             S3 transfers. If False, no threads will be used in
             performing transfers: all logic will be ran in the main thread.
+
+        :param use_mmap: If True, files uploaded by name are memory-mapped
+            and the body of each part is a ``memoryview`` slice of the
+            mapping shared by all of the parts, instead of data read from
+            a separately opened file. This avoids a copy per read and keeps
+            the file data in the page cache rather than in the process
+            memory for large parallel multipart uploads.
+
+        :param use_pwrite: If True, ``download_file`` preallocates the file
+            and the threads downloading each range write it directly at its
+            offset, instead of queueing the data to a single thread writing
+            the file. The ranges are ``multipart_chunksize`` bytes long and
+            at most ``max_concurrency`` of them are downloaded at a time.
+            This is ignored on platforms without ``os.pwrite``.
+
+        :param max_bandwidth: The maximum bandwidth that will be consumed
+            in uploading and downloading file content. The value is in terms of
+            bytes per second. It is shared by all of the transfers of a
+            transfer manager.
+
+        :param max_requests_per_second: The maximum number of requests per
+            second sent by all of the transfers of a transfer manager. Each
+            part of a multipart transfer is a request. Requests retried by
+            botocore are not counted again.
         """
         super(TransferConfig, self).__init__(
             multipart_threshold=multipart_threshold,
-            max_request_concurrency=max_concurrency,
-            multipart_chunksize=multipart_chunksize,
+            max_request_concurrency=(
+                AUTO_MAX_CONCURRENCY if max_concurrency == AUTO else max_concurrency
+            ),
+            multipart_chunksize=(
+                AUTO_MIN_CHUNKSIZE if multipart_chunksize == AUTO else multipart_chunksize
+            ),
             num_download_attempts=num_download_attempts,
             max_io_queue_size=max_io_queue,
             io_chunksize=io_chunksize,
+            max_bandwidth=max_bandwidth,
         )
         # Some of the argument names are not the same as the inherited
         # S3TransferConfig so we add aliases so you can still access the
         # old version of the names.
         for alias in self.ALIAS:
             setattr(self, alias, getattr(self, self.ALIAS[alias]))
+        # The inherited config only accepts numbers, so the options set to
+        # AUTO are set once it has validated them.
+        if max_concurrency == AUTO:
+            self.max_concurrency = AUTO
+        if multipart_chunksize == AUTO:
+            self.multipart_chunksize = AUTO
         self.use_threads = use_threads
+        self.use_mmap = use_mmap
+        self.use_pwrite = use_pwrite
+        if max_requests_per_second is not None and max_requests_per_second <= 0:
+            raise ValueError(
+                "Provided parameter max_requests_per_second of value %s must be "
+                "greater than 0." % max_requests_per_second
+            )
+        self.max_requests_per_second = max_requests_per_second
 
     def __setattr__(self, name: str, value: Any) -> None:
         # If the alias name is used, make sure we set the name that it points
         # to as that is what actually is used in governing the TransferManager.
         if name in self.ALIAS:
-            super(TransferConfig, self).__setattr__(self.ALIAS[name], value)
+            actual_value = value
+            if value == AUTO and name in self.AUTO_ALIAS:
+                # The transfer manager needs a number to create its threads.
+                actual_value = self.AUTO_ALIAS[name]
+            super(TransferConfig, self).__setattr__(self.ALIAS[name], actual_value)
         # Always set the value of the actual name provided.
         super(TransferConfig, self).__setattr__(name, value)
 
 
+class MmapOSUtils(OSUtils):
+    """OS utilities reading the files to upload through memory maps
+
+    A file opened for reading is mapped once and shared by all of the
+    parts opened while it is in use. Reads return ``memoryview`` slices of
+    the mapping rather than copies of the data.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._lock = threading.Lock()
+        self._mappings: "weakref.WeakValueDictionary[Tuple[str, int, int], mmap.mmap]" = (
+            weakref.WeakValueDictionary()
+        )
+
+    def open(self, filename: str, mode: str) -> Any:
+        if mode != "rb":
+            return super().open(filename, mode)
+        stat = os.stat(filename)
+        # Empty files cannot be mapped.
+        if not stat.st_size:
+            return super().open(filename, mode)
+        # A file that changed gets a new mapping, as reopening it would.
+        key = (os.path.abspath(filename), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            mapping = self._mappings.get(key)
+            if mapping is None:
+                with open(filename, "rb") as f:
+                    mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._mappings[key] = mapping
+        return _MemoryViewFile(memoryview(mapping))
+
+
+class _MemoryViewFile:
+    """A read-only file-like object returning slices of a memoryview"""
+
+    def __init__(self, view: memoryview) -> None:
+        self._view = view
+        self._position = 0
+
+    def read(self, amount: Optional[int] = None) -> memoryview:
+        end = len(self._view)
+        if amount is not None and amount >= 0:
+            end = min(self._position + amount, end)
+        data = self._view[self._position : max(end, self._position)]
+        self._position += len(data)
+        return data
+
+    def seek(self, position: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            position += self._position
+        elif whence == os.SEEK_END:
+            position += len(self._view)
+        self._position = max(position, 0)
+        return self._position
+
+    def tell(self) -> int:
+        return self._position
+
+    def close(self) -> None:
+        # Drop the reference keeping the mapping alive.
+        self._view = memoryview(b"")
+        self._position = 0
+
+    def __enter__(self) -> "_MemoryViewFile":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+class _TunedTransferManager(TransferManager):
+    """A transfer manager tuning and limiting its transfers from its config
+
+    Each transfer gets a view of the config with the chunksize picked from
+    the size of the object. The tasks submitted to the request executor are
+    limited by a :py:class:`_TokenBucket` of requests if the request rate is
+    limited and, if the concurrency is automatic, by an
+    :py:class:`_AdaptiveConcurrency`. This relies on the submission tasks of
+    the s3transfer versions boto3 depends on getting the config and request
+    executor from :py:meth:`_get_submission_task_main_kwargs`.
+    """
+
+    def __init__(
+        self,
+        client: BaseClient,
+        config: "TransferConfig",
+        osutil: Optional[OSUtils] = None,
+        executor_cls: Any = None,
+    ) -> None:
+        super().__init__(client, config, osutil, executor_cls)
+        self._request_limiter: Optional[_TokenBucket] = None
+        max_requests_per_second = getattr(config, "max_requests_per_second", None)
+        if max_requests_per_second is not None:
+            self._request_limiter = _TokenBucket(max_requests_per_second)
+        self._concurrency: Optional[_AdaptiveConcurrency] = None
+        if getattr(config, "max_concurrency", None) == AUTO and config.use_threads:
+            self._concurrency = _AdaptiveConcurrency(config.max_request_concurrency)
+            # Throttled requests are retried by botocore, which is the only
+            # place they can be seen.
+            client.meta.events.register(
+                "needs-retry.s3", self._concurrency.on_needs_retry, unique_id=self._handler_id
+            )
+
+    @property
+    def bandwidth_limiter(self) -> Any:
+        """The limiter of the bandwidth shared by the transfers, if any"""
+        return self._bandwidth_limiter
+
+    @property
+    def request_limiter(self) -> Optional["_TokenBucket"]:
+        """The limiter of the requests sent by the transfers, if any"""
+        return self._request_limiter
+
+    @property
+    def _handler_id(self) -> str:
+        return "boto3-adaptive-concurrency-%s" % id(self)
+
+    def _get_submission_task_main_kwargs(
+        self, transfer_future: Any, extra_main_kwargs: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        main_kwargs = super()._get_submission_task_main_kwargs(transfer_future, extra_main_kwargs)
+        main_kwargs["config"] = _TransferSizedConfig(self._config, transfer_future.meta)
+        if self._request_limiter is not None or self._concurrency is not None:
+            main_kwargs["request_executor"] = _LimitedRequestExecutor(
+                main_kwargs["request_executor"], self._request_limiter, self._concurrency
+            )
+        if self._concurrency is not None:
+            call_args = transfer_future.meta.call_args
+            call_args.subscribers = list(call_args.subscribers) + [self._concurrency]
+        return main_kwargs
+
+    def _shutdown(self, *args: Any, **kwargs: Any) -> None:
+        super()._shutdown(*args, **kwargs)
+        if self._concurrency is not None:
+            self._client.meta.events.unregister(
+                "needs-retry.s3", self._concurrency.on_needs_retry, unique_id=self._handler_id
+            )
+
+
+class _TransferSizedConfig:
+    """The config of a transfer with the chunksize picked from its size"""
+
+    def __init__(self, config: S3TransferConfig, meta: Any) -> None:
+        self._config = config
+        self._meta = meta
+
+    @property
+    def multipart_chunksize(self) -> int:
+        # The submission task looks the size up before reading this.
+        return get_chunksize(self._config, self._meta.size)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._config, name)
+
+
+class _AdaptiveConcurrency(BaseSubscriber):
+    """Limits the number of parts in flight to a value tuned at runtime
+
+    The throughput of the transfers is measured over periods of
+    ``AUTO_ADJUST_INTERVAL`` seconds. When the limit was reached during a
+    period, it is raised by one while that improves the throughput and
+    lowered by one when the throughput drops. Throttled and failed requests
+    halve the limit, at most once per period.
+
+    :param max_limit: The highest the limit can be raised to.
+    """
+
+    def __init__(self, max_limit: int, clock: Callable[[], float] = time.monotonic) -> None:
+        self.limit = min(AUTO_INITIAL_CONCURRENCY, max_limit)
+        self._max_limit = max_limit
+        self._clock = clock
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._saturated = False
+        self._period_start = clock()
+        self._period_bytes = 0
+        self._last_throughput: Optional[float] = None
+        self._last_decrease: Optional[float] = None
+
+    def acquire(self) -> None:
+        with self._condition:
+            while self._in_flight >= self.limit:
+                self._saturated = True
+                self._condition.wait()
+            self._in_flight += 1
+            if self._in_flight >= self.limit:
+                self._saturated = True
+
+    def release(self) -> None:
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify()
+
+    def on_progress(self, future: Any, bytes_transferred: int, **kwargs: Any) -> None:
+        self.add_bytes(bytes_transferred)
+
+    def add_bytes(self, amount: int) -> None:
+        with self._condition:
+            self._period_bytes += amount
+            now = self._clock()
+            elapsed = now - self._period_start
+            if elapsed < AUTO_ADJUST_INTERVAL:
+                return
+            if self._saturated:
+                self._adjust(self._period_bytes / elapsed)
+            self._start_period(now)
+
+    def add_error(self) -> None:
+        with self._condition:
+            now = self._clock()
+            if self._last_decrease is not None:
+                if now - self._last_decrease < AUTO_ADJUST_INTERVAL:
+                    return
+            self._last_decrease = now
+            self._set_limit(self.limit // 2)
+            # The throughput measured before is no longer a reference.
+            self._last_throughput = None
+            self._start_period(now)
+
+    def on_needs_retry(
+        self, response: Any = None, caught_exception: Any = None, **kwargs: Any
+    ) -> None:
+        if caught_exception is not None:
+            self.add_error()
+        elif response is not None:
+            status_code = response[0].status_code
+            # SlowDown is a 503, the other codes show an overloaded service.
+            if status_code == 429 or status_code >= 500:
+                self.add_error()
+
+    def _adjust(self, throughput: float) -> None:
+        last_throughput = self._last_throughput
+        if last_throughput is None or throughput > last_throughput * (
+            1 + AUTO_THROUGHPUT_TOLERANCE
+        ):
+            self._set_limit(self.limit + 1)
+        elif throughput < last_throughput * (1 - AUTO_THROUGHPUT_TOLERANCE):
+            self._set_limit(self.limit - 1)
+        self._last_throughput = throughput
+
+    def _set_limit(self, limit: int) -> None:
+        self.limit = max(1, min(limit, self._max_limit))
+        self._condition.notify_all()
+
+    def _start_period(self, now: float) -> None:
+        self._period_start = now
+        self._period_bytes = 0
+        self._saturated = self._in_flight >= self.limit
+
+
+class _TokenBucket:
+    """A token bucket shared by the threads of a transfer manager
+
+    Tokens are added at ``rate`` per second, up to a second's worth of them.
+    A consumer finding the bucket empty takes its tokens anyway and sleeps
+    until they would have been added, so consumers are served in the order
+    they arrived.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self._rate = rate
+        self._capacity = max(rate, 1)
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = float(self._capacity)
+        self._last_refill = clock()
+
+    def consume(self, amount: float = 1) -> None:
+        with self._lock:
+            now = self._clock()
+            self._tokens += (now - self._last_refill) * self._rate
+            self._tokens = min(self._tokens, self._capacity) - amount
+            self._last_refill = now
+            delay = -self._tokens / self._rate
+        if delay > 0:
+            self._sleep(delay)
+
+
+class _LimitedRequestExecutor:
+    """Wraps a request executor to limit the requests of its tasks
+
+    Every task waits for a request token. Only the tasks transferring data
+    are limited by the concurrency: the tasks creating and completing
+    multipart uploads wait on the parts, so they must not hold up the parts
+    by taking their place.
+    """
+
+    def __init__(
+        self,
+        executor: Any,
+        request_limiter: Optional[_TokenBucket],
+        concurrency: Optional[_AdaptiveConcurrency],
+    ) -> None:
+        self._executor = executor
+        self._request_limiter = request_limiter
+        self._concurrency = concurrency
+
+    def submit(self, task: Any, tag: Any = None, block: bool = True) -> Any:
+        concurrency = self._concurrency if isinstance(task, _PART_TASKS) else None
+        if self._request_limiter is not None or concurrency is not None:
+            task = _LimitedTask(task, self._request_limiter, concurrency)
+        return self._executor.submit(task, tag=tag, block=block)
+
+
+class _LimitedTask:
+    def __init__(
+        self,
+        task: Any,
+        request_limiter: Optional[_TokenBucket],
+        concurrency: Optional[_AdaptiveConcurrency],
+    ) -> None:
+        self._task = task
+        self._request_limiter = request_limiter
+        self._concurrency = concurrency
+
+    def __call__(self) -> Any:
+        # Wait for the request token first so that the part does not keep
+        # another one from running in the meantime.
+        if self._request_limiter is not None:
+            self._request_limiter.consume()
+        if self._concurrency is None:
+            return self._task()
+        self._concurrency.acquire()
+        try:
+            return self._task()
+        finally:
+            self._concurrency.release()
+
+    def __getattr__(self, name: str) -> Any:
+        # The executor reads attributes such as the transfer id of the task.
+        return getattr(self._task, name)
+
+
 class S3Transfer:
     ALLOWED_DOWNLOAD_ARGS = TransferManager.ALLOWED_DOWNLOAD_ARGS
     ALLOWED_UPLOAD_ARGS = TransferManager.ALLOWED_UPLOAD_ARGS
@@ -262,7 +851,7 @@ class S3Transfer:
             )
         if config is None:
             config = TransferConfig()
-        if osutil is None:
+        if osutil is None and not getattr(config, "use_mmap", False):
             osutil = OSUtils()
         if manager:
             self._manager = manager
@@ -301,6 +890,11 @@ class S3Transfer:
             raise S3UploadFailedError(
                 "Failed to upload %s to %s: %s" % (filename, "/".join([bucket, key]), e)
             )
+        # The manager may be shared with other transfers, so an interrupted
+        # transfer is cancelled rather than left running.
+        except BaseException:
+            future.cancel()
+            raise
 
     def download_file(
         self,
@@ -322,6 +916,11 @@ class S3Transfer:
         if not isinstance(filename, str):
             raise ValueError("Filename must be a string")
 
+        config = self._manager.config
+        if isinstance(config, TransferConfig) and config.use_pwrite and hasattr(os, "pwrite"):
+            _PwriteDownload(self._manager, bucket, key, filename, extra_args, callback).run()
+            return
+
         subscribers = self._get_subscribers(callback)
         future = self._manager.download(bucket, key, filename, extra_args, subscribers)
         try:
@@ -333,6 +932,193 @@ class S3Transfer:
         # their own retries.
         except S3TransferRetriesExceededError as e:
             raise RetriesExceededError(e.last_exception)
+        except BaseException:
+            future.cancel()
+            raise
+
+    def upload_directory(
+        self,
+        directory: str,
+        bucket: str,
+        prefix: str = "",
+        include: Optional[List[str]] = None,
+        exclude: Optional[List[str]] = None,
+        extra_args: Optional[Dict[str, Any]] = None,
+        callback: Optional[ProgressCallbackType] = None,
+        max_in_flight: int = MAX_IN_FLIGHT_TRANSFERS,
+    ) -> None:
+        """Upload the files of a local directory to S3 objects.
+
+        Files are uploaded to keys made of ``prefix`` and their path
+        relative to ``directory``. The directory is walked lazily and at
+        most ``max_in_flight`` uploads are submitted at a time, so the
+        memory used does not grow with the number of files.
+
+        :param include: Glob patterns of the relative paths to upload. If
+            not provided, every file is uploaded.
+
+        :param exclude: Glob patterns of the relative paths to skip.
+
+        :param callback: A method which takes a number of bytes transferred,
+            called with the progress of all the uploads.
+
+        :raises S3BulkTransferFailedError: If any of the uploads failed,
+            once all of the other uploads have completed.
+        """
+        if not isinstance(directory, str):
+            raise ValueError("Directory must be a string")
+
+        key_prefix = _get_key_prefix(prefix)
+        files = (
+            (filename, key_prefix + path)
+            for filename, path in _iter_directory_files(directory)
+            if _matches_filters(path, include, exclude)
+        )
+        self._upload_files(files, bucket, extra_args, callback, max_in_flight)
+
+    def sync(
+        self,
+        local_dir: str,
+        bucket: str,
+        prefix: str = "",
+        include: Optional[List[str]] = None,
+        exclude: Optional[List[str]] = None,
+        compare_checksums: bool = False,
+        extra_args: Optional[Dict[str, Any]] = None,
+        callback: Optional[ProgressCallbackType] = None,
+        max_in_flight: int = MAX_IN_FLIGHT_TRANSFERS,
+        hash_workers: Optional[int] = None,
+    ) -> None:
+        """Upload the files of a local directory that differ from S3.
+
+        The objects under ``prefix`` are listed while the directory is
+        walked. A file is uploaded when there is no object for it, when
+        its size differs, or when it was modified after the object.
+
+        :param compare_checksums: If True, files with the same size as
+            their object are compared by ETag instead of modification time.
+            The ETags are computed in a pool of ``hash_workers`` threads.
+            Objects encrypted with SSE-KMS or SSE-C do not have MD5 based
+            ETags and are always uploaded in this mode.
+
+        :param include: Glob patterns of the relative paths to sync. If
+            not provided, every file is synced.
+
+        :param exclude: Glob patterns of the relative paths to skip.
+
+        :param callback: A method which takes a number of bytes transferred,
+            called with the progress of all the uploads.
+
+        :raises S3BulkTransferFailedError: If any of the uploads failed,
+            once all of the other uploads have completed.
+        """
+        if not isinstance(local_dir, str):
+            raise ValueError("Directory must be a string")
+
+        key_prefix = _get_key_prefix(prefix)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            listing = executor.submit(self._list_objects, bucket, key_prefix)
+            local_files = []
+            for filename, path in _iter_directory_files(local_dir):
+                if _matches_filters(path, include, exclude):
+                    stat = os.stat(filename)
+                    key = key_prefix + path
+                    local_files.append((filename, key, stat.st_size, stat.st_mtime))
+            objects = listing.result()
+
+        files = _iter_changed_files(
+            local_files, objects, compare_checksums, self._manager.config, hash_workers
+        )
+        self._upload_files(files, bucket, extra_args, callback, max_in_flight)
+
+    def download_prefix(
+        self,
+        bucket: str,
+        prefix: str,
+        directory: str,
+        include: Optional[List[str]] = None,
+        exclude: Optional[List[str]] = None,
+        extra_args: Optional[Dict[str, Any]] = None,
+        callback: Optional[ProgressCallbackType] = None,
+        max_in_flight: int = MAX_IN_FLIGHT_TRANSFERS,
+    ) -> None:
+        """Download the S3 objects under a prefix to a local directory.
+
+        Objects are downloaded to their key relative to ``prefix`` under
+        ``directory``. The objects are listed while the downloads are
+        running and at most ``max_in_flight`` downloads are submitted at a
+        time.
+
+        :param include: Glob patterns of the relative keys to download. If
+            not provided, every object is downloaded.
+
+        :param exclude: Glob patterns of the relative keys to skip.
+
+        :param callback: A method which takes a number of bytes transferred,
+            called with the progress of all the downloads.
+
+        :raises S3BulkTransferFailedError: If any of the downloads failed,
+            once all of the other downloads have completed.
+        """
+        if not isinstance(directory, str):
+            raise ValueError("Directory must be a string")
+
+        key_prefix = _get_key_prefix(prefix)
+        root = os.path.abspath(directory)
+        tracker = _BulkTransferTracker(max_in_flight)
+        subscribers = [tracker] + self._get_subscribers(callback)
+        paginator = self._manager.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=bucket, Prefix=key_prefix):
+            for obj in page.get("Contents", []):
+                key = obj["Key"]
+                path = key[len(key_prefix) :]
+                # Keys ending with a slash are folder placeholders.
+                if not path or path.endswith("/"):
+                    continue
+                if not _matches_filters(path, include, exclude):
+                    continue
+                filename = os.path.abspath(os.path.join(root, *path.split("/")))
+                if not filename.startswith(root + os.sep):
+                    tracker.add_failure(
+                        key, ValueError("Key %s is outside of directory %s" % (key, directory))
+                    )
+                    continue
+                try:
+                    os.makedirs(os.path.dirname(filename), exist_ok=True)
+                except OSError as e:
+                    tracker.add_failure(key, e)
+                    continue
+                tracker.acquire()
+                self._manager.download(bucket, key, filename, extra_args, subscribers)
+        tracker.wait()
+
+    def _upload_files(
+        self,
+        files: Iterable[Tuple[str, str]],
+        bucket: str,
+        extra_args: Optional[Dict[str, Any]],
+        callback: Optional[ProgressCallbackType],
+        max_in_flight: int,
+    ) -> None:
+        tracker = _BulkTransferTracker(max_in_flight)
+        subscribers = [tracker] + self._get_subscribers(callback)
+        for filename, key in files:
+            tracker.acquire()
+            self._manager.upload(filename, bucket, key, extra_args, subscribers)
+        tracker.wait()
+
+    def _list_objects(self, bucket: str, prefix: str) -> Dict[str, Tuple[int, float, str]]:
+        # The size, modification time and unquoted ETag of each object.
+        objects = {}
+        paginator = self._manager.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+            for obj in page.get("Contents", []):
+                objects[obj["Key"]] = (
+                    obj["Size"],
+                    obj["LastModified"].timestamp(),
+                    obj["ETag"].strip('"'),
+                )
+        return objects
 
     @staticmethod
     def _get_subscribers(
@@ -361,3 +1147,306 @@ class ProgressCallbackInvoker(BaseSubscriber):
 
     def on_progress(self, future: Any, bytes_transferred: int, **kwargs: Any) -> None:
         self._callback(bytes_transferred)
+
+
+class _PwriteDownload:
+    """Downloads an object to a file by writing each range at its offset
+
+    The ranges are written to a preallocated temporary file that is renamed
+    to the final filename once all of them are downloaded, as with the
+    transfer manager.
+    """
+
+    def __init__(
+        self,
+        manager: TransferManager,
+        bucket: str,
+        key: str,
+        filename: str,
+        extra_args: Optional[Dict[str, Any]],
+        callback: Optional[ProgressCallbackType],
+    ) -> None:
+        self._client = manager.client
+        self._config = config = manager.config
+        # Share the limits of the transfers of the manager.
+        self._bandwidth_limiter = getattr(manager, "bandwidth_limiter", None)
+        self._request_limiter = getattr(manager, "request_limiter", None)
+        self._coordinator = TransferCoordinator()
+        self._bucket = bucket
+        self._key = key
+        self._filename = filename
+        self._extra_args = validate_extra_args(extra_args, TransferManager.ALLOWED_DOWNLOAD_ARGS)
+        self._callback = callback
+        self._etag: Optional[str] = None
+        self._concurrency: Optional[_AdaptiveConcurrency] = None
+        if config.max_concurrency == AUTO:
+            self._concurrency = _AdaptiveConcurrency(config.max_request_concurrency)
+
+    def run(self) -> None:
+        self._wait_for_request()
+        response = self._client.head_object(Bucket=self._bucket, Key=self._key, **self._extra_args)
+        size = response["ContentLength"]
+        # Pin the ranges to the version of the object that was sized.
+        self._etag = response["ETag"]
+        chunksize = get_chunksize(self._config, size)
+        ranges = [(start, min(start + chunksize, size) - 1) for start in range(0, size, chunksize)]
+
+        temp_filename = OSUtils().get_temp_filename(self._filename)
+        fd = os.open(temp_filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+        try:
+            _preallocate(fd, size)
+            if self._config.use_threads and len(ranges) > 1:
+                self._download_ranges_in_threads(fd, ranges)
+            else:
+                for start, end in ranges:
+                    self._download_range(fd, start, end)
+        except BaseException:
+            os.close(fd)
+            OSUtils().remove_file(temp_filename)
+            raise
+        os.close(fd)
+        rename_file(temp_filename, self._filename)
+
+    def _download_ranges_in_threads(self, fd: int, ranges: List[Tuple[int, int]]) -> None:
+        executor = ThreadPoolExecutor(max_workers=self._config.max_request_concurrency)
+        futures = [executor.submit(self._download_range, fd, start, end) for start, end in ranges]
+        try:
+            for future in futures:
+                future.result()
+        except BaseException as e:
+            # Stop the ranges waiting on the bandwidth limit.
+            self._coordinator.set_exception(e)
+            raise
+        finally:
+            # Do not start the remaining ranges after a failure.
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    def _download_range(self, fd: int, start: int, end: int) -> None:
+        if self._concurrency is None:
+            self._download_range_attempts(fd, start, end)
+            return
+        self._concurrency.acquire()
+        try:
+            self._download_range_attempts(fd, start, end)
+        finally:
+            self._concurrency.release()
+
+    def _download_range_attempts(self, fd: int, start: int, end: int) -> None:
+        last_exception: Any = None
+        for _ in range(self._config.num_download_attempts):
+            offset = start
+            try:
+                self._wait_for_request()
+                response = self._client.get_object(
+                    Bucket=self._bucket,
+                    Key=self._key,
+                    Range="bytes=%s-%s" % (start, end),
+                    IfMatch=self._etag,
+                    **self._extra_args,
+                )
+                body = response["Body"]
+                if self._bandwidth_limiter is not None:
+                    body = self._bandwidth_limiter.get_bandwith_limited_stream(
+                        body, self._coordinator
+                    )
+                while True:
+                    chunk = body.read(self._config.io_chunksize)
+                    if not chunk:
+                        break
+                    _pwrite_all(fd, chunk, offset)
+                    offset += len(chunk)
+                    self._report_progress(len(chunk))
+                return
+            # Errors while streaming the body are not retried by botocore.
+            except S3_RETRYABLE_DOWNLOAD_ERRORS as e:
+                last_exception = e
+                if self._concurrency is not None:
+                    self._concurrency.add_error()
+                # Take back the progress of the range that is retried.
+                if offset > start:
+                    self._report_progress(start - offset)
+        raise RetriesExceededError(last_exception)
+
+    def _wait_for_request(self) -> None:
+        if self._request_limiter is not None:
+            self._request_limiter.consume()
+
+    def _report_progress(self, amount: int) -> None:
+        if self._concurrency is not None:
+            self._concurrency.add_bytes(amount)
+        if self._callback is not None:
+            self._callback(amount)
+
+
+class _BulkTransferTracker(BaseSubscriber):
+    """Bounds the transfers in flight and collects the failed ones
+
+    :param max_in_flight: The maximum number of transfers that may be
+        submitted and not done at a time.
+    """
+
+    def __init__(self, max_in_flight: int) -> None:
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        self._max_in_flight = max_in_flight
+        self._slots = threading.Semaphore(max_in_flight)
+        self._lock = threading.Lock()
+        self._failures: Dict[str, Exception] = {}
+
+    def acquire(self) -> None:
+        self._slots.acquire()
+
+    def add_failure(self, key: str, exception: Exception) -> None:
+        with self._lock:
+            self._failures[key] = exception
+
+    def on_done(self, future: Any, **kwargs: Any) -> None:
+        try:
+            future.result()
+        except Exception as e:
+            self.add_failure(future.meta.call_args.key, e)
+        finally:
+            self._slots.release()
+
+    def wait(self) -> None:
+        # All the slots are free once every submitted transfer is done.
+        for _ in range(self._max_in_flight):
+            self._slots.acquire()
+        for _ in range(self._max_in_flight):
+            self._slots.release()
+        if self._failures:
+            raise S3BulkTransferFailedError(self._failures)
+
+
+def _preallocate(fd: int, size: int) -> None:
+    if not size:
+        return
+    if hasattr(os, "posix_fallocate"):
+        try:
+            os.posix_fallocate(fd, 0, size)
+            return
+        # Not every file system supports allocating blocks up front.
+        except OSError:
+            pass
+    os.ftruncate(fd, size)
+
+
+def _pwrite_all(fd: int, data: bytes, offset: int) -> None:
+    view = memoryview(data)
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+
+
+def _get_key_prefix(prefix: str) -> str:
+    # Treat the prefix as a folder so that "photos" does not pick up the
+    # keys under "photos2/".
+    if prefix and not prefix.endswith("/"):
+        return prefix + "/"
+    return prefix
+
+
+def _iter_directory_files(directory: str) -> Iterator[Tuple[str, str]]:
+    for root, dirnames, filenames in os.walk(directory):
+        dirnames.sort()
+        for name in sorted(filenames):
+            filename = os.path.join(root, name)
+            path = os.path.relpath(filename, directory).replace(os.sep, "/")
+            yield filename, path
+
+
+def _iter_changed_files(
+    local_files: List[Tuple[str, str, int, float]],
+    objects: Dict[str, Tuple[int, float, str]],
+    compare_checksums: bool,
+    config: S3TransferConfig,
+    hash_workers: Optional[int],
+) -> Iterator[Tuple[str, str]]:
+    to_hash = []
+    for filename, key, size, mtime in local_files:
+        obj = objects.get(key)
+        if obj is None or obj[0] != size:
+            yield filename, key
+            continue
+        part_size = None
+        if compare_checksums:
+            part_size = _get_etag_part_size(obj[2], size, get_chunksize(config, size))
+        if part_size is not None:
+            to_hash.append((filename, key, part_size, obj[2]))
+        elif mtime > obj[1]:
+            yield filename, key
+    if not to_hash:
+        return
+    # The MD5 digests are updated without holding the GIL, so threads hash
+    # the files in parallel without forking while the uploads are running.
+    with ThreadPoolExecutor(max_workers=hash_workers) as pool:
+        etags = pool.map(_get_file_etag, [f[0] for f in to_hash], [f[2] for f in to_hash])
+        # The uploads of the files hashed so far are running while the
+        # remaining files are hashed.
+        for (filename, key, _, etag), file_etag in zip(to_hash, etags):
+            if file_etag != etag:
+                yield filename, key
+
+
+def _get_etag_part_size(etag: str, size: int, chunksize: int) -> Optional[int]:
+    # Returns 0 for the MD5 of a single part upload, the part size of a
+    # multipart upload, or None if the ETag cannot be computed locally.
+    if "-" not in etag:
+        return 0
+    part_size = ChunksizeAdjuster().adjust_chunksize(chunksize, size)
+    num_parts = max(int(math.ceil(size / float(part_size))), 1)
+    if etag.endswith("-%s" % num_parts):
+        return part_size
+    return None
+
+
+def _get_file_etag(filename: str, part_size: int) -> str:
+    """Computes the ETag S3 gives to an object uploaded from a file
+
+    :param part_size: The part size of the multipart upload, or 0 for a
+        single part upload.
+    """
+    with open(filename, "rb") as f:
+        if not part_size:
+            md5 = hashlib.md5()
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+                md5.update(block)
+            return md5.hexdigest()
+        part_digests = []
+        while True:
+            md5 = hashlib.md5()
+            remaining = part_size
+            while remaining:
+                block = f.read(min(remaining, HASH_BLOCK_SIZE))
+                if not block:
+                    break
+                md5.update(block)
+                remaining -= len(block)
+            if remaining == part_size:
+                break
+            part_digests.append(md5.digest())
+            if remaining:
+                break
+    md5 = hashlib.md5(b"".join(part_digests))
+    return "%s-%s" % (md5.hexdigest(), len(part_digests))
+
+
+def _matches_filters(path: str, include: Optional[List[str]], exclude: Optional[List[str]]) -> bool:
+    if include is not None and not any(fnmatch.fnmatchcase(path, p) for p in include):
+        return False
+    return not any(fnmatch.fnmatchcase(path, p) for p in exclude or [])
+
+
+def validate_extra_args(extra_args: Optional[Dict[str, Any]], allowed_args: Any) -> Dict[str, Any]:
+    if extra_args is None:
+        return {}
+    for name in extra_args:
+        if name not in allowed_args:
+            raise ValueError(
+                "Invalid extra_args key '%s', must be one of: %s"
+                % (name, ", ".join(allowed_args))
+            )
+    return dict(extra_args)
@@ -479,6 +479,11 @@ class Session:
             boto3.utils.lazy_call("boto3.dynamodb.table.register_table_methods"),
             unique_id="high-level-dynamodb-table",
         )
+        self._session.register(
+            "creating-resource-class.dynamodb.ServiceResource",
+            boto3.utils.lazy_call("boto3.dynamodb.table.register_service_resource_methods"),
+            unique_id="high-level-dynamodb-service-resource",
+        )
 
         # EC2 Customizations
         self._session.register(
@@ -26,7 +26,7 @@ class TestDynamoDBCustomizations(BaseDocsFunctionalTests):
             [
                 ".. py:class:: DynamoDB.Table(name)",
                 "  *   :py:meth:`batch_writer()`",
-                "  .. py:method:: batch_writer(overwrite_by_pkeys=None)",
+                "  .. py:method:: batch_writer(overwrite_by_pkeys=None, max_in_flight=1, max_retries=None, retry_timeout=None, adaptive_flush=False, spill_path=None)",
             ],
             self.generated_contents,
         )
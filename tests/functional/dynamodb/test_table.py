@@ -10,9 +10,12 @@
 # distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
 # ANY KIND, either express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
+from decimal import Decimal
+
 from botocore.stub import Stubber
 
 import boto3
+from boto3.dynamodb.conditions import Binding, Key
 from tests import mock, unittest
 
 
@@ -39,3 +42,114 @@ class TestTableResourceCustomizations(unittest.TestCase):
             )
 
         stubber.assert_no_pending_responses()
+
+    def test_nested_input_is_not_modified(self):
+        table = self.resource.Table("mytable")
+        stubber = Stubber(table.meta.client)
+        stubber.add_response("put_item", {})
+        item = {"pk": "foo", "nested": {"list": [1, b"bar"]}}
+
+        with stubber:
+            table.put_item(Item=item)
+
+        self.assertEqual(item, {"pk": "foo", "nested": {"list": [1, b"bar"]}})
+        stubber.assert_no_pending_responses()
+
+    def test_prepared_query(self):
+        table = self.resource.Table("mytable")
+        query = table.prepare_query(KeyConditionExpression=Key("mykey").eq(Binding("key")))
+        stubber = Stubber(table.meta.client)
+        stubber.add_response(
+            "query",
+            {"Items": [{"mykey": {"S": "foo"}}]},
+            expected_params={
+                "TableName": "mytable",
+                "KeyConditionExpression": "#n0 = :v0",
+                "ExpressionAttributeNames": {"#n0": "mykey"},
+                "ExpressionAttributeValues": {":v0": "foo"},
+            },
+        )
+
+        with stubber:
+            response = query.execute(key="foo")
+
+        self.assertEqual(response["Items"], [{"mykey": "foo"}])
+        stubber.assert_no_pending_responses()
+
+    def test_service_resource_batch_writer(self):
+        stubber = Stubber(self.resource.meta.client)
+        stubber.add_response(
+            "batch_write_item",
+            {"UnprocessedItems": {}},
+            expected_params={
+                "RequestItems": {
+                    "table1": [{"PutRequest": {"Item": {"mykey": "foo"}}}],
+                    "table2": [{"DeleteRequest": {"Key": {"mykey": "bar"}}}],
+                }
+            },
+        )
+
+        with stubber:
+            with self.resource.batch_writer() as batch:
+                batch.put_item(TableName="table1", Item={"mykey": "foo"})
+                batch.delete_item(TableName="table2", Key={"mykey": "bar"})
+
+        stubber.assert_no_pending_responses()
+
+    def test_batch_get(self):
+        table = self.resource.Table("mytable")
+        stubber = Stubber(table.meta.client)
+        stubber.add_response(
+            "batch_get_item",
+            {"Responses": {"mytable": [{"mykey": {"S": "foo"}, "other": {"N": "1"}}]}},
+            expected_params={"RequestItems": {"mytable": {"Keys": [{"mykey": "foo"}]}}},
+        )
+
+        with stubber:
+            items = list(table.batch_get([{"mykey": "foo"}, {"mykey": "foo"}]))
+
+        self.assertEqual(items, [{"mykey": "foo", "other": Decimal("1")}])
+        stubber.assert_no_pending_responses()
+
+    def test_parallel_scan(self):
+        table = self.resource.Table("mytable")
+        stubber = Stubber(table.meta.client)
+        for segment in range(2):
+            stubber.add_response(
+                "scan",
+                {"Items": [{"mykey": {"S": "foo%s" % segment}}]},
+                expected_params={"TableName": "mytable", "TotalSegments": 2, "Segment": segment},
+            )
+
+        with stubber:
+            items = list(table.parallel_scan(total_segments=2, workers=1))
+
+        self.assertEqual(items, [{"mykey": "foo0"}, {"mykey": "foo1"}])
+        stubber.assert_no_pending_responses()
+
+    def test_query_iter(self):
+        table = self.resource.Table("mytable")
+        stubber = Stubber(table.meta.client)
+        stubber.add_response(
+            "query",
+            {"Items": [{"mykey": {"S": "foo"}}], "LastEvaluatedKey": {"mykey": {"S": "foo"}}},
+            expected_params={
+                "TableName": "mytable",
+                "KeyConditionExpression": Key("mykey").eq("foo"),
+            },
+        )
+        stubber.add_response(
+            "query",
+            {"Items": [{"mykey": {"S": "foo"}}]},
+            expected_params={
+                "TableName": "mytable",
+                "KeyConditionExpression": Key("mykey").eq("foo"),
+                "ExclusiveStartKey": {"mykey": "foo"},
+            },
+        )
+
+        with stubber:
+            items = list(table.query_iter(KeyConditionExpression=Key("mykey").eq("foo")))
+
+        self.assertEqual(items, [{"mykey": "foo"}, {"mykey": "foo"}])
+        stubber.assert_no_pending_responses()
@@ -10,6 +10,9 @@
 # distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
 # ANY KIND, either express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
+import os
+import shutil
+import tempfile
 from io import BytesIO
 
 import botocore
@@ -234,6 +237,22 @@ class TestCopy(BaseTransferTest):
         self.assertEqual(self.progress_times_called, 3)
         self.assertEqual(self.progress, chunksize * 3)
 
+    def test_copy_with_auto_chunksize(self):
+        self.stub_multipart_copy(8 * (1024 ** 2), 3)
+        transfer_config = TransferConfig(
+            multipart_chunksize="auto", multipart_threshold=1, max_concurrency=1
+        )
+
+        with self.stubber:
+            self.s3.meta.client.copy(
+                Bucket=self.bucket,
+                Key=self.key,
+                CopySource=self.copy_source,
+                Config=transfer_config,
+            )
+
+        self.stubber.assert_no_pending_responses()
+
 
 class TestUploadFileobj(BaseTransferTest):
     def setUp(self):
@@ -336,6 +355,84 @@ class TestUploadFileobj(BaseTransferTest):
 
         self.stubber.assert_no_pending_responses()
 
+    def test_multipart_upload_with_auto_config(self):
+        contents = BytesIO(b"0" * (8 * (1024 ** 2)))
+        self.stub_multipart_upload(num_parts=1)
+        transfer_config = TransferConfig(
+            multipart_chunksize="auto", multipart_threshold=1, max_concurrency="auto"
+        )
+
+        with self.stubber:
+            self.s3.meta.client.upload_fileobj(
+                Fileobj=contents, Bucket=self.bucket, Key=self.key, Config=transfer_config,
+            )
+
+        self.stubber.assert_no_pending_responses()
+
+    def test_multipart_upload_with_limits(self):
+        chunksize = 8 * (1024 ** 2)
+        contents = BytesIO(b"0" * (chunksize * 3))
+        self.stub_multipart_upload(num_parts=3)
+        transfer_config = TransferConfig(
+            multipart_chunksize=chunksize,
+            multipart_threshold=1,
+            max_concurrency=1,
+            max_bandwidth=1024 ** 3,
+            max_requests_per_second=1000,
+        )
+
+        with self.stubber:
+            self.s3.meta.client.upload_fileobj(
+                Fileobj=contents, Bucket=self.bucket, Key=self.key, Config=transfer_config,
+            )
+
+        self.stubber.assert_no_pending_responses()
+
+    def test_object_open_for_writing(self):
+        self.stub_put_object()
+        obj = self.s3.Object(self.bucket, self.key)
+        with self.stubber:
+            with obj.open("wb") as f:
+                f.write(b"foo\n")
+
+        self.stubber.assert_no_pending_responses()
+
+    def test_object_open_for_writing_multipart(self):
+        chunksize = 8 * (1024 ** 2)
+        self.stub_multipart_upload(num_parts=3)
+        transfer_config = TransferConfig(
+            multipart_chunksize=chunksize, multipart_threshold=1, max_concurrency=1
+        )
+        obj = self.s3.Object(self.bucket, self.key)
+        with self.stubber:
+            with obj.open("wb", Config=transfer_config) as f:
+                for _ in range(3 * 8):
+                    f.write(b"0" * (1024 ** 2))
+
+        self.stubber.assert_no_pending_responses()
+
+    def test_mmap_multipart_upload(self):
+        chunksize = 8 * (1024 ** 2)
+        self.stub_multipart_upload(num_parts=3)
+        transfer_config = TransferConfig(
+            multipart_chunksize=chunksize,
+            multipart_threshold=1,
+            max_concurrency=1,
+            use_mmap=True,
+        )
+        tempdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tempdir)
+        filename = os.path.join(tempdir, "file")
+        with open(filename, "wb") as f:
+            f.write(b"0" * (chunksize * 3))
+
+        with self.stubber:
+            self.s3.meta.client.upload_file(
+                Filename=filename, Bucket=self.bucket, Key=self.key, Config=transfer_config,
+            )
+
+        self.stubber.assert_no_pending_responses()
+
 
 class TestDownloadFileobj(BaseTransferTest):
     def setUp(self):
@@ -11,6 +11,9 @@
 # ANY KIND, either express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
 import copy
+import threading
+
+import mock
 
 from boto3.dynamodb.conditions import (
     And,
@@ -615,12 +618,110 @@ class TestConditionExpressionBuilder(unittest.TestCase):
             {":v0": "foo"},
         )
 
+    def test_build_nested_attr_reuses_name_placeholders(self):
+        a = Attr("MyMap.MyList[2].MyElement")
+        a2 = Attr("MyMap.MyOther")
+        self.assert_condition_expression_build(
+            a.eq("foo") & a2.exists(),
+            "(#n0.#n1[2].#n2 = :v0 AND attribute_exists(#n0.#n3))",
+            {"#n0": "MyMap", "#n1": "MyList", "#n2": "MyElement", "#n3": "MyOther"},
+            {":v0": "foo"},
+        )
+
     def test_build_double_nested_and_or(self):
         a = Attr("myattr")
         a2 = Attr("myattr2")
         self.assert_condition_expression_build(
             (a.eq("foo") & a2.eq("foo2")) | (a.eq("bar") & a2.eq("bar2")),
-            "((#n0 = :v0 AND #n1 = :v1) OR (#n2 = :v2 AND #n3 = :v3))",
-            {"#n0": "myattr", "#n1": "myattr2", "#n2": "myattr", "#n3": "myattr2"},
+            "((#n0 = :v0 AND #n1 = :v1) OR (#n0 = :v2 AND #n1 = :v3))",
+            {"#n0": "myattr", "#n1": "myattr2"},
             {":v0": "foo", ":v1": "foo2", ":v2": "bar", ":v3": "bar2"},
         )
+
+    def test_build_same_shape_rebinds_values(self):
+        condition = Key("pk").eq("foo") & Key("sk").begins_with("bar")
+        self.assert_condition_expression_build(
+            condition,
+            "(#n0 = :v0 AND begins_with(#n1, :v1))",
+            {"#n0": "pk", "#n1": "sk"},
+            {":v0": "foo", ":v1": "bar"},
+        )
+        self.builder.reset()
+        condition = Key("pk").eq("foo2") & Key("sk").begins_with("bar2")
+        self.assert_condition_expression_build(
+            condition,
+            "(#n0 = :v0 AND begins_with(#n1, :v1))",
+            {"#n0": "pk", "#n1": "sk"},
+            {":v0": "foo2", ":v1": "bar2"},
+        )
+
+    def test_build_same_shape_after_other_expression(self):
+        a = Attr("myattr")
+        self.assert_condition_expression_build(
+            a.eq("foo"), "#n0 = :v0", {"#n0": "myattr"}, {":v0": "foo"}
+        )
+        self.assert_condition_expression_build(
+            a.eq("bar"), "#n1 = :v1", {"#n1": "myattr"}, {":v1": "bar"}
+        )
+        self.builder.reset()
+        self.assert_condition_expression_build(
+            a.eq("baz"), "#n0 = :v0", {"#n0": "myattr"}, {":v0": "baz"}
+        )
+        self.assert_condition_expression_build(
+            a.eq("qux"), "#n1 = :v1", {"#n1": "myattr"}, {":v1": "qux"}
+        )
+
+    def test_build_different_names_are_not_shared(self):
+        self.assert_condition_expression_build(
+            Attr("myattr").eq("foo"), "#n0 = :v0", {"#n0": "myattr"}, {":v0": "foo"}
+        )
+        self.builder.reset()
+        self.assert_condition_expression_build(
+            Attr("other").eq("foo"), "#n0 = :v0", {"#n0": "other"}, {":v0": "foo"}
+        )
+
+    def test_build_in_with_different_lengths(self):
+        a = Attr("myattr")
+        self.assert_condition_expression_build(
+            a.is_in([1, 2]), "#n0 IN (:v0, :v1)", {"#n0": "myattr"}, {":v0": 1, ":v1": 2},
+        )
+        self.builder.reset()
+        self.assert_condition_expression_build(
+            a.is_in([3]), "#n0 IN (:v0)", {"#n0": "myattr"}, {":v0": 3}
+        )
+
+    def test_build_in_with_iterator(self):
+        a = Attr("myattr")
+        for _ in range(2):
+            self.builder.reset()
+            self.assert_condition_expression_build(
+                a.is_in(iter([1, 2])),
+                "#n0 IN (:v0, :v1)",
+                {"#n0": "myattr"},
+                {":v0": 1, ":v1": 2},
+            )
+
+    def test_build_evicts_from_threads(self):
+        errors = []
+
+        def build(name):
+            try:
+                for i in range(200):
+                    self.builder.build_expression(Attr("%s%s" % (name, i)).eq("foo"))
+            except Exception as e:
+                errors.append(e)
+
+        with mock.patch("boto3.dynamodb.conditions.EXPRESSION_CACHE_SIZE", 2):
+            threads = [threading.Thread(target=build, args=(str(i),)) for i in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(errors, [])
+        self.assertLessEqual(len(self.builder._expression_cache), 2)
+
+    def test_build_cached_shape_still_validates_key_condition(self):
+        self.builder.build_expression(Attr("myattr").eq("foo"))
+        self.builder.reset()
+        with self.assertRaises(DynamoDBNeedsKeyConditionError):
+            self.builder.build_expression(Attr("myattr").eq("foo"), is_key_condition=True)
@@ -10,7 +10,31 @@
 # distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
 # ANY KIND, either express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
-from boto3.dynamodb.table import BatchWriter
+import asyncio
+import os
+import shutil
+import tempfile
+import threading
+import time
+from decimal import Decimal
+
+from boto3.dynamodb.conditions import Attr, Binding, Key
+from boto3.dynamodb.table import (
+    AsyncBatchWriter,
+    BatchWriter,
+    DynamoDBServiceResource,
+    MultiTableBatchWriter,
+    ParallelScan,
+    PreparedQuery,
+    TableResource,
+    batch_get_items,
+)
+from boto3.dynamodb.types import Binary
+from boto3.exceptions import (
+    DynamoDBItemTooLargeError,
+    DynamoDBUnprocessedItemsError,
+    DynamoDBUnprocessedKeysError,
+)
 from tests import mock, unittest
 
 
@@ -304,3 +328,1117 @@ class BaseTransformationTest(unittest.TestCase):
             }
         }
         self.assert_batch_write_calls_are([first_batch, second_batch])
+
+    def test_dedup_only_superseded_requests_on_exit(self):
+        with BatchWriter(
+            self.table_name, self.client, flush_amount=2, overwrite_by_pkeys=["pkey"],
+        ) as b:
+            b.put_item(Item={"pkey": "foo1", "other": "other1"})
+            b.put_item(Item={"pkey": "foo1", "other": "other2"})
+            b.put_item(Item={"pkey": "foo1", "other": "other3"})
+
+        self.assert_batch_write_calls_are(
+            [
+                {
+                    "RequestItems": {
+                        self.table_name: [
+                            {"PutRequest": {"Item": {"pkey": "foo1", "other": "other3"}}},
+                        ]
+                    }
+                }
+            ]
+        )
+
+    def test_dedup_unprocessed_items_superseded_by_buffered_requests(self):
+        self.client.batch_write_item.side_effect = [
+            {
+                "UnprocessedItems": {
+                    self.table_name: [
+                        {"PutRequest": {"Item": {"pkey": "foo1", "other": "other1"}}},
+                    ]
+                }
+            },
+            {"UnprocessedItems": {}},
+        ]
+        with mock.patch("boto3.dynamodb.table.time.sleep"), BatchWriter(
+            self.table_name, self.client, flush_amount=2, overwrite_by_pkeys=["pkey"],
+        ) as b:
+            b.put_item(Item={"pkey": "foo1", "other": "other1"})
+            b.put_item(Item={"pkey": "foo2", "other": "other1"})
+            b.put_item(Item={"pkey": "foo1", "other": "other2"})
+
+        second_batch = {
+            "RequestItems": {
+                self.table_name: [
+                    {"PutRequest": {"Item": {"pkey": "foo1", "other": "other2"}}},
+                ]
+            }
+        }
+        self.assertEqual(self.client.batch_write_item.call_args_list[1][1], second_batch)
+
+
+class TestBatchWriterRetries(unittest.TestCase):
+
+    maxDiff = None
+
+    def setUp(self):
+        self.client = mock.Mock()
+        self.table_name = "tablename"
+        self.time_patch = mock.patch("boto3.dynamodb.table.time")
+        self.time = self.time_patch.start()
+        self.time.time.return_value = 0.0
+        self.addCleanup(self.time_patch.stop)
+        self.random_patch = mock.patch("boto3.dynamodb.table.random")
+        self.random = self.random_patch.start()
+        self.random.uniform.side_effect = lambda low, high: high
+        self.addCleanup(self.random_patch.stop)
+
+    def unprocessed(self, *hashes):
+        return {
+            "UnprocessedItems": {
+                self.table_name: [{"PutRequest": {"Item": {"Hash": h}}} for h in hashes]
+            }
+        }
+
+    def get_batch_sizes(self):
+        return [
+            len(args[1]["RequestItems"][self.table_name])
+            for args in self.client.batch_write_item.call_args_list
+        ]
+
+    def test_unprocessed_items_are_retried_with_backoff(self):
+        self.client.batch_write_item.side_effect = [
+            self.unprocessed("foo1"),
+            self.unprocessed("foo1"),
+            {"UnprocessedItems": {}},
+        ]
+        with BatchWriter(self.table_name, self.client, flush_amount=1) as b:
+            b.put_item(Item={"Hash": "foo1"})
+        self.assertEqual(self.client.batch_write_item.call_count, 3)
+        self.assertEqual(self.time.sleep.call_args_list, [mock.call(0.05), mock.call(0.1)])
+
+    def test_no_backoff_without_unprocessed_items(self):
+        self.client.batch_write_item.return_value = {"UnprocessedItems": {}}
+        with BatchWriter(self.table_name, self.client, flush_amount=1) as b:
+            b.put_item(Item={"Hash": "foo1"})
+            b.put_item(Item={"Hash": "foo2"})
+        self.assertFalse(self.time.sleep.called)
+
+    def test_buffered_items_kept_after_retry(self):
+        self.client.batch_write_item.side_effect = [
+            self.unprocessed("foo1", "foo2"),
+            {"UnprocessedItems": {}},
+            {"UnprocessedItems": {}},
+        ]
+        with BatchWriter(self.table_name, self.client, flush_amount=2) as b:
+            b.put_item(Item={"Hash": "foo1"})
+            b.put_item(Item={"Hash": "foo2"})
+            b.put_item(Item={"Hash": "foo3"})
+        last_batch = self.client.batch_write_item.call_args_list[-1][1]
+        self.assertEqual(
+            last_batch,
+            {"RequestItems": {self.table_name: [{"PutRequest": {"Item": {"Hash": "foo3"}}}]}},
+        )
+
+    def test_max_retries(self):
+        self.client.batch_write_item.return_value = self.unprocessed("foo1")
+        with self.assertRaises(DynamoDBUnprocessedItemsError) as context:
+            with BatchWriter(self.table_name, self.client, flush_amount=1, max_retries=2) as b:
+                b.put_item(Item={"Hash": "foo1"})
+        self.assertEqual(self.client.batch_write_item.call_count, 3)
+        self.assertEqual(
+            context.exception.unprocessed_items, [{"PutRequest": {"Item": {"Hash": "foo1"}}}],
+        )
+
+    def test_retry_timeout(self):
+        self.client.batch_write_item.return_value = self.unprocessed("foo1")
+        self.time.time.side_effect = [0.0, 0.0, 5.0, 5.0, 11.0, 11.0]
+        with self.assertRaises(DynamoDBUnprocessedItemsError):
+            with BatchWriter(self.table_name, self.client, flush_amount=1, retry_timeout=10) as b:
+                b.put_item(Item={"Hash": "foo1"})
+        self.assertEqual(self.client.batch_write_item.call_count, 3)
+
+    def test_adaptive_flush(self):
+        self.client.batch_write_item.side_effect = [
+            self.unprocessed("foo1", "foo2", "foo3"),
+            {"UnprocessedItems": {}},
+            {"UnprocessedItems": {}},
+            {"UnprocessedItems": {}},
+        ]
+        with BatchWriter(self.table_name, self.client, flush_amount=4, adaptive_flush=True) as b:
+            for i in range(4):
+                b.put_item(Item={"Hash": "foo%s" % i})
+            for i in range(4, 7):
+                b.put_item(Item={"Hash": "foo%s" % i})
+        self.assertEqual(self.get_batch_sizes(), [4, 2, 3, 1])
+
+    def test_metrics(self):
+        self.client.batch_write_item.side_effect = [
+            self.unprocessed("foo2"),
+            {"UnprocessedItems": {}},
+        ]
+        with BatchWriter(self.table_name, self.client, flush_amount=2) as b:
+            b.put_item(Item={"Hash": "foo1"})
+            b.put_item(Item={"Hash": "foo2"})
+        self.assertEqual(b.metrics.batches, 2)
+        self.assertEqual(b.metrics.items, 3)
+        self.assertEqual(b.metrics.retries, 1)
+        self.assertEqual(b.metrics.throttled_items, 1)
+
+
+class TestBatchWriterSizes(unittest.TestCase):
+    def setUp(self):
+        self.client = mock.Mock()
+        self.client.batch_write_item.return_value = {"UnprocessedItems": {}}
+        self.table_name = "tablename"
+
+    def get_batch_sizes(self):
+        return [
+            len(kwargs["RequestItems"][self.table_name])
+            for _, kwargs in self.client.batch_write_item.call_args_list
+        ]
+
+    def test_request_size(self):
+        batch_writer = BatchWriter(self.table_name, self.client)
+        item = {
+            "Hash": "foo",
+            "Number": 123,
+            "Binary": Binary(b"\x00\x01"),
+            "Set": {"a", "bc"},
+            "Null": None,
+            "List": ["a", True],
+            "Map": {"k": "v"},
+        }
+        # The sizes of the names, then of the values.
+        expected = (4 + 6 + 6 + 3 + 4 + 4 + 3) + (3 + 3 + 2 + 3 + 1 + (3 + 2 + 2) + (3 + 3))
+        self.assertEqual(batch_writer._get_request_size({"PutRequest": {"Item": item}}), expected)
+
+    def test_flushes_at_max_batch_bytes(self):
+        with BatchWriter(self.table_name, self.client, max_batch_bytes=20) as b:
+            for i in range(4):
+                # 4 bytes for the name and 6 for the value.
+                b.put_item(Item={"Hash": "foo%03d" % i})
+                if i == 1:
+                    self.assertEqual(self.get_batch_sizes(), [2])
+        self.assertEqual(self.get_batch_sizes(), [2, 2])
+
+    def test_batches_are_split_at_max_batch_bytes(self):
+        batch_writer = BatchWriter(self.table_name, self.client, max_batch_bytes=25)
+        with batch_writer as b:
+            for i in range(5):
+                b.put_item(Item={"Hash": "foo%03d" % i})
+        self.assertEqual(self.get_batch_sizes(), [2, 2, 1])
+        self.assertEqual(batch_writer._buffered_bytes, 0)
+
+    def test_item_too_large(self):
+        with BatchWriter(self.table_name, self.client) as b:
+            with self.assertRaises(DynamoDBItemTooLargeError):
+                b.put_item(Item={"Hash": "foo", "Data": "a" * 400 * 1024})
+        self.assertFalse(self.client.batch_write_item.called)
+
+    def test_item_too_large_with_subclassed_values(self):
+        class Text(str):
+            pass
+
+        class Items(list):
+            pass
+
+        with BatchWriter(self.table_name, self.client) as b:
+            with self.assertRaises(DynamoDBItemTooLargeError):
+                b.put_item(Item={"Hash": "foo", "Data": Text("a" * 500 * 1024)})
+            with self.assertRaises(DynamoDBItemTooLargeError):
+                b.put_item(Item={"Hash": "foo", "Data": Items([Text("a" * 500 * 1024)])})
+        self.assertFalse(self.client.batch_write_item.called)
+
+    def test_unsupported_value_type(self):
+        with BatchWriter(self.table_name, self.client) as b:
+            with self.assertRaises(TypeError):
+                b.put_item(Item={"Hash": "foo", "Data": object()})
+            with self.assertRaises(TypeError):
+                b.put_item(Item={"Hash": "foo", "Data": 1.5})
+        self.assertFalse(self.client.batch_write_item.called)
+
+
+class TestBatchWriterSpill(unittest.TestCase):
+
+    maxDiff = None
+
+    def setUp(self):
+        self.client = mock.Mock()
+        self.client.batch_write_item.return_value = {"UnprocessedItems": {}}
+        self.table_name = "tablename"
+        self.root_dir = tempfile.mkdtemp()
+        self.spill_path = os.path.join(self.root_dir, "requests.spill")
+
+    def tearDown(self):
+        shutil.rmtree(self.root_dir)
+
+    def get_sent_requests(self):
+        return [
+            request
+            for _, kwargs in self.client.batch_write_item.call_args_list
+            for request in kwargs["RequestItems"][self.table_name]
+        ]
+
+    def test_spill_files_removed_once_written(self):
+        with BatchWriter(
+            self.table_name, self.client, flush_amount=2, spill_path=self.spill_path
+        ) as b:
+            for i in range(3):
+                b.put_item(Item={"Hash": "foo%s" % i})
+            self.assertTrue(os.path.exists(self.spill_path))
+        self.assertEqual(len(self.get_sent_requests()), 3)
+        self.assertEqual(os.listdir(self.root_dir), [])
+
+    def test_requests_replayed_after_failure(self):
+        item = {
+            "Hash": "foo1",
+            "Number": Decimal("1.5"),
+            "Binary": Binary(b"\x00\x01"),
+            "Set": {"a", "b"},
+            "Nested": {"List": [Binary(b"\x02"), None, True]},
+        }
+        self.client.batch_write_item.side_effect = RuntimeError("Connection lost")
+        with self.assertRaises(RuntimeError):
+            with BatchWriter(
+                self.table_name, self.client, flush_amount=2, spill_path=self.spill_path
+            ) as b:
+                b.delete_item(Key={"Hash": "foo0"})
+                b.put_item(Item=item)
+
+        self.client.batch_write_item.reset_mock(side_effect=True)
+        with BatchWriter(self.table_name, self.client, spill_path=self.spill_path):
+            pass
+        self.assertEqual(
+            self.get_sent_requests(),
+            [{"DeleteRequest": {"Key": {"Hash": "foo0"}}}, {"PutRequest": {"Item": item}}],
+        )
+        self.assertEqual(os.listdir(self.root_dir), [])
+
+    def test_only_unwritten_requests_are_replayed(self):
+        self.client.batch_write_item.side_effect = [
+            {
+                "UnprocessedItems": {
+                    self.table_name: [{"PutRequest": {"Item": {"Hash": "foo1"}}}],
+                }
+            },
+            RuntimeError("Connection lost"),
+        ]
+        with mock.patch("boto3.dynamodb.table.time.sleep"), self.assertRaises(RuntimeError):
+            with BatchWriter(
+                self.table_name, self.client, flush_amount=2, spill_path=self.spill_path
+            ) as b:
+                b.put_item(Item={"Hash": "foo1"})
+                b.put_item(Item={"Hash": "foo2"})
+
+        self.client.batch_write_item.reset_mock(side_effect=True)
+        with BatchWriter(self.table_name, self.client, spill_path=self.spill_path):
+            pass
+        self.assertEqual(self.get_sent_requests(), [{"PutRequest": {"Item": {"Hash": "foo1"}}}])
+
+    def test_requests_kept_when_replay_fails(self):
+        self.client.batch_write_item.side_effect = RuntimeError("Connection lost")
+        with self.assertRaises(RuntimeError):
+            with BatchWriter(self.table_name, self.client, spill_path=self.spill_path) as b:
+                b.put_item(Item={"Hash": "foo1"})
+
+        replace = os.replace
+
+        def fail_spill_replace(src, dst):
+            if dst == self.spill_path:
+                raise OSError("Disk full")
+            replace(src, dst)
+
+        with mock.patch("boto3.dynamodb.table.os.replace", side_effect=fail_spill_replace):
+            with self.assertRaises(OSError):
+                BatchWriter(self.table_name, self.client, spill_path=self.spill_path)
+
+        self.client.batch_write_item.reset_mock(side_effect=True)
+        with BatchWriter(self.table_name, self.client, spill_path=self.spill_path):
+            pass
+        self.assertEqual(self.get_sent_requests(), [{"PutRequest": {"Item": {"Hash": "foo1"}}}])
+
+    def test_written_requests_dropped_from_spill_file(self):
+        written = []
+
+        def batch_write_item(RequestItems):
+            # Every batch leaves its last request to be retried, so the
+            # spill file always has a request that is not written yet.
+            if len(written) >= 8:
+                raise RuntimeError("Connection lost")
+            requests = RequestItems[self.table_name]
+            written.extend(requests[:-1])
+            return {"UnprocessedItems": {self.table_name: requests[-1:]}}
+
+        self.client.batch_write_item.side_effect = batch_write_item
+        with mock.patch("boto3.dynamodb.table.SPILL_COMPACT_BYTES", 100), mock.patch(
+            "boto3.dynamodb.table.time.sleep"
+        ), self.assertRaises(RuntimeError):
+            with BatchWriter(
+                self.table_name, self.client, flush_amount=2, spill_path=self.spill_path
+            ) as b:
+                for i in range(12):
+                    b.put_item(Item={"Hash": "foo%s" % i})
+                    self.assertLess(os.path.getsize(self.spill_path), 250)
+
+        self.client.batch_write_item.reset_mock(side_effect=True)
+        self.client.batch_write_item.return_value = {"UnprocessedItems": {}}
+        with BatchWriter(self.table_name, self.client, spill_path=self.spill_path):
+            pass
+        self.assertEqual(
+            self.get_sent_requests(),
+            [{"PutRequest": {"Item": {"Hash": "foo%s" % i}}} for i in (8, 9)],
+        )
+
+
+class RecordingClient:
+    """A client recording when each batch write started and finished."""
+
+    def __init__(self, responses=None, delay=0.05):
+        self.calls = []
+        self._responses = list(responses or [])
+        self._delay = delay
+        self._lock = threading.Lock()
+
+    def batch_write_item(self, RequestItems):
+        start = time.time()
+        time.sleep(self._delay)
+        with self._lock:
+            self.calls.append((RequestItems, start, time.time()))
+            if self._responses:
+                return self._responses.pop(0)
+        return {"UnprocessedItems": {}}
+
+
+class TestConcurrentBatchWriter(unittest.TestCase):
+
+    maxDiff = None
+
+    def setUp(self):
+        self.table_name = "tablename"
+
+    def get_sent_requests(self, client):
+        return [
+            request
+            for request_items, _, _ in client.calls
+            for request in request_items[self.table_name]
+        ]
+
+    def test_all_items_flushed_on_exit(self):
+        client = RecordingClient()
+        with BatchWriter(
+            self.table_name, client, flush_amount=2, max_in_flight=3, key_names=["Hash"]
+        ) as b:
+            for i in range(10):
+                b.put_item(Item={"Hash": "foo%s" % i})
+        self.assertEqual(len(client.calls), 5)
+        self.assertEqual(
+            sorted(r["PutRequest"]["Item"]["Hash"] for r in self.get_sent_requests(client)),
+            sorted("foo%s" % i for i in range(10)),
+        )
+
+    def test_batches_are_sent_concurrently(self):
+        client = RecordingClient(delay=0.2)
+        with BatchWriter(
+            self.table_name, client, flush_amount=1, max_in_flight=2, key_names=["Hash"]
+        ) as b:
+            b.put_item(Item={"Hash": "foo1"})
+            b.put_item(Item={"Hash": "foo2"})
+        (_, first_start, first_end), (_, second_start, second_end) = client.calls
+        self.assertLess(max(first_start, second_start), min(first_end, second_end))
+
+    def test_writes_to_same_item_are_not_concurrent(self):
+        client = RecordingClient()
+        with BatchWriter(
+            self.table_name, client, flush_amount=1, max_in_flight=2, key_names=["Hash"]
+        ) as b:
+            b.put_item(Item={"Hash": "foo", "Value": 1})
+            b.put_item(Item={"Hash": "foo", "Value": 2})
+        (first, _, first_end), (second, second_start, _) = client.calls
+        self.assertEqual(first[self.table_name][0]["PutRequest"]["Item"]["Value"], 1)
+        self.assertEqual(second[self.table_name][0]["PutRequest"]["Item"]["Value"], 2)
+        self.assertLessEqual(first_end, second_start)
+
+    def test_unprocessed_items_are_retried(self):
+        unprocessed = [{"PutRequest": {"Item": {"Hash": "foo1"}}}]
+        client = RecordingClient(responses=[{"UnprocessedItems": {self.table_name: unprocessed}}])
+        with BatchWriter(
+            self.table_name, client, flush_amount=1, max_in_flight=2, key_names=["Hash"]
+        ) as b:
+            b.put_item(Item={"Hash": "foo1"})
+        self.assertEqual(
+            self.get_sent_requests(client),
+            unprocessed + unprocessed,
+        )
+
+    def test_unprocessed_items_superseded_by_newer_writes(self):
+        client = RecordingClient(
+            responses=[
+                {
+                    "UnprocessedItems": {
+                        self.table_name: [{"PutRequest": {"Item": {"Hash": "foo", "Value": 1}}}]
+                    }
+                }
+            ]
+        )
+        with BatchWriter(
+            self.table_name, client, flush_amount=1, max_in_flight=2, key_names=["Hash"]
+        ) as b:
+            b.put_item(Item={"Hash": "foo", "Value": 1})
+            b.put_item(Item={"Hash": "foo", "Value": 2})
+        self.assertEqual(
+            self.get_sent_requests(client),
+            [
+                {"PutRequest": {"Item": {"Hash": "foo", "Value": 1}}},
+                {"PutRequest": {"Item": {"Hash": "foo", "Value": 2}}},
+            ],
+        )
+
+    def test_key_names_are_required(self):
+        with self.assertRaises(ValueError):
+            BatchWriter(self.table_name, mock.Mock(), max_in_flight=2)
+
+    def test_table_resource_uses_key_schema(self):
+        table = TableResource()
+        table.name = self.table_name
+        table.meta = mock.Mock()
+        table.key_schema = [{"AttributeName": "Hash", "KeyType": "HASH"}]
+        batch_writer = table.batch_writer(max_in_flight=2)
+        self.assertEqual(batch_writer._key_names, {self.table_name: ("Hash",)})
+
+
+class TestAsyncBatchWriter(unittest.TestCase):
+
+    maxDiff = None
+
+    def setUp(self):
+        self.table_name = "tablename"
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def get_sent_requests(self, client):
+        return [
+            request
+            for request_items, _, _ in client.calls
+            for request in request_items[self.table_name]
+        ]
+
+    def test_all_items_flushed_on_exit(self):
+        client = RecordingClient(delay=0)
+
+        async def write():
+            async with AsyncBatchWriter(self.table_name, client, flush_amount=2) as b:
+                for i in range(5):
+                    await b.put_item(Item={"Hash": "foo%s" % i})
+                await b.delete_item(Key={"Hash": "foo5"})
+
+        self.loop.run_until_complete(write())
+        self.assertEqual(len(client.calls), 3)
+        self.assertEqual(
+            self.get_sent_requests(client),
+            [{"PutRequest": {"Item": {"Hash": "foo%s" % i}}} for i in range(5)]
+            + [{"DeleteRequest": {"Key": {"Hash": "foo5"}}}],
+        )
+
+    def test_event_loop_is_not_blocked(self):
+        client = RecordingClient(delay=0.2)
+        ticks = []
+
+        async def tick():
+            for _ in range(5):
+                ticks.append(time.time())
+                await asyncio.sleep(0.01)
+
+        async def write():
+            async with AsyncBatchWriter(self.table_name, client, flush_amount=1) as b:
+                await b.put_item(Item={"Hash": "foo1"})
+                await asyncio.gather(tick(), b.put_item(Item={"Hash": "foo2"}))
+
+        self.loop.run_until_complete(write())
+        self.assertEqual(len(ticks), 5)
+        # The ticks kept running while the first batch was being sent.
+        self.assertLess(ticks[-1], client.calls[0][2])
+
+    def test_bounded_concurrency(self):
+        client = RecordingClient(delay=0.1)
+
+        async def write():
+            async with AsyncBatchWriter(
+                self.table_name, client, flush_amount=1, max_in_flight=2, key_names=["Hash"]
+            ) as b:
+                for i in range(4):
+                    await b.put_item(Item={"Hash": "foo%s" % i})
+
+        self.loop.run_until_complete(write())
+        self.assertEqual(len(client.calls), 4)
+        for _, start, _ in client.calls:
+            concurrent = [call for call in client.calls if call[1] <= start < call[2]]
+            self.assertLessEqual(len(concurrent), 2)
+
+    def test_shared_by_several_producers(self):
+        for max_in_flight in (1, 2):
+            client = RecordingClient(delay=0.01)
+
+            async def produce(b, producer):
+                for i in range(5):
+                    await b.put_item(Item={"Hash": "foo%s-%s" % (producer, i)})
+
+            async def write():
+                async with AsyncBatchWriter(
+                    self.table_name,
+                    client,
+                    flush_amount=2,
+                    max_in_flight=max_in_flight,
+                    key_names=["Hash"],
+                ) as b:
+                    await asyncio.gather(*[produce(b, producer) for producer in range(8)])
+
+            self.loop.run_until_complete(write())
+            self.assertEqual(
+                sorted(r["PutRequest"]["Item"]["Hash"] for r in self.get_sent_requests(client)),
+                sorted("foo%s-%s" % (producer, i) for producer in range(8) for i in range(5)),
+            )
+
+    def test_unprocessed_items_are_retried(self):
+        unprocessed = [{"PutRequest": {"Item": {"Hash": "foo1"}}}]
+        client = RecordingClient(
+            responses=[{"UnprocessedItems": {self.table_name: unprocessed}}], delay=0
+        )
+
+        async def write():
+            async with AsyncBatchWriter(self.table_name, client, flush_amount=1) as b:
+                await b.put_item(Item={"Hash": "foo1"})
+
+        with mock.patch("boto3.dynamodb.table.random.uniform", return_value=0):
+            self.loop.run_until_complete(write())
+        self.assertEqual(self.get_sent_requests(client), unprocessed + unprocessed)
+
+    def test_table_resource_async_batch_writer(self):
+        table = TableResource()
+        table.name = self.table_name
+        table.meta = mock.Mock()
+        table.key_schema = [{"AttributeName": "Hash", "KeyType": "HASH"}]
+        batch_writer = table.async_batch_writer(max_in_flight=2)
+        self.assertIsInstance(batch_writer, AsyncBatchWriter)
+        self.assertEqual(batch_writer._key_names, {self.table_name: ("Hash",)})
+
+
+class TestMultiTableBatchWriter(unittest.TestCase):
+
+    maxDiff = None
+
+    def setUp(self):
+        self.client = mock.Mock()
+        self.client.batch_write_item.return_value = {"UnprocessedItems": {}}
+
+    def get_request_items(self):
+        return [kwargs["RequestItems"] for _, kwargs in self.client.batch_write_item.call_args_list]
+
+    def test_requests_of_all_tables_share_batches(self):
+        with MultiTableBatchWriter(self.client, flush_amount=3) as b:
+            b.put_item(TableName="table1", Item={"Hash": "foo1"})
+            b.put_item(TableName="table2", Item={"Hash": "foo2"})
+            b.delete_item(TableName="table1", Key={"Hash": "foo3"})
+            b.put_item(TableName="table3", Item={"Hash": "foo4"})
+        self.assertEqual(
+            self.get_request_items(),
+            [
+                {
+                    "table1": [
+                        {"PutRequest": {"Item": {"Hash": "foo1"}}},
+                        {"DeleteRequest": {"Key": {"Hash": "foo3"}}},
+                    ],
+                    "table2": [{"PutRequest": {"Item": {"Hash": "foo2"}}}],
+                },
+                {"table3": [{"PutRequest": {"Item": {"Hash": "foo4"}}}]},
+            ],
+        )
+
+    def test_unprocessed_items_of_each_table_are_retried(self):
+        self.client.batch_write_item.side_effect = [
+            {
+                "UnprocessedItems": {
+                    "table2": [{"PutRequest": {"Item": {"Hash": "foo2"}}}],
+                }
+            },
+            {"UnprocessedItems": {}},
+        ]
+        with mock.patch("boto3.dynamodb.table.time.sleep"):
+            with MultiTableBatchWriter(self.client) as b:
+                b.put_item(TableName="table1", Item={"Hash": "foo1"})
+                b.put_item(TableName="table2", Item={"Hash": "foo2"})
+        self.assertEqual(
+            self.get_request_items()[1], {"table2": [{"PutRequest": {"Item": {"Hash": "foo2"}}}]},
+        )
+
+    def test_dedup_per_table(self):
+        with MultiTableBatchWriter(self.client, overwrite_by_pkeys={"table1": ["Hash"]}) as b:
+            b.put_item(TableName="table1", Item={"Hash": "foo", "other": "other1"})
+            b.put_item(TableName="table2", Item={"Hash": "foo", "other": "other1"})
+            b.put_item(TableName="table1", Item={"Hash": "foo", "other": "other2"})
+            b.put_item(TableName="table2", Item={"Hash": "foo", "other": "other2"})
+        self.assertEqual(
+            self.get_request_items(),
+            [
+                {
+                    "table1": [{"PutRequest": {"Item": {"Hash": "foo", "other": "other2"}}}],
+                    "table2": [
+                        {"PutRequest": {"Item": {"Hash": "foo", "other": "other1"}}},
+                        {"PutRequest": {"Item": {"Hash": "foo", "other": "other2"}}},
+                    ],
+                }
+            ],
+        )
+
+    def test_max_retries(self):
+        unprocessed = {"table1": [{"PutRequest": {"Item": {"Hash": "foo1"}}}]}
+        self.client.batch_write_item.return_value = {"UnprocessedItems": unprocessed}
+        with mock.patch("boto3.dynamodb.table.time.sleep"):
+            with self.assertRaises(DynamoDBUnprocessedItemsError) as context:
+                with MultiTableBatchWriter(self.client, max_retries=1) as b:
+                    b.put_item(TableName="table1", Item={"Hash": "foo1"})
+        self.assertEqual(context.exception.unprocessed_items, unprocessed)
+
+    def test_key_names_are_required_for_concurrent_writes(self):
+        batch_writer = MultiTableBatchWriter(
+            self.client, max_in_flight=2, key_names={"table1": ["Hash"]}
+        )
+        with self.assertRaises(ValueError):
+            batch_writer.put_item(TableName="table2", Item={"Hash": "foo"})
+
+    def test_service_resource_batch_writer(self):
+        resource = DynamoDBServiceResource()
+        resource.meta = mock.Mock()
+        resource.meta.client = self.client
+        with resource.batch_writer() as b:
+            b.put_item(TableName="table1", Item={"Hash": "foo1"})
+        self.assertEqual(
+            self.get_request_items(), [{"table1": [{"PutRequest": {"Item": {"Hash": "foo1"}}}]}],
+        )
+
+
+class TestBatchGet(unittest.TestCase):
+
+    maxDiff = None
+
+    def setUp(self):
+        self.client = mock.Mock()
+        self.client.batch_get_item.side_effect = self.echo_keys
+        self.table = TableResource()
+        self.table.name = "tablename"
+        self.table.meta = mock.Mock()
+        self.table.meta.client = self.client
+
+    def echo_keys(self, RequestItems):
+        return {
+            "Responses": {
+                table_name: [dict(key, found=True) for key in params["Keys"]]
+                for table_name, params in RequestItems.items()
+            },
+            "UnprocessedKeys": {},
+        }
+
+    def get_request_items(self):
+        return [kwargs["RequestItems"] for _, kwargs in self.client.batch_get_item.call_args_list]
+
+    def test_keys_are_sent_in_chunks(self):
+        keys = ({"Hash": "foo%s" % i} for i in range(250))
+        items = list(self.table.batch_get(keys))
+        self.assertEqual(
+            sorted(item["Hash"] for item in items), sorted("foo%s" % i for i in range(250)),
+        )
+        self.assertEqual(
+            sorted(len(items["tablename"]["Keys"]) for items in self.get_request_items()),
+            [50, 100, 100],
+        )
+
+    def test_duplicate_keys_are_requested_once(self):
+        keys = [{"Hash": "foo", "Range": 1}, {"Range": 1, "Hash": "foo"}, {"Hash": "bar"}]
+        items = list(self.table.batch_get(keys))
+        self.assertEqual(len(items), 2)
+        self.assertEqual(
+            self.get_request_items(),
+            [{"tablename": {"Keys": [{"Hash": "foo", "Range": 1}, {"Hash": "bar"}]}}],
+        )
+
+    def test_projection_and_consistent_read(self):
+        list(self.table.batch_get([{"Hash": "foo"}], projection=["Hash", "Name"], consistent=True))
+        self.assertEqual(
+            self.get_request_items(),
+            [
+                {
+                    "tablename": {
+                        "Keys": [{"Hash": "foo"}],
+                        "ProjectionExpression": "#p0, #p1",
+                        "ExpressionAttributeNames": {"#p0": "Hash", "#p1": "Name"},
+                        "ConsistentRead": True,
+                    }
+                }
+            ],
+        )
+
+    @mock.patch("boto3.dynamodb.table.time.sleep")
+    def test_unprocessed_keys_are_retried(self, sleep):
+        self.client.batch_get_item.side_effect = [
+            {
+                "Responses": {"tablename": [{"Hash": "foo1"}]},
+                "UnprocessedKeys": {"tablename": {"Keys": [{"Hash": "foo2"}]}},
+            },
+            {"Responses": {"tablename": [{"Hash": "foo2"}]}, "UnprocessedKeys": {}},
+        ]
+        items = list(self.table.batch_get([{"Hash": "foo1"}, {"Hash": "foo2"}], consistent=True))
+        self.assertEqual(items, [{"Hash": "foo1"}, {"Hash": "foo2"}])
+        self.assertEqual(
+            self.get_request_items()[1],
+            {"tablename": {"Keys": [{"Hash": "foo2"}], "ConsistentRead": True}},
+        )
+        self.assertTrue(sleep.called)
+
+    @mock.patch("boto3.dynamodb.table.time.sleep")
+    def test_max_retries(self, sleep):
+        self.client.batch_get_item.side_effect = None
+        self.client.batch_get_item.return_value = {
+            "Responses": {},
+            "UnprocessedKeys": {"tablename": {"Keys": [{"Hash": "foo1"}]}},
+        }
+        with self.assertRaises(DynamoDBUnprocessedKeysError) as context:
+            list(self.table.batch_get([{"Hash": "foo1"}], max_retries=2))
+        self.assertEqual(self.client.batch_get_item.call_count, 3)
+        self.assertEqual(context.exception.unprocessed_keys, {"tablename": [{"Hash": "foo1"}]})
+
+    def test_multiple_tables_share_requests(self):
+        resource = DynamoDBServiceResource()
+        resource.meta = mock.Mock()
+        resource.meta.client = self.client
+        items = list(
+            resource.batch_get(
+                RequestItems={
+                    "table1": {"Keys": [{"Hash": "foo1"}]},
+                    "table2": {"Keys": [{"Hash": "foo2"}], "ConsistentRead": True},
+                }
+            )
+        )
+        self.assertEqual(
+            items,
+            [
+                ("table1", {"Hash": "foo1", "found": True}),
+                ("table2", {"Hash": "foo2", "found": True}),
+            ],
+        )
+        self.assertEqual(
+            self.get_request_items(),
+            [
+                {
+                    "table1": {"Keys": [{"Hash": "foo1"}]},
+                    "table2": {"Keys": [{"Hash": "foo2"}], "ConsistentRead": True},
+                }
+            ],
+        )
+
+    def test_requests_are_bounded_by_max_in_flight(self):
+        in_flight = []
+        max_seen = []
+        lock = threading.Lock()
+
+        def slow_echo(RequestItems):
+            with lock:
+                in_flight.append(1)
+                max_seen.append(len(in_flight))
+            time.sleep(0.02)
+            with lock:
+                in_flight.pop()
+            return self.echo_keys(RequestItems)
+
+        self.client.batch_get_item.side_effect = slow_echo
+        keys = [{"Hash": "foo%s" % i} for i in range(1000)]
+        items = list(batch_get_items(self.client, {"tablename": {"Keys": keys}}, max_in_flight=3))
+        self.assertEqual(len(items), 1000)
+        self.assertLessEqual(max(max_seen), 3)
+
+
+class TestPaginatedIterators(unittest.TestCase):
+
+    maxDiff = None
+
+    def setUp(self):
+        self.client = mock.Mock()
+        self.client.query.side_effect = self.get_page
+        self.client.scan.side_effect = self.get_page
+        self.table = TableResource()
+        self.table.name = "tablename"
+        self.table.meta = mock.Mock()
+        self.table.meta.client = self.client
+        # Three pages of two items, with the start key of each page.
+        self.pages = {
+            None: {"Items": [{"Hash": "foo0"}, {"Hash": "foo1"}], "LastEvaluatedKey": "foo1"},
+            "foo1": {"Items": [{"Hash": "foo2"}, {"Hash": "foo3"}], "LastEvaluatedKey": "foo3"},
+            "foo3": {"Items": [{"Hash": "foo4"}, {"Hash": "foo5"}]},
+        }
+
+    def get_page(self, ExclusiveStartKey=None, **kwargs):
+        return self.pages[ExclusiveStartKey]
+
+    def get_hashes(self, items):
+        return [item["Hash"] for item in items]
+
+    def test_query_iter(self):
+        key_condition = Key("Hash").eq("foo")
+        items = self.table.query_iter(KeyConditionExpression=key_condition)
+        self.assertEqual(self.get_hashes(items), ["foo%s" % i for i in range(6)])
+        self.assertEqual(
+            self.client.query.call_args_list,
+            [
+                mock.call(TableName="tablename", KeyConditionExpression=key_condition),
+                mock.call(
+                    TableName="tablename",
+                    KeyConditionExpression=key_condition,
+                    ExclusiveStartKey="foo1",
+                ),
+                mock.call(
+                    TableName="tablename",
+                    KeyConditionExpression=key_condition,
+                    ExclusiveStartKey="foo3",
+                ),
+            ],
+        )
+
+    def test_pages_are_requested_lazily(self):
+        items = self.table.scan_iter()
+        self.assertFalse(self.client.scan.called)
+        next(items)
+        next(items)
+        self.assertEqual(self.client.scan.call_count, 1)
+        next(items)
+        self.assertEqual(self.client.scan.call_count, 2)
+
+    def test_prefetch(self):
+        items = self.table.scan_iter(prefetch=True)
+        next(items)
+        # The next page is requested before the first one is consumed.
+        for _ in range(100):
+            if self.client.scan.call_count == 2:
+                break
+            time.sleep(0.01)
+        self.assertEqual(self.client.scan.call_count, 2)
+        self.assertEqual(self.get_hashes(items), ["foo%s" % i for i in range(1, 6)])
+
+    def test_prefetch_builds_conditions_once(self):
+        items = self.table.query_iter(
+            KeyConditionExpression=Key("Hash").eq("foo"),
+            FilterExpression=Attr("Other").gt(1),
+            prefetch=True,
+        )
+        self.assertEqual(self.get_hashes(items), ["foo%s" % i for i in range(6)])
+        for call in self.client.query.call_args_list:
+            self.assertEqual(call[1]["FilterExpression"], "#n0 > :v0")
+            self.assertEqual(call[1]["KeyConditionExpression"], "#n1 = :v1")
+            self.assertEqual(call[1]["ExpressionAttributeNames"], {"#n0": "Other", "#n1": "Hash"})
+            self.assertEqual(call[1]["ExpressionAttributeValues"], {":v0": 1, ":v1": "foo"})
+
+    def test_max_items(self):
+        items = self.table.scan_iter(max_items=3)
+        self.assertEqual(self.get_hashes(items), ["foo0", "foo1", "foo2"])
+        self.assertEqual(
+            self.client.scan.call_args_list,
+            [
+                mock.call(TableName="tablename", Limit=3),
+                mock.call(TableName="tablename", Limit=1, ExclusiveStartKey="foo1"),
+            ],
+        )
+
+    def test_max_items_with_filter(self):
+        items = self.table.scan_iter(max_items=3, FilterExpression=Attr("Hash").exists())
+        self.assertEqual(self.get_hashes(items), ["foo0", "foo1", "foo2"])
+        self.assertNotIn("Limit", self.client.scan.call_args[1])
+
+    def test_projection(self):
+        items = self.table.query_iter(
+            projection=["Hash", "Name"], ExpressionAttributeNames={"#k": "k"}
+        )
+        list(items)
+        self.assertEqual(
+            self.client.query.call_args_list[0],
+            mock.call(
+                TableName="tablename",
+                ProjectionExpression="#p0, #p1",
+                ExpressionAttributeNames={"#k": "k", "#p0": "Hash", "#p1": "Name"},
+            ),
+        )
+
+
+class TestParallelScan(unittest.TestCase):
+
+    maxDiff = None
+
+    def setUp(self):
+        self.client = mock.Mock()
+        self.client.scan.side_effect = self.scan_pages
+        self.table_name = "tablename"
+        # Every segment has two pages of two items.
+        self.pages = {}
+        for segment in range(3):
+            self.pages[(segment, None)] = {
+                "Items": [{"Hash": "foo%s-0" % segment}, {"Hash": "foo%s-1" % segment}],
+                "LastEvaluatedKey": {"Hash": "foo%s-1" % segment},
+            }
+            self.pages[(segment, "foo%s-1" % segment)] = {
+                "Items": [{"Hash": "foo%s-2" % segment}, {"Hash": "foo%s-3" % segment}],
+            }
+
+    def scan_pages(self, Segment, ExclusiveStartKey=None, **kwargs):
+        start_key = ExclusiveStartKey["Hash"] if ExclusiveStartKey else None
+        return self.pages[(Segment, start_key)]
+
+    def test_scans_all_segments(self):
+        scan = ParallelScan(self.table_name, self.client, 3, workers=2, Limit=2)
+        items = sorted(item["Hash"] for item in scan)
+        self.assertEqual(
+            items, sorted("foo%s-%s" % (segment, i) for segment in range(3) for i in range(4))
+        )
+        self.assertEqual(scan.checkpoint, {})
+        self.assertEqual(self.client.scan.call_count, 6)
+        self.assertIn(
+            mock.call(
+                TableName=self.table_name,
+                TotalSegments=3,
+                Segment=1,
+                Limit=2,
+                ExclusiveStartKey={"Hash": "foo1-1"},
+            ),
+            self.client.scan.call_args_list,
+        )
+
+    def test_resume_from_checkpoint(self):
+        scan = ParallelScan(self.table_name, self.client, 3, workers=1)
+        items = iter(scan)
+        # The checkpoint only moves once a page has been fully iterated over.
+        self.assertEqual(next(items), {"Hash": "foo0-0"})
+        self.assertEqual(scan.checkpoint, {0: None, 1: None, 2: None})
+        self.assertEqual(next(items), {"Hash": "foo0-1"})
+        self.assertEqual(next(items), {"Hash": "foo0-2"})
+        self.assertEqual(scan.checkpoint, {0: {"Hash": "foo0-1"}, 1: None, 2: None})
+        items.close()
+
+        resumed = ParallelScan(self.table_name, self.client, 3, checkpoint=scan.checkpoint)
+        expected = ["foo0-2", "foo0-3"]
+        expected += ["foo%s-%s" % (segment, i) for segment in (1, 2) for i in range(4)]
+        self.assertEqual(sorted(item["Hash"] for item in resumed), expected)
+
+    def test_builds_filter_once(self):
+        scan = ParallelScan(
+            self.table_name,
+            self.client,
+            3,
+            FilterExpression=Attr("Hash").eq("foo") & Attr("Range").gt(1),
+            ExpressionAttributeNames={"#p": "Other"},
+        )
+        list(scan)
+        for call in self.client.scan.call_args_list:
+            self.assertEqual(call[1]["FilterExpression"], "(#n0 = :v0 AND #n1 > :v1)")
+            self.assertEqual(
+                call[1]["ExpressionAttributeNames"],
+                {"#p": "Other", "#n0": "Hash", "#n1": "Range"},
+            )
+            self.assertEqual(call[1]["ExpressionAttributeValues"], {":v0": "foo", ":v1": 1})
+
+    def test_invalid_total_segments(self):
+        with self.assertRaises(ValueError):
+            ParallelScan(self.table_name, self.client, 0)
+
+    def test_table_resource_parallel_scan(self):
+        table = TableResource()
+        table.name = self.table_name
+        table.meta = mock.Mock()
+        table.meta.client = self.client
+        items = list(table.parallel_scan(total_segments=3, FilterExpression=Attr("Hash").exists()))
+        self.assertEqual(len(items), 12)
+        self.assertIn("FilterExpression", self.client.scan.call_args[1])
+
+
+class TestPreparedQuery(unittest.TestCase):
+
+    maxDiff = None
+
+    def setUp(self):
+        self.client = mock.Mock()
+        self.client.query.return_value = {"Items": []}
+        self.table_name = "tablename"
+
+    def test_execute_binds_values(self):
+        query = PreparedQuery(
+            self.table_name,
+            self.client,
+            KeyConditionExpression=(
+                Key("pkey").eq(Binding("pkey")) & Key("skey").begins_with(Binding("prefix"))
+            ),
+            FilterExpression=Attr("status").eq("active"),
+            ProjectionExpression="pkey, skey",
+        )
+        self.assertEqual(query.bindings, {"pkey", "prefix"})
+
+        query.execute(pkey="foo1", prefix="bar1")
+        query.execute(pkey="foo2", prefix="bar2")
+
+        expected_params = {
+            "TableName": self.table_name,
+            "KeyConditionExpression": "(#n1 = :v1 AND begins_with(#n2, :v2))",
+            "FilterExpression": "#n0 = :v0",
+            "ProjectionExpression": "pkey, skey",
+            "ExpressionAttributeNames": {"#n0": "status", "#n1": "pkey", "#n2": "skey"},
+        }
+        self.assertEqual(
+            self.client.query.call_args_list,
+            [
+                mock.call(
+                    ExpressionAttributeValues={":v0": "active", ":v1": "foo1", ":v2": "bar1"},
+                    **expected_params
+                ),
+                mock.call(
+                    ExpressionAttributeValues={":v0": "active", ":v1": "foo2", ":v2": "bar2"},
+                    **expected_params
+                ),
+            ],
+        )
+
+    def test_execute_keeps_provided_placeholders(self):
+        query = PreparedQuery(
+            self.table_name,
+            self.client,
+            KeyConditionExpression=Key("pkey").eq(Binding("pkey")),
+            FilterExpression="#a = :b",
+            ExpressionAttributeNames={"#a": "other"},
+            ExpressionAttributeValues={":b": "value"},
+        )
+        query.execute(pkey="foo")
+        self.client.query.assert_called_once_with(
+            TableName=self.table_name,
+            KeyConditionExpression="#n0 = :v0",
+            FilterExpression="#a = :b",
+            ExpressionAttributeNames={"#a": "other", "#n0": "pkey"},
+            ExpressionAttributeValues={":b": "value", ":v0": "foo"},
+        )
+
+    def test_execute_with_exclusive_start_key(self):
+        query = PreparedQuery(
+            self.table_name, self.client, KeyConditionExpression=Key("pkey").eq(Binding("pkey")),
+        )
+        query.execute(ExclusiveStartKey={"pkey": "foo"}, pkey="foo")
+        self.client.query.assert_called_once_with(
+            TableName=self.table_name,
+            KeyConditionExpression="#n0 = :v0",
+            ExpressionAttributeNames={"#n0": "pkey"},
+            ExpressionAttributeValues={":v0": "foo"},
+            ExclusiveStartKey={"pkey": "foo"},
+        )
+
+    def test_execute_with_wrong_bindings(self):
+        query = PreparedQuery(
+            self.table_name, self.client, KeyConditionExpression=Key("pkey").eq(Binding("pkey")),
+        )
+        with self.assertRaises(ValueError):
+            query.execute()
+        with self.assertRaises(ValueError):
+            query.execute(pkey="foo", other="bar")
+        self.assertFalse(self.client.query.called)
@@ -370,6 +370,107 @@ class TestInputOutputTransformer(BaseTransformationTest):
         self.assertEqual(input_params, {"List": "foo"})
 
 
+class TestTransformAll(BaseTransformationTest):
+    def setUp(self):
+        super(TestTransformAll, self).setUp()
+        self.add_shape({self.target_shape: {"type": "string"}})
+        self.add_shape({"OtherShape": {"type": "string"}})
+        self.transformations = {
+            self.target_shape: lambda params: self.transformed_value,
+            "OtherShape": lambda params: "other",
+        }
+
+    def test_transform_all_does_not_modify_input(self):
+        input_params = {
+            "Structure": {"TransformMe": self.original_value, "Other": self.original_value},
+            "List": [{"foo": self.original_value}],
+            "LeaveAlone": {"foo": self.original_value},
+        }
+        structure_shape = {
+            "Structure": {
+                "type": "structure",
+                "members": {
+                    "TransformMe": {"shape": self.target_shape},
+                    "Other": {"shape": "OtherShape"},
+                },
+            }
+        }
+        map_shape = {
+            "TransformMeMap": {
+                "type": "map",
+                "key": {"shape": "String"},
+                "value": {"shape": self.target_shape},
+            }
+        }
+        list_shape = {"List": {"type": "list", "member": {"shape": "TransformMeMap"}}}
+        untargeted_shape = {
+            "LeaveAlone": {"type": "map", "key": {"shape": "String"}, "value": {"shape": "String"},}
+        }
+        self.add_shape(map_shape)
+        self.add_input_shape(structure_shape)
+        self.add_input_shape(list_shape)
+        self.add_input_shape(untargeted_shape)
+        self.build_models()
+
+        new_params = self.transformer.transform_all(
+            params=input_params,
+            model=self.operation_model.input_shape,
+            transformations=self.transformations,
+        )
+        self.assertEqual(
+            new_params,
+            {
+                "Structure": {"TransformMe": self.transformed_value, "Other": "other"},
+                "List": [{"foo": self.transformed_value}],
+                "LeaveAlone": {"foo": self.original_value},
+            },
+        )
+        self.assertEqual(
+            input_params,
+            {
+                "Structure": {"TransformMe": self.original_value, "Other": self.original_value},
+                "List": [{"foo": self.original_value}],
+                "LeaveAlone": {"foo": self.original_value},
+            },
+        )
+        # Untouched containers are shared rather than copied.
+        self.assertIs(new_params["LeaveAlone"], input_params["LeaveAlone"])
+
+    def test_transform_all_without_targets_returns_input(self):
+        input_params = {"LeaveAlone": {"foo": self.original_value}}
+        self.add_input_shape(
+            {
+                "LeaveAlone": {
+                    "type": "map",
+                    "key": {"shape": "String"},
+                    "value": {"shape": "String"},
+                }
+            }
+        )
+        self.build_models()
+
+        new_params = self.transformer.transform_all(
+            params=input_params,
+            model=self.operation_model.input_shape,
+            transformations=self.transformations,
+        )
+        self.assertIs(new_params, input_params)
+
+    def test_transform_all_respects_transformation_order(self):
+        calls = []
+        input_params = {"Second": "second", "First": "first"}
+        self.add_input_shape({"First": {"type": "string"}})
+        self.add_input_shape({"Second": {"type": "string"}})
+        self.build_models()
+
+        self.transformer.transform_all(
+            params=input_params,
+            model=self.operation_model.input_shape,
+            transformations={"First": calls.append, "Second": calls.append},
+        )
+        self.assertEqual(calls, ["first", "second"])
+
+
 class BaseTransformAttributeValueTest(BaseTransformationTest):
     def setUp(self):
         self.target_shape = "AttributeValue"
@@ -521,6 +622,84 @@ class TestTransformConditionExpression(BaseTransformationTest):
         )
 
 
+class TestInjectInputTransformations(BaseTransformationTest):
+    def setUp(self):
+        super(TestInjectInputTransformations, self).setUp()
+        self.add_shape({"AttributeValue": {"type": "string"}})
+        self.add_shape({"ConditionExpression": {"type": "string"}})
+        self.add_shape({"KeyExpression": {"type": "string"}})
+        self.add_shape(
+            {
+                "ItemMap": {
+                    "type": "map",
+                    "key": {"shape": "String"},
+                    "value": {"shape": "AttributeValue"},
+                }
+            }
+        )
+        self.add_shape(
+            {
+                "ExpressionAttributeNameMap": {
+                    "type": "map",
+                    "key": {"shape": "String"},
+                    "value": {"shape": "String"},
+                }
+            }
+        )
+
+        shapes = self.json_model["shapes"]
+        input_members = shapes["SampleOperationInputOutput"]["members"]
+        input_members["KeyCondition"] = {"shape": "KeyExpression"}
+        input_members["AttrCondition"] = {"shape": "ConditionExpression"}
+        input_members["Item"] = {"shape": "ItemMap"}
+        input_members["ExpressionAttributeNames"] = {"shape": "ExpressionAttributeNameMap"}
+        input_members["ExpressionAttributeValues"] = {"shape": "ItemMap"}
+        self.injector = TransformationInjector()
+        self.build_models()
+
+    def test_conditions_and_attribute_values(self):
+        params = {
+            "KeyCondition": Key("foo").eq("bar"),
+            "AttrCondition": Attr("biz").eq("baz"),
+            "Item": {"foo": "bar"},
+            "ExpressionAttributeNames": {"#a": "b"},
+            "ExpressionAttributeValues": {":c": "d"},
+        }
+        self.injector.inject_input_transformations(params, self.operation_model)
+        self.assertEqual(
+            params,
+            {
+                "KeyCondition": "#n1 = :v1",
+                "AttrCondition": "#n0 = :v0",
+                "Item": {"foo": {"S": "bar"}},
+                "ExpressionAttributeNames": {"#n0": "biz", "#n1": "foo", "#a": "b"},
+                "ExpressionAttributeValues": {
+                    ":v0": {"S": "baz"},
+                    ":v1": {"S": "bar"},
+                    ":c": {"S": "d"},
+                },
+            },
+        )
+
+    def test_does_not_modify_nested_input(self):
+        item = {"foo": "bar"}
+        names = {"#a": "b"}
+        params = {
+            "AttrCondition": Attr("biz").eq("baz"),
+            "Item": item,
+            "ExpressionAttributeNames": names,
+        }
+        self.injector.inject_input_transformations(params, self.operation_model)
+        self.assertEqual(params["Item"], {"foo": {"S": "bar"}})
+        self.assertEqual(item, {"foo": "bar"})
+        self.assertEqual(names, {"#a": "b"})
+
+    def test_non_condition_input(self):
+        params = {"KeyCondition": "foo", "AttrCondition": "bar"}
+        self.injector.inject_input_transformations(params, self.operation_model)
+        self.assertEqual(params, {"KeyCondition": "foo", "AttrCondition": "bar"})
+
+
 class TestCopyDynamoDBParams(unittest.TestCase):
     def test_copy_dynamodb_params(self):
         params = {"foo": "bar"}
@@ -528,6 +707,14 @@ class TestCopyDynamoDBParams(unittest.TestCase):
         self.assertEqual(params, new_params)
         self.assertIsNot(new_params, params)
 
+    def test_copy_dynamodb_params_shares_nested_values(self):
+        item = {"foo": b"bar"}
+        params = {"Item": item}
+        new_params = copy_dynamodb_params(params)
+        self.assertEqual(params, new_params)
+        self.assertIsNot(new_params, params)
+        self.assertIs(new_params["Item"], item)
+
 
 class TestDynamoDBHighLevelResource(unittest.TestCase):
     def setUp(self):
@@ -558,13 +745,8 @@ class TestDynamoDBHighLevelResource(unittest.TestCase):
                 ),
                 mock.call(
                     "before-parameter-build.dynamodb",
-                    mock_injector.return_value.inject_condition_expressions,
-                    unique_id="dynamodb-condition-expression",
-                ),
-                mock.call(
-                    "before-parameter-build.dynamodb",
-                    mock_injector.return_value.inject_attribute_value_input,
-                    unique_id="dynamodb-attr-value-input",
+                    mock_injector.return_value.inject_input_transformations,
+                    unique_id="dynamodb-input-transformations",
                 ),
                 mock.call(
                     "after-call.dynamodb",
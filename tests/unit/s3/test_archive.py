@@ -0,0 +1,148 @@
+# Copyright 2015 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the 'License'). You
+# may not use this file except in compliance with the License. A copy of
+# the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the 'license' file accompanying this file. This file is
+# distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
+# ANY KIND, either express or implied. See the License for the specific
+# language governing permissions and limitations under the License.
+import hashlib
+import io
+import json
+import os
+import shutil
+import tarfile
+import tempfile
+
+import mock
+from botocore.exceptions import ClientError
+from botocore.response import StreamingBody
+
+from boto3.s3.archive import INDEX_SUFFIX, S3Archive, upload_archive
+from tests import unittest
+
+
+class TestArchive(unittest.TestCase):
+    def setUp(self):
+        self.root_dir = tempfile.mkdtemp()
+        self.client = mock.Mock()
+        self.client.put_object.side_effect = self.put_object
+        self.client.download_fileobj.side_effect = self.download_fileobj
+        self.client.get_object.side_effect = self.get_object
+        self.client.head_object.side_effect = self.head_object
+        self.objects = {}
+        self.get_transfer_manager_patch = mock.patch("boto3.s3.archive.get_transfer_manager")
+        self.get_transfer_manager = self.get_transfer_manager_patch.start()
+        self.manager = self.get_transfer_manager.return_value
+        self.manager.upload.side_effect = self.upload
+
+    def tearDown(self):
+        self.get_transfer_manager_patch.stop()
+        shutil.rmtree(self.root_dir)
+
+    def upload(self, fileobj, bucket, key, extra_args, subscribers):
+        # Read in parts the way a multipart upload of a stream does.
+        parts = iter(lambda: fileobj.read(5 * 1024), b"")
+        self.objects[key] = b"".join(parts)
+        return mock.Mock()
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[Key] = Body
+
+    def download_fileobj(self, Bucket, Key, Fileobj):
+        Fileobj.write(self.objects[Key])
+
+    def get_etag(self, key):
+        return '"%s"' % hashlib.md5(self.objects[key]).hexdigest()
+
+    def head_object(self, Bucket, Key):
+        return {"ETag": self.get_etag(Key)}
+
+    def get_object(self, Bucket, Key, Range, IfMatch):
+        if IfMatch != self.get_etag(Key):
+            raise ClientError({"Error": {"Code": "PreconditionFailed"}}, "GetObject")
+        start, end = [int(i) for i in Range[len("bytes=") :].split("-")]
+        data = self.objects[Key][start : end + 1]
+        return {"Body": StreamingBody(io.BytesIO(data), len(data))}
+
+    def create_file(self, name, content):
+        filename = os.path.join(self.root_dir, name)
+        with open(filename, "wb") as f:
+            f.write(content)
+        return filename
+
+    def upload_files(self, contents):
+        files = [
+            (self.create_file("file%s" % i, content), name)
+            for i, (name, content) in enumerate(contents)
+        ]
+        upload_archive(self.client, files, "bucket", "archive.tar")
+
+    def test_upload_archive_is_a_tar_file(self):
+        self.upload_files([("a.txt", b"foo"), ("dir/b.bin", os.urandom(10000))])
+        data = self.objects["archive.tar"]
+        self.assertEqual(len(data) % tarfile.RECORDSIZE, 0)
+        with tarfile.open(fileobj=io.BytesIO(data)) as tar:
+            self.assertEqual(tar.getnames(), ["a.txt", "dir/b.bin"])
+            self.assertEqual(tar.extractfile("a.txt").read(), b"foo")
+
+    def test_upload_archive_writes_index(self):
+        self.upload_files([("a.txt", b"foo"), ("b.txt", b"")])
+        index = json.loads(self.objects["archive.tar" + INDEX_SUFFIX].decode("utf-8"))
+        self.assertEqual(index["members"], {"a.txt": [512, 3], "b.txt": [1536, 0]})
+        self.assertEqual(index["etag"], self.get_etag("archive.tar"))
+        self.assertEqual(self.objects["archive.tar"][512:515], b"foo")
+
+    def test_upload_archive_uses_transfer_manager(self):
+        config = mock.Mock()
+        callback = mock.Mock()
+        extra_args = {"ACL": "private"}
+        upload_archive(self.client, [], "bucket", "archive.tar", extra_args, callback, config)
+        self.get_transfer_manager.assert_called_with(self.client, config)
+        args = self.manager.upload.call_args[0]
+        self.assertEqual(args[1:4], ("bucket", "archive.tar", extra_args))
+        args[4][0].on_progress(future=None, bytes_transferred=1)
+        callback.assert_called_with(1)
+
+    def test_read_members(self):
+        content = os.urandom(10000)
+        self.upload_files([("a.txt", b"foo"), ("long/" * 30 + "b.bin", content), ("c", b"")])
+        archive = S3Archive(self.client, "bucket", "archive.tar")
+        self.assertEqual(archive.names(), ["a.txt", "long/" * 30 + "b.bin", "c"])
+        self.assertEqual(archive.read("a.txt"), b"foo")
+        self.assertEqual(archive.read("long/" * 30 + "b.bin"), content)
+        self.assertEqual(archive.get_size("c"), 0)
+        self.assertEqual(archive.read("c"), b"")
+        self.client.get_object.assert_called_with(
+            Bucket="bucket",
+            Key="archive.tar",
+            Range="bytes=2560-12559",
+            IfMatch=self.get_etag("archive.tar"),
+        )
+
+    def test_read_overwritten_archive(self):
+        self.upload_files([("a.txt", b"foo")])
+        archive = S3Archive(self.client, "bucket", "archive.tar")
+        self.objects["archive.tar"] = b"bar" + self.objects["archive.tar"][3:]
+        with self.assertRaises(ClientError):
+            archive.read("a.txt")
+
+    def test_interrupted_upload_is_cancelled(self):
+        future = mock.Mock()
+        future.result.side_effect = KeyboardInterrupt()
+        self.manager.upload.side_effect = None
+        self.manager.upload.return_value = future
+        with self.assertRaises(KeyboardInterrupt):
+            upload_archive(self.client, [], "bucket", "archive.tar")
+        future.cancel.assert_called_with()
+        self.assertFalse(self.client.put_object.called)
+
+    def test_read_missing_member(self):
+        self.upload_files([("a.txt", b"foo")])
+        archive = S3Archive(self.client, "bucket", "archive.tar")
+        with self.assertRaises(KeyError):
+            archive.read("b.txt")
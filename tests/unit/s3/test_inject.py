@@ -26,13 +26,21 @@ class TestInjectTransferMethods(unittest.TestCase):
         self.assertIn("upload_file", class_attributes)
         self.assertIn("download_file", class_attributes)
 
+    def setUp(self):
+        self.get_transfer_manager_patch = mock.patch("boto3.s3.inject.get_transfer_manager")
+        self.get_transfer_manager = self.get_transfer_manager_patch.start()
+        self.manager = self.get_transfer_manager.return_value
+
+    def tearDown(self):
+        self.get_transfer_manager_patch.stop()
+
     def test_upload_file_proxies_to_transfer_object(self):
         with mock.patch("boto3.s3.inject.S3Transfer") as transfer:
             inject.upload_file(
                 mock.sentinel.CLIENT, Filename="filename", Bucket="bucket", Key="key"
             )
-            transfer_in_context_manager = transfer.return_value.__enter__.return_value
-            transfer_in_context_manager.upload_file.assert_called_with(
+            transfer.assert_called_with(manager=self.manager)
+            transfer.return_value.upload_file.assert_called_with(
                 filename="filename", bucket="bucket", key="key", extra_args=None, callback=None,
             )
 
@@ -41,11 +49,35 @@ class TestInjectTransferMethods(unittest.TestCase):
             inject.download_file(
                 mock.sentinel.CLIENT, Bucket="bucket", Key="key", Filename="filename"
             )
-            transfer_in_context_manager = transfer.return_value.__enter__.return_value
-            transfer_in_context_manager.download_file.assert_called_with(
+            transfer.assert_called_with(manager=self.manager)
+            transfer.return_value.download_file.assert_called_with(
                 bucket="bucket", key="key", filename="filename", extra_args=None, callback=None,
             )
 
+    def test_managed_transfers_reuse_transfer_manager(self):
+        inject.copy(mock.sentinel.CLIENT, {"Bucket": "foo", "Key": "bar"}, "bucket", "key")
+        inject.upload_fileobj(mock.sentinel.CLIENT, mock.Mock(), "bucket", "key")
+        inject.download_fileobj(mock.sentinel.CLIENT, "bucket", "key", mock.Mock())
+        self.assertEqual(
+            self.get_transfer_manager.call_args_list, [mock.call(mock.sentinel.CLIENT, None)] * 3
+        )
+        self.assertFalse(self.manager.__exit__.called)
+        self.assertFalse(self.manager.shutdown.called)
+
+    def test_interrupted_managed_transfers_are_cancelled(self):
+        future = mock.Mock()
+        future.result.side_effect = KeyboardInterrupt()
+        self.manager.copy.return_value = future
+        self.manager.upload.return_value = future
+        self.manager.download.return_value = future
+        with self.assertRaises(KeyboardInterrupt):
+            inject.copy(mock.sentinel.CLIENT, {"Bucket": "foo", "Key": "bar"}, "bucket", "key")
+        with self.assertRaises(KeyboardInterrupt):
+            inject.upload_fileobj(mock.sentinel.CLIENT, mock.Mock(), "bucket", "key")
+        with self.assertRaises(KeyboardInterrupt):
+            inject.download_fileobj(mock.sentinel.CLIENT, "bucket", "key", mock.Mock())
+        self.assertEqual(future.cancel.call_count, 3)
+
 
 class TestBucketLoad(unittest.TestCase):
     def setUp(self):
@@ -219,6 +251,26 @@ class TestObjectTransferMethods(unittest.TestCase):
             Config=None,
         )
 
+    def test_open_for_reading(self):
+        with mock.patch("boto3.s3.inject.S3ObjectReader") as reader:
+            fileobj = inject.object_open(self.obj, "rb", Config=mock.sentinel.CONFIG)
+        reader.assert_called_with(
+            self.obj.meta.client, self.obj.bucket_name, self.obj.key, None, mock.sentinel.CONFIG
+        )
+        self.assertIs(fileobj, reader.return_value)
+
+    def test_open_for_writing(self):
+        with mock.patch("boto3.s3.inject.S3ObjectWriter") as writer:
+            fileobj = inject.object_open(self.obj, "wb", ExtraArgs={"ACL": "private"})
+        writer.assert_called_with(
+            self.obj.meta.client, self.obj.bucket_name, self.obj.key, {"ACL": "private"}, None
+        )
+        self.assertIs(fileobj, writer.return_value)
+
+    def test_open_with_invalid_mode(self):
+        with self.assertRaises(ValueError):
+            inject.object_open(self.obj, "r+")
+
 
 class TestObejctSummaryLoad(unittest.TestCase):
     def setUp(self):
@@ -0,0 +1,308 @@
+# Copyright 2015 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the 'License'). You
+# may not use this file except in compliance with the License. A copy of
+# the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the 'license' file accompanying this file. This file is
+# distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
+# ANY KIND, either express or implied. See the License for the specific
+# language governing permissions and limitations under the License.
+import io
+import os
+import threading
+
+import mock
+from botocore.exceptions import ReadTimeoutError
+from botocore.response import StreamingBody
+
+from boto3.exceptions import RetriesExceededError, S3UploadFailedError
+from boto3.s3.streams import S3ObjectReader, S3ObjectWriter
+from boto3.s3.transfer import TransferConfig
+from tests import unittest
+
+
+class TestS3ObjectReader(unittest.TestCase):
+    def setUp(self):
+        self.data = os.urandom(10 * 1024)
+        self.client = mock.Mock()
+        self.client.head_object.return_value = {"ContentLength": len(self.data), "ETag": '"etag"'}
+        self.client.get_object.side_effect = self.get_object
+        self.config = TransferConfig(multipart_chunksize=1024, max_concurrency=2)
+
+    def get_object(self, Bucket, Key, Range, IfMatch, **kwargs):
+        start, end = [int(i) for i in Range[len("bytes=") :].split("-")]
+        data = self.data[start : end + 1]
+        return {"Body": StreamingBody(io.BytesIO(data), len(data))}
+
+    def get_requested_ranges(self):
+        return sorted(c[1]["Range"] for c in self.client.get_object.call_args_list)
+
+    def open(self, **kwargs):
+        return S3ObjectReader(self.client, "bucket", "key", config=self.config, **kwargs)
+
+    def test_read_all(self):
+        with self.open() as reader:
+            self.assertEqual(reader.read(), self.data)
+            self.assertEqual(reader.read(), b"")
+        self.client.head_object.assert_called_with(Bucket="bucket", Key="key")
+        self.client.get_object.assert_called_with(
+            Bucket="bucket", Key="key", Range="bytes=9216-10239", IfMatch='"etag"'
+        )
+
+    def test_read_across_blocks(self):
+        with self.open() as reader:
+            reader.seek(1000)
+            self.assertEqual(reader.read(2000), self.data[1000:3000])
+            self.assertEqual(reader.tell(), 3000)
+
+    def test_seek(self):
+        with self.open() as reader:
+            self.assertEqual(reader.seek(-10, io.SEEK_END), len(self.data) - 10)
+            self.assertEqual(reader.read(), self.data[-10:])
+            reader.seek(5)
+            reader.seek(5, io.SEEK_CUR)
+            self.assertEqual(reader.read(5), self.data[10:15])
+            reader.seek(len(self.data) + 10)
+            self.assertEqual(reader.read(5), b"")
+            with self.assertRaises(ValueError):
+                reader.seek(-1)
+
+    def test_reads_ahead_when_sequential(self):
+        with self.open() as reader:
+            reader.read(10)
+            reader.read(10)
+        self.assertEqual(
+            self.get_requested_ranges(), ["bytes=0-1023", "bytes=1024-2047", "bytes=2048-3071"]
+        )
+
+    def test_no_read_ahead_on_random_access(self):
+        with self.open() as reader:
+            reader.seek(5000)
+            reader.read(10)
+        self.assertEqual(self.get_requested_ranges(), ["bytes=4096-5119"])
+
+    def test_caches_blocks(self):
+        with self.open() as reader:
+            reader.seek(5000)
+            reader.read(10)
+            reader.seek(5000)
+            self.assertEqual(reader.read(10), self.data[5000:5010])
+        self.assertEqual(self.get_requested_ranges().count("bytes=4096-5119"), 1)
+
+    def test_without_threads(self):
+        self.config.use_threads = False
+        with self.open() as reader:
+            self.assertEqual(reader.read(1500), self.data[:1500])
+        self.assertEqual(self.get_requested_ranges(), ["bytes=0-1023", "bytes=1024-2047"])
+
+    def test_extra_args(self):
+        with self.open(extra_args={"VersionId": "v1"}) as reader:
+            reader.read(10)
+        self.client.head_object.assert_called_with(Bucket="bucket", Key="key", VersionId="v1")
+        self.assertEqual(self.client.get_object.call_args_list[0][1]["VersionId"], "v1")
+
+    def test_invalid_extra_args(self):
+        with self.assertRaises(ValueError):
+            self.open(extra_args={"Range": "bytes=0-1"})
+
+    def test_retries_streaming_errors(self):
+        self.config.use_threads = False
+        self.config.num_download_attempts = 2
+        self.client.get_object.side_effect = ReadTimeoutError(endpoint_url="")
+        with self.open() as reader:
+            with self.assertRaises(RetriesExceededError):
+                reader.read(10)
+        self.assertEqual(self.client.get_object.call_count, 2)
+
+    def test_read_after_close(self):
+        reader = self.open()
+        reader.close()
+        with self.assertRaises(ValueError):
+            reader.read(10)
+
+    def test_readable_and_seekable(self):
+        with self.open() as reader:
+            self.assertTrue(reader.readable())
+            self.assertTrue(reader.seekable())
+            self.assertFalse(reader.writable())
+            self.assertEqual(reader.size, len(self.data))
+
+
+class FakeUpload:
+    """Reads an upload's stream in a thread, like a transfer manager"""
+
+    def __init__(self, fileobj, subscribers, fail_after=None):
+        self.data = b""
+        self.cancelled = False
+        self._exception = None
+        self._fileobj = fileobj
+        self._subscribers = subscribers
+        self._fail_after = fail_after
+        self._thread = threading.Thread(target=self._read)
+        self._thread.start()
+
+    def _read(self):
+        try:
+            while True:
+                chunk = self._fileobj.read(1024)
+                if not chunk:
+                    break
+                self.data += chunk
+                if self._fail_after is not None and len(self.data) >= self._fail_after:
+                    raise ValueError("upload failed")
+        except Exception as e:
+            self._exception = e
+        for subscriber in self._subscribers or []:
+            subscriber.on_done(future=self)
+
+    def result(self):
+        self._thread.join()
+        if self._exception is not None:
+            raise self._exception
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class TestS3ObjectWriter(unittest.TestCase):
+    def setUp(self):
+        self.client = mock.Mock()
+        self.config = TransferConfig(multipart_chunksize=4096, io_chunksize=1024)
+        self.uploads = []
+        self.fail_after = None
+        self.create_transfer_manager_patch = mock.patch(
+            "boto3.s3.streams.create_transfer_manager"
+        )
+        self.create_transfer_manager = self.create_transfer_manager_patch.start()
+        self.manager = self.create_transfer_manager.return_value
+        self.manager.upload.side_effect = self.upload
+
+    def tearDown(self):
+        self.create_transfer_manager_patch.stop()
+
+    def upload(self, fileobj, bucket, key, extra_args, subscribers=None):
+        upload = FakeUpload(fileobj, subscribers, self.fail_after)
+        self.uploads.append(upload)
+        return upload
+
+    def open(self, **kwargs):
+        return S3ObjectWriter(self.client, "bucket", "key", config=self.config, **kwargs)
+
+    def test_write(self):
+        data = os.urandom(10000)
+        with self.open(extra_args={"ACL": "private"}) as writer:
+            for i in range(0, len(data), 100):
+                self.assertEqual(writer.write(data[i : i + 100]), len(data[i : i + 100]))
+        self.assertTrue(writer.closed)
+        self.assertEqual(self.uploads[0].data, data)
+        self.create_transfer_manager.assert_called_with(self.client, self.config)
+        self.assertEqual(
+            self.manager.upload.call_args[0][1:4], ("bucket", "key", {"ACL": "private"})
+        )
+        self.manager.shutdown.assert_called_with()
+
+    def test_upload_runs_while_writing(self):
+        writer = self.open()
+        # More data than the writer may hold can only be written if the
+        # upload is reading it at the same time.
+        writer.write(os.urandom(20000))
+        self.assertGreater(len(self.uploads[0].data), 0)
+        writer.close()
+        self.assertEqual(len(self.uploads[0].data), 20000)
+
+    def test_aborts_on_exception(self):
+        with self.assertRaises(KeyError):
+            with self.open() as writer:
+                writer.write(b"foo")
+                raise KeyError()
+        upload = self.uploads[0]
+        self.assertTrue(upload.cancelled)
+        with self.assertRaises(Exception):
+            upload.result()
+        self.assertTrue(writer.closed)
+
+    def test_aborts_when_garbage_collected(self):
+        writer = self.open()
+        writer.write(b"foo")
+        writer.__del__()
+        self.assertTrue(self.uploads[0].cancelled)
+        self.manager.shutdown.assert_called_with()
+
+    def test_fails_when_upload_does_not_start(self):
+        self.manager.upload.side_effect = None
+        writer = self.open()
+        with mock.patch("boto3.s3.streams.UPLOAD_START_TIMEOUT", 0.01):
+            with self.assertRaises(S3UploadFailedError):
+                writer.write(os.urandom(10000))
+
+    def test_failed_upload_stops_writes(self):
+        self.fail_after = 2048
+        writer = self.open()
+        with self.assertRaises(ValueError):
+            for _ in range(100):
+                writer.write(os.urandom(1024))
+        writer.abort()
+
+    def test_failed_upload_raises_on_close(self):
+        self.fail_after = 1
+        writer = self.open()
+        writer.write(b"foo")
+        with self.assertRaises(ValueError):
+            writer.close()
+        self.assertTrue(writer.closed)
+
+    def test_write_after_close(self):
+        writer = self.open()
+        writer.close()
+        with self.assertRaises(ValueError):
+            writer.write(b"foo")
+
+    def test_without_threads_uploads_on_close(self):
+        self.config.use_threads = False
+        self.manager.upload.side_effect = None
+        writer = self.open()
+        writer.write(b"foo")
+        self.assertFalse(self.manager.upload.called)
+
+        def upload(fileobj, bucket, key, extra_args):
+            self.assertEqual(fileobj.read(), b"foo")
+            return mock.Mock()
+
+        self.manager.upload.side_effect = upload
+        writer.close()
+        self.assertEqual(self.manager.upload.call_count, 1)
+
+    def test_without_threads_abort_does_not_upload(self):
+        self.config.use_threads = False
+        with self.assertRaises(KeyError):
+            with self.open() as writer:
+                writer.write(b"foo")
+                raise KeyError()
+        self.assertFalse(self.manager.upload.called)
+
+
+class TestS3ObjectWriterManagers(unittest.TestCase):
+    def test_writers_do_not_wait_on_each_other(self):
+        client = mock.Mock()
+        client.create_multipart_upload.return_value = {"UploadId": "upload-id"}
+        client.upload_part.return_value = {"ETag": "etag"}
+        config = TransferConfig(
+            multipart_threshold=4096,
+            multipart_chunksize=4096,
+            io_chunksize=1024,
+            max_concurrency=2,
+        )
+        # More writers than a transfer manager runs submissions at a time
+        # each write more data than they may hold before any is closed.
+        writers = [
+            S3ObjectWriter(client, "bucket", "key%s" % i, config=config)
+            for i in range(config.max_submission_concurrency + 1)
+        ]
+        for writer in writers:
+            writer.write(os.urandom(20000))
+        for writer in writers:
+            writer.close()
+        self.assertEqual(client.complete_multipart_upload.call_count, len(writers))
@@ -10,19 +10,54 @@
 # distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
 # ANY KIND, either express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
+import datetime
+import hashlib
+import io
+import math
+import os
+import shutil
+import tempfile
+import threading
+
 import mock
-from s3transfer.futures import NonThreadedExecutor
+from botocore.client import BaseClient
+from botocore.exceptions import ReadTimeoutError
+from botocore.response import StreamingBody
+from s3transfer.bandwidth import BandwidthLimiter
+from s3transfer.download import GetObjectTask
+from s3transfer.futures import NonThreadedExecutor, TransferMeta
 from s3transfer.manager import TransferManager
+from s3transfer.tasks import CompleteMultipartUploadTask
+from s3transfer.upload import UploadPartTask
+from s3transfer.utils import CallArgs, DeferredOpenFile, ReadFileChunk
 
-from boto3.exceptions import RetriesExceededError, S3UploadFailedError
+from boto3.exceptions import RetriesExceededError, S3BulkTransferFailedError, S3UploadFailedError
 from boto3.s3.transfer import (
+    AUTO,
+    AUTO_INITIAL_CONCURRENCY,
+    AUTO_MAX_CONCURRENCY,
+    AUTO_MIN_CHUNKSIZE,
+    MB,
+    TRANSFER_MANAGERS_ATTR,
     ClientError,
+    MmapOSUtils,
     OSUtils,
     ProgressCallbackInvoker,
     S3Transfer,
     S3TransferRetriesExceededError,
     TransferConfig,
+    _AdaptiveConcurrency,
+    _BulkTransferTracker,
+    _get_file_etag,
+    _LimitedRequestExecutor,
+    _reset_transfer_managers_lock,
+    _TokenBucket,
+    _TransferSizedConfig,
+    _TunedTransferManager,
     create_transfer_manager,
+    get_chunksize,
+    get_transfer_manager,
+    shutdown_transfer_managers,
 )
 from tests import unittest
 
@@ -46,6 +81,373 @@ class TestCreateTransferManager(unittest.TestCase):
                 manager.call_args, mock.call(client, config, None, NonThreadedExecutor)
             )
 
+    def test_create_transfer_manager_with_mmap(self):
+        client = object()
+        config = TransferConfig(use_mmap=True)
+        with mock.patch("boto3.s3.transfer.TransferManager") as manager:
+            create_transfer_manager(client, config)
+            self.assertIsInstance(manager.call_args[0][2], MmapOSUtils)
+
+    def test_create_transfer_manager_with_auto_config(self):
+        client = mock.Mock()
+        manager = create_transfer_manager(client, TransferConfig(max_concurrency=AUTO))
+        self.assertIsInstance(manager, _TunedTransferManager)
+        self.assertEqual(
+            client.meta.events.register.call_args[0][0], "needs-retry.s3"
+        )
+        manager.shutdown()
+        self.assertEqual(
+            client.meta.events.unregister.call_args[0][0], "needs-retry.s3"
+        )
+
+    def test_create_transfer_manager_with_max_bandwidth(self):
+        manager = create_transfer_manager(mock.Mock(), TransferConfig(max_bandwidth=MB))
+        self.assertIsInstance(manager, _TunedTransferManager)
+        self.assertIsInstance(manager.bandwidth_limiter, BandwidthLimiter)
+        self.assertIsNone(manager.request_limiter)
+        manager.shutdown()
+
+    def test_create_transfer_manager_with_max_requests_per_second(self):
+        config = TransferConfig(max_requests_per_second=100)
+        manager = create_transfer_manager(mock.Mock(), config)
+        self.assertIsInstance(manager.request_limiter, _TokenBucket)
+        self.assertIsNone(manager.bandwidth_limiter)
+        manager.shutdown()
+
+
+class TestGetChunksize(unittest.TestCase):
+    def test_fixed_chunksize(self):
+        config = TransferConfig(multipart_chunksize=5 * MB)
+        self.assertEqual(get_chunksize(config, 100 * 1024 * MB), 5 * MB)
+
+    def test_auto_chunksize_of_unknown_size(self):
+        config = TransferConfig(multipart_chunksize=AUTO)
+        self.assertEqual(get_chunksize(config), AUTO_MIN_CHUNKSIZE)
+
+    def test_auto_chunksize_of_small_object(self):
+        config = TransferConfig(multipart_chunksize=AUTO)
+        self.assertEqual(get_chunksize(config, 100 * MB), AUTO_MIN_CHUNKSIZE)
+
+    def test_auto_chunksize_of_large_object(self):
+        config = TransferConfig(multipart_chunksize=AUTO)
+        self.assertEqual(get_chunksize(config, 100 * 1024 * MB), 103 * MB)
+
+    def test_auto_chunksize_within_part_limits(self):
+        config = TransferConfig(multipart_chunksize=AUTO)
+        size = 5 * 1024 * 1024 * MB
+        chunksize = get_chunksize(config, size)
+        self.assertLessEqual(chunksize, 5 * 1024 * MB)
+        self.assertLessEqual(math.ceil(size / chunksize), 10000)
+
+    def test_transfer_sized_config(self):
+        config = TransferConfig(multipart_chunksize=AUTO, num_download_attempts=3)
+        meta = TransferMeta()
+        sized_config = _TransferSizedConfig(config, meta)
+        meta.provide_transfer_size(100 * 1024 * MB)
+        self.assertEqual(sized_config.multipart_chunksize, 103 * MB)
+        self.assertEqual(sized_config.num_download_attempts, 3)
+
+
+class TestAdaptiveConcurrency(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.concurrency = _AdaptiveConcurrency(12, clock=lambda: self.now)
+
+    def fill(self):
+        # Reach the limit so that the period counts as saturated.
+        for _ in range(self.concurrency.limit - self.concurrency._in_flight):
+            self.concurrency.acquire()
+
+    def transfer_period(self, amount):
+        self.fill()
+        self.now += 1
+        self.concurrency.add_bytes(amount)
+
+    def test_starts_at_initial_limit(self):
+        self.assertEqual(self.concurrency.limit, AUTO_INITIAL_CONCURRENCY)
+
+    def test_raises_limit_while_throughput_improves(self):
+        self.transfer_period(100)
+        self.transfer_period(200)
+        self.assertEqual(self.concurrency.limit, 12)
+        # The limit does not go past the maximum.
+        self.transfer_period(400)
+        self.assertEqual(self.concurrency.limit, 12)
+
+    def test_keeps_limit_when_throughput_is_flat(self):
+        self.transfer_period(100)
+        self.transfer_period(101)
+        self.assertEqual(self.concurrency.limit, 11)
+
+    def test_lowers_limit_when_throughput_drops(self):
+        self.transfer_period(100)
+        self.transfer_period(50)
+        self.assertEqual(self.concurrency.limit, 10)
+
+    def test_ignores_unsaturated_periods(self):
+        self.concurrency.acquire()
+        self.now += 1
+        self.concurrency.add_bytes(100)
+        self.assertEqual(self.concurrency.limit, 10)
+
+    def test_waits_for_period_to_end(self):
+        self.fill()
+        self.now += 0.5
+        self.concurrency.add_bytes(100)
+        self.assertEqual(self.concurrency.limit, 10)
+
+    def test_halves_limit_on_errors(self):
+        self.concurrency.add_error()
+        self.assertEqual(self.concurrency.limit, 5)
+        # Errors of the same period only count once.
+        self.concurrency.add_error()
+        self.assertEqual(self.concurrency.limit, 5)
+        self.now += 1
+        self.concurrency.add_error()
+        self.assertEqual(self.concurrency.limit, 2)
+
+    def test_limit_is_at_least_one(self):
+        for _ in range(5):
+            self.now += 1
+            self.concurrency.add_error()
+        self.assertEqual(self.concurrency.limit, 1)
+
+    def test_throttled_requests(self):
+        self.concurrency.on_needs_retry(response=(mock.Mock(status_code=503), {}))
+        self.assertEqual(self.concurrency.limit, 5)
+
+    def test_failed_requests(self):
+        self.concurrency.on_needs_retry(caught_exception=ReadTimeoutError(endpoint_url=""))
+        self.assertEqual(self.concurrency.limit, 5)
+
+    def test_successful_requests(self):
+        self.concurrency.on_needs_retry(response=(mock.Mock(status_code=200), {}))
+        self.assertEqual(self.concurrency.limit, 10)
+
+    def test_acquire_waits_for_release(self):
+        self.fill()
+        acquired = threading.Event()
+
+        def acquire():
+            self.concurrency.acquire()
+            acquired.set()
+
+        thread = threading.Thread(target=acquire)
+        thread.start()
+        self.assertFalse(acquired.wait(0.1))
+        self.concurrency.release()
+        self.assertTrue(acquired.wait(5))
+        thread.join()
+
+
+class TestTokenBucket(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.sleep = mock.Mock()
+        self.bucket = _TokenBucket(10, clock=lambda: self.now, sleep=self.sleep)
+
+    def test_allows_burst_of_one_second(self):
+        for _ in range(10):
+            self.bucket.consume()
+        self.sleep.assert_not_called()
+
+    def test_waits_for_tokens(self):
+        for _ in range(10):
+            self.bucket.consume()
+        self.bucket.consume()
+        self.sleep.assert_called_with(mock.ANY)
+        self.assertAlmostEqual(self.sleep.call_args[0][0], 0.1)
+        # Consumers waiting at the same time are served one after the other.
+        self.bucket.consume()
+        self.assertAlmostEqual(self.sleep.call_args[0][0], 0.2)
+
+    def test_refills_over_time(self):
+        for _ in range(10):
+            self.bucket.consume()
+        self.now += 0.5
+        for _ in range(5):
+            self.bucket.consume()
+        self.sleep.assert_not_called()
+
+    def test_does_not_store_more_than_one_second(self):
+        self.now += 100
+        for _ in range(11):
+            self.bucket.consume()
+        self.assertEqual(self.sleep.call_count, 1)
+
+    def test_rate_below_one(self):
+        bucket = _TokenBucket(0.5, clock=lambda: self.now, sleep=self.sleep)
+        bucket.consume()
+        bucket.consume()
+        self.assertAlmostEqual(self.sleep.call_args[0][0], 2)
+
+
+class TestLimitedRequestExecutor(unittest.TestCase):
+    def setUp(self):
+        self.request_executor = mock.Mock()
+        self.request_executor.submit.side_effect = lambda task, tag, block: task()
+        self.request_limiter = mock.Mock(_TokenBucket)
+        self.concurrency = mock.Mock(_AdaptiveConcurrency)
+        self.executor = _LimitedRequestExecutor(self.request_executor, None, self.concurrency)
+
+    def test_limits_part_tasks(self):
+        task = mock.Mock(UploadPartTask, transfer_id=1)
+        self.executor.submit(task, tag="tag")
+        self.assertEqual(task.call_count, 1)
+        self.concurrency.acquire.assert_called_with()
+        self.concurrency.release.assert_called_with()
+        limited_task = self.request_executor.submit.call_args[0][0]
+        self.assertEqual(limited_task.transfer_id, 1)
+        self.assertEqual(self.request_executor.submit.call_args[1], {"tag": "tag", "block": True})
+
+    def test_does_not_limit_other_tasks(self):
+        task = mock.Mock(CompleteMultipartUploadTask)
+        self.executor.submit(task)
+        self.assertIs(self.request_executor.submit.call_args[0][0], task)
+        self.concurrency.acquire.assert_not_called()
+
+    def test_releases_after_failure(self):
+        task = mock.Mock(GetObjectTask, side_effect=ValueError())
+        with self.assertRaises(ValueError):
+            self.executor.submit(task)
+        self.concurrency.release.assert_called_with()
+
+    def test_limits_requests_of_all_tasks(self):
+        executor = _LimitedRequestExecutor(self.request_executor, self.request_limiter, None)
+        executor.submit(mock.Mock(UploadPartTask))
+        executor.submit(mock.Mock(CompleteMultipartUploadTask))
+        self.assertEqual(self.request_limiter.consume.call_count, 2)
+
+    def test_limits_requests_and_concurrency(self):
+        executor = _LimitedRequestExecutor(
+            self.request_executor, self.request_limiter, self.concurrency
+        )
+        executor.submit(mock.Mock(GetObjectTask))
+        self.request_limiter.consume.assert_called_with()
+        self.concurrency.acquire.assert_called_with()
+
+
+class TestMmapOSUtils(unittest.TestCase):
+    def setUp(self):
+        self.root_dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.root_dir, "file")
+        self.data = os.urandom(10000)
+        with open(self.filename, "wb") as f:
+            f.write(self.data)
+        self.osutil = MmapOSUtils()
+
+    def tearDown(self):
+        shutil.rmtree(self.root_dir)
+
+    def test_read_part(self):
+        # Parts are read the way the transfer manager reads them.
+        fileobj = DeferredOpenFile(self.filename, 4096, open_function=self.osutil.open)
+        with ReadFileChunk(fileobj, 4096, len(self.data), enable_callbacks=False) as chunk:
+            self.assertEqual(len(chunk), 4096)
+            data = chunk.read(1000)
+            self.assertIsInstance(data, memoryview)
+            self.assertEqual(bytes(data) + bytes(chunk.read()), self.data[4096:8192])
+            chunk.seek(0)
+            self.assertEqual(bytes(chunk.read(10)), self.data[4096:4106])
+
+    def test_read_to_end(self):
+        with self.osutil.open(self.filename, "rb") as f:
+            self.assertEqual(f.seek(-10, os.SEEK_END), len(self.data) - 10)
+            self.assertEqual(bytes(f.read()), self.data[-10:])
+            self.assertEqual(f.read(10), b"")
+            self.assertEqual(f.tell(), len(self.data))
+
+    def test_parts_share_mapping(self):
+        first = self.osutil.open(self.filename, "rb")
+        second = self.osutil.open(self.filename, "rb")
+        self.assertIs(first.read(1).obj, second.read(1).obj)
+
+    def test_empty_file(self):
+        filename = os.path.join(self.root_dir, "empty")
+        open(filename, "wb").close()
+        with self.osutil.open(filename, "rb") as f:
+            self.assertEqual(f.read(), b"")
+
+    def test_open_for_writing(self):
+        with self.osutil.open(self.filename, "wb") as f:
+            f.write(b"foo")
+        with open(self.filename, "rb") as f:
+            self.assertEqual(f.read(), b"foo")
+
+
+class TestGetTransferManager(unittest.TestCase):
+    def setUp(self):
+        self.client = mock.Mock(BaseClient)
+        self.create_transfer_manager_patch = mock.patch(
+            "boto3.s3.transfer.create_transfer_manager",
+            side_effect=lambda client, config: mock.Mock(config=config),
+        )
+        self.create_transfer_manager = self.create_transfer_manager_patch.start()
+
+    def tearDown(self):
+        self.create_transfer_manager_patch.stop()
+
+    def test_reuses_manager_for_same_config(self):
+        manager = get_transfer_manager(self.client, TransferConfig())
+        self.assertIs(get_transfer_manager(self.client, TransferConfig()), manager)
+        self.assertIs(get_transfer_manager(self.client), manager)
+        self.assertEqual(self.create_transfer_manager.call_count, 1)
+
+    def test_creates_manager_per_config(self):
+        manager = get_transfer_manager(self.client, TransferConfig())
+        other = get_transfer_manager(self.client, TransferConfig(max_concurrency=2))
+        self.assertIsNot(other, manager)
+        self.assertEqual(other.config.max_request_concurrency, 2)
+
+    def test_creates_manager_per_client(self):
+        manager = get_transfer_manager(self.client)
+        self.assertIsNot(get_transfer_manager(mock.Mock(BaseClient)), manager)
+
+    def test_manager_config_is_not_affected_by_later_changes(self):
+        config = TransferConfig()
+        manager = get_transfer_manager(self.client, config)
+        config.max_concurrency = 2
+        self.assertEqual(manager.config.max_request_concurrency, 10)
+        self.assertIsNot(get_transfer_manager(self.client, config), manager)
+
+    def test_discards_managers_after_fork(self):
+        with mock.patch("os.getpid", return_value=1):
+            manager = get_transfer_manager(self.client)
+        with mock.patch("os.getpid", return_value=2):
+            self.assertIsNot(get_transfer_manager(self.client), manager)
+        self.assertFalse(manager.shutdown.called)
+
+    def test_evicts_least_recently_used_manager(self):
+        with mock.patch("boto3.s3.transfer.MAX_TRANSFER_MANAGERS", 2):
+            manager = get_transfer_manager(self.client, TransferConfig(multipart_chunksize=MB))
+            other = get_transfer_manager(self.client, TransferConfig(multipart_chunksize=2 * MB))
+            self.assertIs(
+                get_transfer_manager(self.client, TransferConfig(multipart_chunksize=MB)), manager
+            )
+            get_transfer_manager(self.client, TransferConfig(multipart_chunksize=3 * MB))
+        other.shutdown.assert_called_with()
+        self.assertFalse(manager.shutdown.called)
+        self.assertEqual(len(getattr(self.client, TRANSFER_MANAGERS_ATTR)[1]), 2)
+
+    def test_lock_is_reset_after_fork(self):
+        with mock.patch("boto3.s3.transfer._transfer_managers_lock", threading.Lock()) as lock:
+            # Held by a thread that does not exist in the forked child.
+            lock.acquire()
+            _reset_transfer_managers_lock()
+            get_transfer_manager(self.client)
+
+    def test_shutdown_transfer_managers(self):
+        manager = get_transfer_manager(self.client)
+        other = get_transfer_manager(self.client, TransferConfig(use_threads=False))
+        shutdown_transfer_managers(self.client)
+        manager.shutdown.assert_called_with(False)
+        other.shutdown.assert_called_with(False)
+        self.assertIsNot(get_transfer_manager(self.client), manager)
+
+    def test_shutdown_without_managers(self):
+        shutdown_transfer_managers(self.client, cancel=True)
+        self.assertEqual(self.create_transfer_manager.call_count, 0)
+
 
 class TestTransferConfig(unittest.TestCase):
     def assert_value_of_actual_and_alias(self, config, actual, alias, ref_value):
@@ -71,6 +473,27 @@ class TestTransferConfig(unittest.TestCase):
             config, "max_request_concurrency", "max_concurrency", new_value
         )
 
+    def test_alias_max_concurrency_auto(self):
+        config = TransferConfig(max_concurrency=AUTO)
+        self.assertEqual(config.max_concurrency, AUTO)
+        # The transfer manager creates as many threads as it may use.
+        self.assertEqual(config.max_request_concurrency, AUTO_MAX_CONCURRENCY)
+
+        config.max_concurrency = 15
+        self.assert_value_of_actual_and_alias(
+            config, "max_request_concurrency", "max_concurrency", 15
+        )
+
+    def test_max_bandwidth(self):
+        config = TransferConfig(max_bandwidth=MB)
+        self.assertEqual(config.max_bandwidth, MB)
+
+    def test_max_requests_per_second(self):
+        config = TransferConfig(max_requests_per_second=100)
+        self.assertEqual(config.max_requests_per_second, 100)
+        with self.assertRaises(ValueError):
+            TransferConfig(max_requests_per_second=0)
+
     def test_alias_max_io_queue(self):
         ref_value = 10
         config = TransferConfig(max_io_queue=ref_value)
@@ -150,6 +573,17 @@ class TestS3Transfer(unittest.TestCase):
         with self.assertRaises(S3UploadFailedError):
             self.transfer.upload_file("smallfile", "bucket", "key")
 
+    def test_interrupted_transfers_are_cancelled(self):
+        future = mock.Mock()
+        future.result.side_effect = KeyboardInterrupt()
+        self.manager.upload.return_value = future
+        self.manager.download.return_value = future
+        with self.assertRaises(KeyboardInterrupt):
+            self.transfer.upload_file("smallfile", "bucket", "key")
+        with self.assertRaises(KeyboardInterrupt):
+            self.transfer.download_file("bucket", "key", "/tmp/smallfile")
+        self.assertEqual(future.cancel.call_count, 2)
+
     def test_can_create_with_just_client(self):
         transfer = S3Transfer(client=mock.Mock())
         self.assertIsInstance(transfer, S3Transfer)
@@ -206,3 +640,349 @@ class TestS3Transfer(unittest.TestCase):
             manager.__exit__.call_args,
             mock.call(type(raised_exception), raised_exception, mock.ANY),
         )
+
+
+class TestS3TransferBulk(unittest.TestCase):
+    def setUp(self):
+        self.root_dir = tempfile.mkdtemp()
+        self.client = mock.Mock()
+        self.manager = mock.Mock(TransferManager(self.client))
+        self.manager.client = self.client
+        self.manager.upload.side_effect = self.complete_upload
+        self.manager.download.side_effect = self.complete_download
+        self.manager.config = TransferConfig()
+        self.transfer = S3Transfer(manager=self.manager)
+        self.failed_keys = []
+
+    def tearDown(self):
+        shutil.rmtree(self.root_dir)
+
+    def complete_upload(self, filename, bucket, key, extra_args, subscribers):
+        return self.complete_transfer(key, subscribers)
+
+    def complete_download(self, bucket, key, filename, extra_args, subscribers):
+        return self.complete_transfer(key, subscribers)
+
+    def complete_transfer(self, key, subscribers):
+        # Complete each transfer right away, like a non-threaded executor.
+        future = mock.Mock(meta=TransferMeta(CallArgs(key=key)))
+        if key in self.failed_keys:
+            future.result.side_effect = ValueError(key)
+        for subscriber in subscribers:
+            subscriber.on_done(future=future)
+        return future
+
+    def create_files(self, *paths, mtime=None):
+        for path in paths:
+            filename = os.path.join(self.root_dir, *path.split("/"))
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+            with open(filename, "w") as f:
+                f.write("foo")
+            if mtime is not None:
+                os.utime(filename, (mtime, mtime))
+
+    def get_uploaded_keys(self):
+        return [c[0][2] for c in self.manager.upload.call_args_list]
+
+    def stub_listing(self, *keys):
+        self.client.get_paginator.return_value.paginate.return_value = [
+            {"Contents": [{"Key": key} for key in keys]}
+        ]
+
+    def stub_objects(self, objects):
+        self.client.get_paginator.return_value.paginate.return_value = [
+            {
+                "Contents": [
+                    {
+                        "Key": key,
+                        "Size": size,
+                        "LastModified": datetime.datetime.fromtimestamp(
+                            last_modified, datetime.timezone.utc
+                        ),
+                        "ETag": '"%s"' % etag,
+                    }
+                    for key, (size, last_modified, etag) in objects.items()
+                ]
+            }
+        ]
+
+    def get_downloaded_files(self):
+        return [
+            (c[0][1], os.path.relpath(c[0][2], self.root_dir).replace(os.sep, "/"))
+            for c in self.manager.download.call_args_list
+        ]
+
+    def test_upload_directory(self):
+        self.create_files("a.txt", "sub/b.txt", "sub/deeper/c.txt")
+        self.transfer.upload_directory(self.root_dir, "bucket", prefix="backup")
+        self.assertEqual(
+            self.get_uploaded_keys(),
+            ["backup/a.txt", "backup/sub/b.txt", "backup/sub/deeper/c.txt"],
+        )
+        self.assertEqual(self.manager.upload.call_args[0][1], "bucket")
+
+    def test_upload_directory_filters(self):
+        self.create_files("a.txt", "b.log", "sub/c.txt", "sub/d.txt")
+        self.transfer.upload_directory(
+            self.root_dir, "bucket", include=["*.txt"], exclude=["sub/d*"]
+        )
+        self.assertEqual(self.get_uploaded_keys(), ["a.txt", "sub/c.txt"])
+
+    def test_upload_directory_reports_all_failures(self):
+        self.create_files("a.txt", "b.txt", "c.txt")
+        self.failed_keys = ["a.txt", "c.txt"]
+        with self.assertRaises(S3BulkTransferFailedError) as cm:
+            self.transfer.upload_directory(self.root_dir, "bucket")
+        self.assertEqual(self.manager.upload.call_count, 3)
+        self.assertEqual(sorted(cm.exception.failures), ["a.txt", "c.txt"])
+        self.assertIsInstance(cm.exception.failures["a.txt"], ValueError)
+
+    def test_upload_directory_shares_progress_callback(self):
+        self.create_files("a.txt", "b.txt")
+        callback = mock.Mock()
+        self.transfer.upload_directory(self.root_dir, "bucket", callback=callback)
+        invokers = [c[0][4][-1] for c in self.manager.upload.call_args_list]
+        self.assertIsInstance(invokers[0], ProgressCallbackInvoker)
+        self.assertIs(invokers[0], invokers[1])
+
+    def test_bounds_in_flight_transfers(self):
+        tracker = _BulkTransferTracker(max_in_flight=2)
+        tracker.acquire()
+        tracker.acquire()
+        self.assertFalse(tracker._slots.acquire(blocking=False))
+        tracker.on_done(future=mock.Mock())
+        self.assertTrue(tracker._slots.acquire(blocking=False))
+
+    def test_max_in_flight_must_be_positive(self):
+        with self.assertRaises(ValueError):
+            self.transfer.upload_directory(self.root_dir, "bucket", max_in_flight=0)
+
+    def test_download_prefix(self):
+        self.stub_listing("backup/a.txt", "backup/sub/", "backup/sub/b.txt")
+        self.transfer.download_prefix("bucket", "backup", self.root_dir)
+        self.client.get_paginator.assert_called_with("list_objects_v2")
+        self.client.get_paginator.return_value.paginate.assert_called_with(
+            Bucket="bucket", Prefix="backup/"
+        )
+        self.assertEqual(
+            self.get_downloaded_files(),
+            [("backup/a.txt", "a.txt"), ("backup/sub/b.txt", "sub/b.txt")],
+        )
+        self.assertTrue(os.path.isdir(os.path.join(self.root_dir, "sub")))
+
+    def test_download_prefix_filters(self):
+        self.stub_listing("a.txt", "b.log", "sub/c.txt")
+        self.transfer.download_prefix("bucket", "", self.root_dir, exclude=["sub/*", "*.log"])
+        self.assertEqual(self.get_downloaded_files(), [("a.txt", "a.txt")])
+
+    def test_download_prefix_rejects_keys_outside_directory(self):
+        self.stub_listing("a.txt", "../b.txt")
+        with self.assertRaises(S3BulkTransferFailedError) as cm:
+            self.transfer.download_prefix("bucket", "", self.root_dir)
+        self.assertEqual(list(cm.exception.failures), ["../b.txt"])
+        self.assertEqual(self.get_downloaded_files(), [("a.txt", "a.txt")])
+
+    def test_sync_uploads_changed_files(self):
+        self.create_files("new.txt", "resized.txt", "modified.txt", mtime=2000)
+        self.create_files("unchanged.txt", mtime=1000)
+        self.stub_objects(
+            {
+                "backup/resized.txt": (4, 3000, "etag"),
+                "backup/modified.txt": (3, 1500, "etag"),
+                "backup/unchanged.txt": (3, 1500, "etag"),
+            }
+        )
+        self.transfer.sync(self.root_dir, "bucket", "backup")
+        self.client.get_paginator.return_value.paginate.assert_called_with(
+            Bucket="bucket", Prefix="backup/"
+        )
+        self.assertEqual(
+            self.get_uploaded_keys(),
+            ["backup/modified.txt", "backup/new.txt", "backup/resized.txt"],
+        )
+
+    def test_sync_filters(self):
+        self.create_files("a.txt", "b.log")
+        self.stub_objects({})
+        self.transfer.sync(self.root_dir, "bucket", exclude=["*.log"])
+        self.assertEqual(self.get_uploaded_keys(), ["a.txt"])
+
+    def test_sync_compares_checksums(self):
+        self.create_files("same.txt", "changed.txt", mtime=2000)
+        self.create_files("multipart.txt", mtime=1000)
+        md5 = hashlib.md5(b"foo").hexdigest()
+        self.stub_objects(
+            {
+                "same.txt": (3, 1000, md5),
+                "changed.txt": (3, 3000, hashlib.md5(b"bar").hexdigest()),
+                # The part count does not match the configured chunksize,
+                # so the modification time is compared instead.
+                "multipart.txt": (3, 1500, "etag-2"),
+            }
+        )
+        self.transfer.sync(self.root_dir, "bucket", compare_checksums=True, hash_workers=1)
+        self.assertEqual(self.get_uploaded_keys(), ["changed.txt"])
+
+    def test_get_file_etag(self):
+        filename = os.path.join(self.root_dir, "file")
+        data = os.urandom(int(2.5 * MB))
+        with open(filename, "wb") as f:
+            f.write(data)
+        self.assertEqual(_get_file_etag(filename, 0), hashlib.md5(data).hexdigest())
+        part_digests = b"".join(
+            hashlib.md5(data[i : i + MB]).digest() for i in range(0, len(data), MB)
+        )
+        self.assertEqual(
+            _get_file_etag(filename, MB), hashlib.md5(part_digests).hexdigest() + "-3"
+        )
+
+
+@unittest.skipIf(not hasattr(os, "pwrite"), "os.pwrite is not available")
+class TestS3TransferPwriteDownload(unittest.TestCase):
+    def setUp(self):
+        self.root_dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.root_dir, "file")
+        self.data = os.urandom(10 * 1024)
+        self.client = mock.Mock()
+        self.client.head_object.return_value = {"ContentLength": len(self.data), "ETag": '"etag"'}
+        self.client.get_object.side_effect = self.get_object
+        self.config = TransferConfig(
+            multipart_chunksize=1024, max_concurrency=4, io_chunksize=256, use_pwrite=True
+        )
+        self.manager = mock.Mock(TransferManager(self.client))
+        self.manager.client = self.client
+        self.manager.config = self.config
+        self.transfer = S3Transfer(manager=self.manager)
+
+    def tearDown(self):
+        shutil.rmtree(self.root_dir)
+
+    def get_object(self, Bucket, Key, Range, IfMatch, **kwargs):
+        start, end = [int(i) for i in Range[len("bytes=") :].split("-")]
+        data = self.data[start : end + 1]
+        return {"Body": StreamingBody(io.BytesIO(data), len(data))}
+
+    def get_downloaded_data(self):
+        with open(self.filename, "rb") as f:
+            return f.read()
+
+    def test_download_file(self):
+        self.transfer.download_file("bucket", "key", self.filename)
+        self.assertEqual(self.get_downloaded_data(), self.data)
+        self.assertEqual(self.client.get_object.call_count, 10)
+        self.assertEqual(os.listdir(self.root_dir), ["file"])
+        self.manager.download.assert_not_called()
+
+    def test_download_file_without_threads(self):
+        self.config.use_threads = False
+        self.transfer.download_file("bucket", "key", self.filename)
+        self.assertEqual(self.get_downloaded_data(), self.data)
+
+    def test_ranges_match_etag(self):
+        self.transfer.download_file("bucket", "key", self.filename)
+        ranges = sorted(
+            (c[1]["Range"], c[1]["IfMatch"]) for c in self.client.get_object.call_args_list
+        )
+        self.assertEqual(ranges[0], ("bytes=0-1023", '"etag"'))
+        self.assertEqual(ranges[-1], ("bytes=9216-10239", '"etag"'))
+
+    def test_uneven_last_range(self):
+        self.data = self.data[:2500]
+        self.client.head_object.return_value["ContentLength"] = 2500
+        self.transfer.download_file("bucket", "key", self.filename)
+        self.assertEqual(self.get_downloaded_data(), self.data)
+
+    def test_empty_object(self):
+        self.client.head_object.return_value["ContentLength"] = 0
+        self.transfer.download_file("bucket", "key", self.filename)
+        self.assertEqual(self.get_downloaded_data(), b"")
+        self.client.get_object.assert_not_called()
+
+    @unittest.skipIf(not hasattr(os, "posix_fallocate"), "os.posix_fallocate is not available")
+    def test_preallocates_file(self):
+        with mock.patch("os.posix_fallocate") as fallocate:
+            self.transfer.download_file("bucket", "key", self.filename)
+        fallocate.assert_called_with(mock.ANY, 0, len(self.data))
+        self.assertEqual(self.get_downloaded_data(), self.data)
+
+    @unittest.skipIf(not hasattr(os, "posix_fallocate"), "os.posix_fallocate is not available")
+    def test_preallocation_not_supported(self):
+        with mock.patch("os.posix_fallocate", side_effect=OSError()):
+            self.transfer.download_file("bucket", "key", self.filename)
+        self.assertEqual(self.get_downloaded_data(), self.data)
+
+    def test_extra_args(self):
+        self.transfer.download_file(
+            "bucket", "key", self.filename, extra_args={"VersionId": "v1"}
+        )
+        self.client.head_object.assert_called_with(Bucket="bucket", Key="key", VersionId="v1")
+        self.assertEqual(self.client.get_object.call_args[1]["VersionId"], "v1")
+
+    def test_invalid_extra_args(self):
+        with self.assertRaises(ValueError):
+            self.transfer.download_file(
+                "bucket", "key", self.filename, extra_args={"Range": "bytes=0-1"}
+            )
+
+    def test_progress_callback(self):
+        callback = mock.Mock()
+        self.transfer.download_file("bucket", "key", self.filename, callback=callback)
+        self.assertEqual(sum(c[0][0] for c in callback.call_args_list), len(self.data))
+
+    def test_retries_streaming_errors(self):
+        self.config.use_threads = False
+        callback = mock.Mock()
+        attempts = []
+
+        def get_object(**kwargs):
+            response = self.get_object(**kwargs)
+            if not attempts:
+                attempts.append(kwargs["Range"])
+                # Fail after the first chunk of the first range was written.
+                body = mock.Mock()
+                body.read.side_effect = [
+                    response["Body"].read(256),
+                    ReadTimeoutError(endpoint_url=""),
+                ]
+                return {"Body": body}
+            return response
+
+        self.client.get_object.side_effect = get_object
+        self.transfer.download_file("bucket", "key", self.filename, callback=callback)
+        self.assertEqual(self.get_downloaded_data(), self.data)
+        self.assertEqual(self.client.get_object.call_count, 11)
+        self.assertIn(mock.call(-256), callback.call_args_list)
+        self.assertEqual(sum(c[0][0] for c in callback.call_args_list), len(self.data))
+
+    def test_retries_exceeded(self):
+        self.client.get_object.side_effect = ReadTimeoutError(endpoint_url="")
+        with self.assertRaises(RetriesExceededError):
+            self.transfer.download_file("bucket", "key", self.filename)
+        self.assertEqual(os.listdir(self.root_dir), [])
+
+    def test_removes_temp_file_on_failure(self):
+        self.client.get_object.side_effect = ValueError("failed")
+        with self.assertRaises(ValueError):
+            self.transfer.download_file("bucket", "key", self.filename)
+        self.assertEqual(os.listdir(self.root_dir), [])
+
+    def test_limits_requests(self):
+        self.manager.request_limiter = mock.Mock(_TokenBucket)
+        self.transfer.download_file("bucket", "key", self.filename)
+        # The HeadObject and the GetObject of each range.
+        self.assertEqual(self.manager.request_limiter.consume.call_count, 11)
+
+    def test_limits_bandwidth(self):
+        self.manager.bandwidth_limiter = mock.Mock()
+        self.manager.bandwidth_limiter.get_bandwith_limited_stream.side_effect = (
+            lambda body, coordinator: body
+        )
+        self.transfer.download_file("bucket", "key", self.filename)
+        self.assertEqual(self.get_downloaded_data(), self.data)
+        self.assertEqual(self.manager.bandwidth_limiter.get_bandwith_limited_stream.call_count, 10)
+
+    def test_uses_transfer_manager_when_disabled(self):
+        self.config.use_pwrite = False
+        self.transfer.download_file("bucket", "key", self.filename)
+        self.manager.download.assert_called_with("bucket", "key", self.filename, None, [])
+        self.client.head_object.assert_not_called()